@@ -0,0 +1,42 @@
+# blog/busqueda.py
+# Documentos de búsqueda de las publicaciones (ver core/busqueda.py)
+
+from django.db.models.signals import m2m_changed
+
+from core.busqueda import registrar_indice, indexar, AMBITO_DOCUMENTOS
+from core.resultados import invalidar_ambito
+from .models import Post, CategoriaBlog
+
+# Tipo de documento de las publicaciones
+TIPO_POST = 'post'
+
+
+def _documento_post(post):
+    categorias = [categoria.nombre for categoria in post.categorias.all()]
+    return {
+        'nombre': post.titulo,
+        'descripcion': post.contenido,
+        'categoria': ', '.join(categorias) or 'Blog',
+        'imagen': post.imagen_destacada,
+        'fecha': post.fecha_publicacion,
+    }
+
+
+def _reindexar_categorias(sender, instance, action, reverse, pk_set, **kwargs):
+    """El admin guarda las categorías después del post: se vuelve a indexar"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    for pk in (pk_set or []) if reverse else [instance.pk]:
+        indexar(TIPO_POST, pk)
+    invalidar_ambito(AMBITO_DOCUMENTOS)
+
+
+registrar_indice(
+    TIPO_POST, Post,
+    lambda: Post.objects.filter(publicado=True).prefetch_related('categorias'),
+    _documento_post,
+    relaciones={CategoriaBlog: 'categorias'},
+)
+
+m2m_changed.connect(_reindexar_categorias, sender=Post.categorias.through,
+                    dispatch_uid='busqueda_post_categorias')
@@ -1,6 +1,7 @@
 from django.db import models
 
 from django.db import models
+from django.urls import reverse
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from core.models import TimeStampedModel
@@ -39,6 +40,9 @@ class Post(TimeStampedModel):
     def __str__(self):
         return self.titulo
     
+    def get_absolute_url(self):
+        return reverse('blog:post_detail', kwargs={'slug': self.slug})
+    
     class Meta:
         ordering = ['-fecha_publicacion']
 class ComentarioBlog(TimeStampedModel):
@@ -8,6 +8,6 @@ app_name = 'blog'
 urlpatterns = [
     path('', views.PostListView.as_view(), name='post_list'),
     path('categoria/<slug:slug>/', views.PostCategoriaListView.as_view(), name='categoria_posts'),
-    path('<slug:slug>/', views.PostDetailView.as_view(), name='post_detail'),
     path('buscar/', views.PostSearchView.as_view(), name='post_search'),
+    path('<slug:slug>/', views.PostDetailView.as_view(), name='post_detail'),
 ]
\ No newline at end of file
@@ -1,5 +1,11 @@
+import time
+
 from django.views.generic import ListView, DetailView
-from django.db.models import Q
+from core.busqueda import buscar, resaltar_fragmento, AMBITO_DOCUMENTOS
+from core.paginacion import ResultadosPorIds
+from core.resultados import limite_ids, obtener_resultados
+from core.telemetria import es_primera_pagina, registrar_busqueda
+from .busqueda import TIPO_POST
 from .models import Post, CategoriaBlog
 
 class PostListView(ListView):
@@ -58,16 +64,40 @@ class PostSearchView(ListView):
     paginate_by = 10
     
     def get_queryset(self):
+        inicio = time.perf_counter()
         query = self.request.GET.get('q', '')
-        if query:
-            return Post.objects.filter(
-                Q(titulo__icontains=query) | 
-                Q(contenido__icontains=query),
-                publicado=True
-            ).distinct()
-        return Post.objects.none()
+        if not query:
+            return Post.objects.none()
+        
+        # Posts publicados según el índice de texto completo (core/busqueda.py),
+        # ordenados por coincidencia y fecha de publicación. Los pks de las
+        # primeras páginas se guardan por consulta normalizada
+        # (core/resultados.py) y al paginar solo se cargan los posts de la
+        # página; las páginas siguientes se leen con LIMIT/OFFSET
+        def pks_posts():
+            return buscar(query, tipos=[TIPO_POST], orden='relevancia_reciente').values_list(
+                'objeto_id', flat=True
+            )
+        
+        def calcular():
+            pks = pks_posts()
+            return {'ids': list(pks[:limite_ids(self.paginate_by)]), 'total': pks.count()}
+        
+        resultados = obtener_resultados(AMBITO_DOCUMENTOS, query, calcular, tipos=[TIPO_POST])
+        if es_primera_pagina(self.request, self.page_kwarg):
+            registrar_busqueda('blog', query, inicio, resultados['total'])
+        return ResultadosPorIds(
+            resultados['ids'],
+            Post.objects.select_related('autor').prefetch_related('categorias'),
+            total=resultados['total'],
+            restantes=pks_posts,
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['query'] = self.request.GET.get('q', '')
-        return context
\ No newline at end of file
+        
+        # Fragmentos resaltados solo para los posts de la página
+        for post in context['posts']:
+            post.fragmento = resaltar_fragmento(post.contenido, context['query'])
+        return context
@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import ConfiguracionSitio, PaginaEstatica, Testimonio, Banner, Comentario, Valoracion
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from .models import (
+    ConfiguracionSitio, PaginaEstatica, Testimonio, Banner, Comentario, Valoracion,
+    GrupoSinonimos, ConsultaBusqueda
+)
 
 @admin.register(ConfiguracionSitio)
 class ConfiguracionSitioAdmin(admin.ModelAdmin):
@@ -82,4 +90,52 @@ class ValoracionAdmin(admin.ModelAdmin):
     
     def aprobar_valoraciones(self, request, queryset):
         queryset.update(aprobado=True)
-    aprobar_valoraciones.short_description = "Aprobar valoraciones seleccionadas"
\ No newline at end of file
+    aprobar_valoraciones.short_description = "Aprobar valoraciones seleccionadas"
+
+@admin.register(GrupoSinonimos)
+class GrupoSinonimosAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'activo', 'modified')
+    list_filter = ('activo',)
+    search_fields = ('palabras',)
+    list_editable = ('activo',)
+
+@admin.register(ConsultaBusqueda)
+class ConsultaBusquedaAdmin(admin.ModelAdmin):
+    """Telemetría de búsquedas (solo lectura) con un reporte sobre el listado"""
+    list_display = ('consulta', 'origen', 'total', 'duracion_ms', 'sin_resultados', 'fecha')
+    list_filter = ('origen', 'sin_resultados', 'fecha')
+    search_fields = ('consulta',)
+    date_hierarchy = 'fecha'
+    change_list_template = 'admin/core/consultabusqueda/change_list.html'
+    
+    # Días que cubre el reporte y filas de cada tabla
+    DIAS_REPORTE = 30
+    FILAS_REPORTE = 20
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        recientes = ConsultaBusqueda.objects.filter(
+            fecha__gte=timezone.now() - timedelta(days=self.DIAS_REPORTE)
+        ).order_by()
+        extra_context = {
+            **(extra_context or {}),
+            'dias_reporte': self.DIAS_REPORTE,
+            'consultas_lentas': recientes.values('consulta', 'origen').annotate(
+                veces=Count('id'),
+                duracion_media=Avg('duracion_ms'),
+                duracion_maxima=Max('duracion_ms'),
+            ).order_by('-duracion_media')[:self.FILAS_REPORTE],
+            'consultas_sin_resultados': recientes.filter(sin_resultados=True).values(
+                'consulta', 'origen'
+            ).annotate(
+                veces=Count('id'),
+                ultima=Max('fecha'),
+            ).order_by('-veces')[:self.FILAS_REPORTE],
+        }
+        return super().changelist_view(request, extra_context=extra_context)
+
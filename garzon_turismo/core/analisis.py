@@ -0,0 +1,105 @@
+# core/analisis.py
+# Análisis de texto en español para el índice de búsqueda (core/busqueda.py).
+# Se aplica igual al indexar y al buscar: minúsculas, sin tildes, sin
+# palabras vacías y con una raíz aproximada de cada palabra, de modo que
+# "cafe", "cafetería" y "Cafeterías" producen el mismo término.
+
+from .cache import obtener_local
+from .models import GrupoSinonimos
+from .utils import extraer_terminos
+
+# Generación (core/cache.py) de la tabla de sinónimos
+GENERACION_SINONIMOS = 'sinonimos'
+
+# Palabras demasiado frecuentes para distinguir documentos (sin tildes)
+PALABRAS_VACIAS = frozenset("""
+    a al algo algunas algunos ante antes como con contra cual cuando de del
+    desde donde durante e el ella ellas ellos en entre era eran es esa esas
+    ese eso esos esta estas este esto estos fue fueron ha hay hasta la las le
+    les lo los mas me mi mis mucho muy ni no nos o otra otras otro otros para
+    pero poco por porque que quien quienes se sea ser si sin sobre son su sus
+    tambien tan te tiene tienen todo todos tu tus un una unas uno unos y ya yo
+""".split())
+
+# Sufijos derivativos que se quitan (los más largos primero)
+SUFIJOS = (
+    'amientos', 'imientos', 'aciones', 'amiento', 'imiento',
+    'acion', 'mente', 'teria', 'eria', 'ismo', 'ista', 'ito', 'ita',
+    'illo', 'illa',
+)
+
+# Longitud mínima de la raíz que queda al quitar una terminación
+LONGITUD_MINIMA_RAIZ = 3
+
+
+# ========== RAÍCES ==========
+
+def _quitar_plural(palabra):
+    if len(palabra) <= 3:
+        return palabra
+    if palabra.endswith('ces'):
+        return palabra[:-3] + 'z'  # luces -> luz
+    if palabra.endswith('es') and palabra[-3] not in 'aeiou':
+        return palabra[:-2]  # hoteles -> hotel
+    if palabra.endswith('s') and palabra[-2] in 'aeiou':
+        return palabra[:-1]  # cascadas -> cascada
+    return palabra
+
+
+def raiz(palabra):
+    """
+    Raíz aproximada de una palabra ya normalizada (stemmer ligero): quita el
+    plural, un sufijo derivativo y la vocal final.
+    "cafeterias" -> "cafeteria" -> "cafe" -> "caf"
+    """
+    if not palabra.isalpha():
+        return palabra
+
+    palabra = _quitar_plural(palabra)
+    for sufijo in SUFIJOS:
+        if palabra.endswith(sufijo) and len(palabra) - len(sufijo) >= LONGITUD_MINIMA_RAIZ:
+            palabra = palabra[:-len(sufijo)]
+            break
+    if palabra[-1] in 'aeo' and len(palabra) > LONGITUD_MINIMA_RAIZ:
+        palabra = palabra[:-1]
+    return palabra
+
+
+def analizar(texto):
+    """Términos de un texto tal como se guardan en el índice"""
+    return [
+        raiz(palabra) for palabra in extraer_terminos(texto)
+        if palabra not in PALABRAS_VACIAS
+    ]
+
+
+# ========== SINÓNIMOS ==========
+
+def _cargar_sinonimos():
+    sinonimos = {}
+    for grupo in GrupoSinonimos.objects.filter(activo=True):
+        # Cada entrada del grupo debe ser una sola palabra
+        raices = {terminos[0] for terminos in map(analizar, grupo.get_palabras()) if len(terminos) == 1}
+        for termino in raices:
+            sinonimos[termino] = sinonimos.get(termino, frozenset()) | raices
+    return sinonimos
+
+
+def get_sinonimos():
+    """Retorna {raíz: raíces equivalentes}, recargado cuando cambia la tabla"""
+    return obtener_local(GENERACION_SINONIMOS, _cargar_sinonimos)
+
+
+def analizar_consulta(texto):
+    """
+    Términos de una consulta: una tupla de alternativas por palabra (la raíz
+    y sus sinónimos). Un documento coincide si contiene alguna alternativa
+    de cada palabra.
+    """
+    sinonimos = get_sinonimos()
+    grupos = []
+    for termino in analizar(texto):
+        grupo = tuple(sorted(sinonimos.get(termino, {termino})))
+        if grupo not in grupos:
+            grupos.append(grupo)
+    return grupos
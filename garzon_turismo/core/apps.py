@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Registrar las señales que invalidan la configuración cacheada
+        from . import signals  # noqa: F401
+        # Escribir por lotes la telemetría de búsquedas al terminar las peticiones
+        from . import telemetria  # noqa: F401
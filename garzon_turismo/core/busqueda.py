@@ -0,0 +1,359 @@
+# core/busqueda.py
+
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, Count, F, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+
+from .models import DocumentoBusqueda
+from .resultados import invalidar_ambito
+from .analisis import analizar, analizar_consulta
+
+# Tipos de documento registrados: tipo -> (modelo, consulta, documento).
+# `consulta()` retorna los objetos que deben aparecer en la búsqueda y
+# `documento(objeto)` el diccionario con nombre, descripcion, categoria,
+# imagen, destacado, fecha y textos_extra (otros campos en los que se busca).
+INDICES = {}
+
+TIPO_POR_MODELO = {}
+
+# Campos de cada modelo que no aparecen en su documento (p. ej. contadores):
+# un guardado con update_fields limitado a ellos no vuelve a indexar
+CAMPOS_SIN_INDICE = {}
+
+# Ámbito de core/resultados.py de las búsquedas sobre los documentos
+AMBITO_DOCUMENTOS = 'documentos'
+
+# Tamaño de los lotes al reconstruir el índice
+TAMANO_LOTE = 500
+
+# Criterios de orden de buscar(): 'relevancia' se calcula con la puntuación
+ORDENES = {
+    'relevancia': ['-relevancia', 'nombre'],
+    'relevancia_reciente': ['-relevancia', '-fecha'],
+    'nombre': ['nombre'],
+    'nombre_desc': ['-nombre'],
+    # Fecha del contenido (no la de indexación); los documentos sin fecha, al final
+    'fecha_desc': [F('fecha').desc(nulls_last=True), '-pk'],
+    'fecha_asc': [F('fecha').asc(nulls_last=True), 'pk'],
+}
+
+
+# ========== REGISTRO DE ÍNDICES ==========
+
+def registrar_indice(tipo, modelo, consulta, documento, relaciones=None, campos_sin_indice=()):
+    """
+    Registra un tipo de documento y conecta las señales que lo mantienen.
+    `relaciones` es un diccionario {modelo_relacionado: campo} para volver a
+    indexar los objetos cuando cambia, por ejemplo, el nombre de su categoría.
+    `campos_sin_indice` son campos que el documento no usa, como un contador
+    de vistas: guardarlos con update_fields no toca el índice ni su caché.
+    """
+    INDICES[tipo] = (modelo, consulta, documento)
+    TIPO_POR_MODELO[modelo] = tipo
+    CAMPOS_SIN_INDICE[modelo] = frozenset(campos_sin_indice)
+
+    post_save.connect(_indexar_guardado, sender=modelo, dispatch_uid=f'busqueda_save_{tipo}')
+    post_delete.connect(_quitar_eliminado, sender=modelo, dispatch_uid=f'busqueda_delete_{tipo}')
+
+    for modelo_relacionado, campo in (relaciones or {}).items():
+        def reindexar_relacionados(sender, instance, tipo=tipo, campo=campo, **kwargs):
+            for objeto in consulta().filter(**{campo: instance}):
+                indexar_objeto(tipo, objeto)
+            invalidar_ambito(AMBITO_DOCUMENTOS)
+
+        post_save.connect(
+            reindexar_relacionados, sender=modelo_relacionado, weak=False,
+            dispatch_uid=f'busqueda_relacion_{tipo}_{modelo_relacionado._meta.model_name}'
+        )
+
+
+def _indexar_guardado(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= CAMPOS_SIN_INDICE[sender]:
+        return
+    indexar(TIPO_POR_MODELO[sender], instance.pk)
+    invalidar_ambito(AMBITO_DOCUMENTOS)
+
+
+def _quitar_eliminado(sender, instance, **kwargs):
+    DocumentoBusqueda.objects.filter(tipo=TIPO_POR_MODELO[sender], objeto_id=instance.pk).delete()
+    invalidar_ambito(AMBITO_DOCUMENTOS)
+
+
+# ========== CONSTRUCCIÓN DE DOCUMENTOS ==========
+
+def construir_documento(tipo, objeto):
+    """Retorna un DocumentoBusqueda (sin guardar) para el objeto"""
+    _, _, documento = INDICES[tipo]
+    datos = documento(objeto)
+    imagen = datos.get('imagen')
+    textos = [datos.get('descripcion', ''), datos.get('categoria', '')] + datos.get('textos_extra', [])
+
+    return DocumentoBusqueda(
+        tipo=tipo,
+        objeto_id=objeto.pk,
+        nombre=datos['nombre'],
+        descripcion=datos.get('descripcion', ''),
+        categoria=datos.get('categoria', ''),
+        url=objeto.get_absolute_url(),
+        imagen=imagen.name if imagen else '',
+        destacado=datos.get('destacado', False),
+        fecha=datos.get('fecha'),
+        terminos_nombre=' '.join(analizar(datos['nombre'])),
+        terminos_texto=' '.join(analizar(' '.join(t for t in textos if t))),
+    )
+
+
+def indexar_objeto(tipo, objeto):
+    """Crea o actualiza el documento de un objeto ya cargado"""
+    nuevo = construir_documento(tipo, objeto)
+    campos = [
+        'nombre', 'descripcion', 'categoria', 'url', 'imagen',
+        'destacado', 'fecha', 'terminos_nombre', 'terminos_texto'
+    ]
+    DocumentoBusqueda.objects.update_or_create(
+        tipo=tipo,
+        objeto_id=objeto.pk,
+        defaults={campo: getattr(nuevo, campo) for campo in campos},
+    )
+
+
+def indexar(tipo, pk):
+    """Actualiza el documento de un objeto, o lo quita si ya no es buscable"""
+    _, consulta, _ = INDICES[tipo]
+    objeto = consulta().filter(pk=pk).first()
+    if objeto is None:
+        DocumentoBusqueda.objects.filter(tipo=tipo, objeto_id=pk).delete()
+    else:
+        indexar_objeto(tipo, objeto)
+
+
+def reconstruir_indice(tipos=None):
+    """Vuelve a crear los documentos de los tipos indicados (o de todos)"""
+    totales = {}
+    for tipo in tipos or INDICES:
+        _, consulta, _ = INDICES[tipo]
+        DocumentoBusqueda.objects.filter(tipo=tipo).delete()
+
+        lote = []
+        totales[tipo] = 0
+        for objeto in consulta().iterator(chunk_size=TAMANO_LOTE):
+            lote.append(construir_documento(tipo, objeto))
+            if len(lote) >= TAMANO_LOTE:
+                DocumentoBusqueda.objects.bulk_create(lote)
+                totales[tipo] += len(lote)
+                lote = []
+        DocumentoBusqueda.objects.bulk_create(lote)
+        totales[tipo] += len(lote)
+    invalidar_ambito(AMBITO_DOCUMENTOS)
+    return totales
+
+
+# ========== CONSULTAS ==========
+
+def get_pesos():
+    """Pesos de la puntuación: coincidencias en el nombre y en el resto del texto"""
+    pesos = {'nombre': 3.0, 'texto': 1.0}
+    pesos.update(getattr(settings, 'CORE_BUSQUEDA_PESOS', {}))
+    return pesos
+
+
+def get_bono_destacado():
+    """Fracción que se suma a la puntuación de los documentos destacados"""
+    return getattr(settings, 'CORE_BUSQUEDA_BONO_DESTACADO', 0.5)
+
+
+def get_bonos_recencia():
+    """[(días, fracción)]: bonificación de los documentos con fecha más reciente"""
+    return getattr(settings, 'CORE_BUSQUEDA_BONOS_RECENCIA', [(30, 0.5), (365, 0.2)])
+
+
+# `grupos` es la salida de analizar_consulta(): una tupla de alternativas
+# (raíz y sinónimos) por palabra buscada
+
+def _expresion_sqlite(grupos):
+    return ' AND '.join(
+        '(' + ' OR '.join(f'"{termino}"*' for termino in grupo) + ')' for grupo in grupos
+    )
+
+
+def _expresion_mysql(grupos):
+    return ' '.join(
+        '+(' + ' '.join(f'{termino}*' for termino in grupo) + ')' for grupo in grupos
+    )
+
+
+def _filtro_texto(grupos):
+    """Condición de texto completo: alguna alternativa de cada palabra, como prefijo"""
+    if connection.vendor == 'sqlite':
+        expresion = _expresion_sqlite(grupos)
+        return RawSQL(
+            "core_documentobusqueda.id IN (SELECT rowid FROM core_documentobusqueda_fts "
+            "WHERE core_documentobusqueda_fts MATCH %s)",
+            [expresion], output_field=BooleanField()
+        )
+
+    if connection.vendor == 'mysql':
+        expresion = _expresion_mysql(grupos)
+        return RawSQL(
+            "MATCH (core_documentobusqueda.terminos_nombre, core_documentobusqueda.terminos_texto) "
+            "AGAINST (%s IN BOOLEAN MODE)",
+            [expresion], output_field=BooleanField()
+        )
+
+    # Otros motores: búsqueda sin índice sobre el texto ya normalizado
+    condicion = Q()
+    for grupo in grupos:
+        alternativas = Q()
+        for termino in grupo:
+            alternativas |= Q(terminos_nombre__contains=termino) | Q(terminos_texto__contains=termino)
+        condicion &= alternativas
+    return condicion
+
+
+def _puntuacion_texto(grupos):
+    """
+    Puntuación de texto (mayor es mejor) con los términos ponderados por
+    columna: BM25 de FTS5 en SQLite y la relevancia de MATCH en MySQL.
+    """
+    pesos = get_pesos()
+
+    if connection.vendor == 'sqlite':
+        # bm25() retorna valores negativos: cuanto menor, más relevante
+        return RawSQL(
+            "(SELECT -bm25(core_documentobusqueda_fts, %s, %s) FROM core_documentobusqueda_fts "
+            "WHERE core_documentobusqueda_fts MATCH %s AND rowid = core_documentobusqueda.id)",
+            [pesos['nombre'], pesos['texto'], _expresion_sqlite(grupos)],
+            output_field=FloatField()
+        )
+
+    if connection.vendor == 'mysql':
+        expresion = _expresion_mysql(grupos)
+        return RawSQL(
+            "(%s * MATCH (core_documentobusqueda.terminos_nombre) AGAINST (%s IN BOOLEAN MODE) "
+            "+ %s * MATCH (core_documentobusqueda.terminos_nombre, core_documentobusqueda.terminos_texto) "
+            "AGAINST (%s IN BOOLEAN MODE))",
+            [pesos['nombre'], expresion, pesos['texto'], expresion],
+            output_field=FloatField()
+        )
+
+    # Otros motores: suma de los pesos de las columnas que contienen cada término
+    puntuacion = Value(0.0)
+    for termino in (termino for grupo in grupos for termino in grupo):
+        for columna, peso in (('terminos_nombre', pesos['nombre']), ('terminos_texto', pesos['texto'])):
+            puntuacion = puntuacion + Case(
+                When(**{f'{columna}__contains': termino}, then=Value(peso)),
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+    return puntuacion
+
+
+def _factor_recencia():
+    """Multiplicador por tramos de antigüedad de la fecha (portable entre motores)"""
+    ahora = timezone.now()
+    tramos = sorted(get_bonos_recencia())
+    return Case(
+        *[
+            When(fecha__gte=ahora - timedelta(days=dias), then=Value(1.0 + bono))
+            for dias, bono in tramos
+        ],
+        default=Value(1.0),
+        output_field=FloatField()
+    )
+
+
+def puntuar(documentos, grupos, recencia=False):
+    """
+    Anota `relevancia`: puntuación de texto con bonificación por destacado
+    y, con recencia=True, por la antigüedad de la fecha del documento
+    """
+    factor = Case(
+        When(destacado=True, then=Value(1.0 + get_bono_destacado())),
+        default=Value(1.0),
+        output_field=FloatField()
+    )
+    if recencia:
+        factor = factor * _factor_recencia()
+    return documentos.annotate(
+        puntuacion_texto=_puntuacion_texto(grupos)
+    ).annotate(relevancia=F('puntuacion_texto') * factor)
+
+
+def buscar(texto, tipos=None, solo_destacados=False, orden=None):
+    """
+    Retorna el QuerySet de documentos que contienen todas las palabras del
+    texto, o un sinónimo suyo (core/analisis.py). Es perezoso: al paginarlo
+    solo se lee la página pedida.
+
+    Los filtros de tipo y de destacados forman parte de la misma consulta,
+    así que los documentos excluidos no se puntúan. Con orden='relevancia'
+    la base de datos ordena por la puntuación y el LIMIT de la página le
+    permite quedarse solo con los mejores k documentos.
+    """
+    grupos = analizar_consulta(texto)
+    if not grupos:
+        return DocumentoBusqueda.objects.none()
+
+    documentos = DocumentoBusqueda.objects.filter(_filtro_texto(grupos))
+    if tipos is not None:
+        documentos = documentos.filter(tipo__in=tipos)
+    if solo_destacados:
+        documentos = documentos.filter(destacado=True)
+
+    if orden in ('relevancia', 'relevancia_reciente'):
+        documentos = puntuar(documentos, grupos, recencia=orden == 'relevancia_reciente')
+    if orden in ORDENES:
+        documentos = documentos.order_by(*ORDENES[orden])
+    return documentos
+
+
+def contar_por_tipo(documentos):
+    """Retorna {tipo: total} con una sola consulta agrupada"""
+    return dict(
+        documentos.order_by().values_list('tipo').annotate(total=Count('pk'))
+    )
+
+
+# ========== FRAGMENTOS RESALTADOS ==========
+
+def resaltar_fragmento(texto, consulta, longitud=200):
+    """
+    Retorna un fragmento HTML del texto alrededor de la primera palabra que
+    coincide con la consulta, con las coincidencias entre <mark>. Se compara
+    con el mismo análisis del índice, así que "cafeterias" resalta "Café".
+    """
+    texto = ' '.join(strip_tags(texto or '').split())
+    alternativas = [termino for grupo in analizar_consulta(consulta) for termino in grupo]
+
+    def coincide(palabra):
+        terminos = analizar(palabra)
+        return bool(terminos) and any(terminos[0].startswith(t) for t in alternativas)
+
+    palabras = re.finditer(r'\w+', texto)
+    primera = next((p for p in palabras if coincide(p.group())), None)
+    inicio = 0
+    if primera is not None and primera.start() > longitud // 4:
+        # Se empieza en un espacio para no cortar una palabra
+        inicio = texto.find(' ', primera.start() - longitud // 4) + 1
+    fin = min(len(texto), inicio + longitud)
+    if fin < len(texto):
+        fin = texto.rfind(' ', inicio, fin) if ' ' in texto[inicio:fin] else fin
+
+    partes = []
+    posicion = inicio
+    for palabra in re.finditer(r'\w+', texto[inicio:fin]):
+        if coincide(palabra.group()):
+            partes.append(escape(texto[posicion:inicio + palabra.start()]))
+            partes.append(f'<mark>{escape(palabra.group())}</mark>')
+            posicion = inicio + palabra.end()
+    partes.append(escape(texto[posicion:fin]))
+
+    return ('...' if inicio > 0 else '') + ''.join(partes) + ('...' if fin < len(texto) else '')
+
@@ -0,0 +1,109 @@
+# core/cache.py
+
+import time
+
+from django.core.cache import cache
+
+from .models import ConfiguracionSitio, PaginaEstatica
+
+# Prefijo de las claves de generación en la caché compartida
+PREFIJO_GENERACION = 'core:generacion'
+
+# Copias en memoria del proceso: nombre -> (generación, valor)
+_cache_local = {}
+
+
+# ========== CONTADORES DE GENERACIÓN ==========
+
+def clave_generacion(nombre):
+    return f'{PREFIJO_GENERACION}:{nombre}'
+
+
+def _generacion_inicial():
+    # Si la clave se pierde (reinicio o expulsión de la caché) se reinicia con
+    # un valor nuevo, nunca con uno que otro proceso pudiera tener guardado
+    return time.time_ns()
+
+
+def obtener_generacion(nombre):
+    """Retorna la generación actual de un conjunto de datos"""
+    clave = clave_generacion(nombre)
+    generacion = cache.get(clave)
+    if generacion is None:
+        cache.add(clave, _generacion_inicial(), None)
+        generacion = cache.get(clave)
+    return generacion
+
+
+def obtener_generaciones(nombres):
+    """Retorna {nombre: generación} leyendo todas las claves en una operación"""
+    claves = {clave_generacion(nombre): nombre for nombre in nombres}
+    encontradas = cache.get_many(claves.keys())
+    generaciones = {}
+    for clave, nombre in claves.items():
+        if clave in encontradas:
+            generaciones[nombre] = encontradas[clave]
+        else:
+            generaciones[nombre] = obtener_generacion(nombre)
+    return generaciones
+
+
+def generacion_modelo(modelo):
+    """Nombre de la generación que cambia con cada escritura del modelo"""
+    return f'modelo:{modelo._meta.label_lower}'
+
+
+def incrementar_generacion(nombre):
+    """Marca como obsoletas todas las copias de un conjunto de datos"""
+    clave = clave_generacion(nombre)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        generacion = _generacion_inicial()
+        cache.set(clave, generacion, None)
+        return generacion
+
+
+def obtener_local(nombre, cargar, generacion=None, actualizar=None):
+    """
+    Retorna el valor guardado en la memoria del proceso mientras su generación
+    coincida con la compartida; si otro proceso la incrementó, lo recarga.
+    Se puede pasar la generación ya leída (p. ej. con obtener_generaciones).
+    `actualizar(valor, desde, hasta)`, si se indica, intenta aplicar al valor
+    guardado solo los cambios entre dos generaciones; si retorna None se
+    recarga completo.
+    """
+    # La generación se lee antes de cargar: si cambia durante la carga, la
+    # siguiente lectura detecta la diferencia y vuelve a cargar
+    if generacion is None:
+        generacion = obtener_generacion(nombre)
+    guardado = _cache_local.get(nombre)
+    if guardado is not None and guardado[0] == generacion:
+        return guardado[1]
+
+    valor = None
+    if guardado is not None and actualizar is not None and guardado[0] < generacion:
+        valor = actualizar(guardado[1], guardado[0], generacion)
+    if valor is None:
+        valor = cargar()
+    _cache_local[nombre] = (generacion, valor)
+    return valor
+
+
+# ========== CONFIGURACIÓN DEL SITIO ==========
+
+GENERACION_CONFIGURACION = 'configuracion_sitio'
+GENERACION_MENU = 'paginas_menu'
+
+
+def get_configuracion():
+    """Retorna la configuración del sitio (o None si no existe)"""
+    return obtener_local(GENERACION_CONFIGURACION, ConfiguracionSitio.objects.first)
+
+
+def get_paginas_menu():
+    """Retorna la lista de páginas estáticas del menú"""
+    return obtener_local(
+        GENERACION_MENU,
+        lambda: list(PaginaEstatica.objects.filter(en_menu=True).order_by('orden_menu'))
+    )
@@ -1,17 +1,27 @@
-from .models import ConfiguracionSitio, PaginaEstatica
+from django.utils.functional import SimpleLazyObject
+from .cache import get_configuracion, get_paginas_menu
+
+def _obtener_configuracion():
+    try:
+        return get_configuracion()
+    except:
+        return None
+
+def _obtener_paginas_menu():
+    try:
+        return get_paginas_menu()
+    except:
+        return []
 
 def configuracion_sitio(request):
     """
-    Agrega la configuración del sitio al contexto de todas las plantillas
+    Agrega la configuración del sitio al contexto de todas las plantillas.
+    Los datos se leen de la copia en memoria del proceso (ver core/cache.py)
+    solo si la plantilla los usa, una vez por petición.
     """
-    try:
-        config = ConfiguracionSitio.objects.first()
-    except:
-        config = None
-    
-    paginas_menu = PaginaEstatica.objects.filter(en_menu=True).order_by('orden_menu')
-    
-    return {
-        'config': config,
-        'paginas_menu': paginas_menu
-    }
\ No newline at end of file
+    if not hasattr(request, '_configuracion_sitio'):
+        request._configuracion_sitio = {
+            'config': SimpleLazyObject(_obtener_configuracion),
+            'paginas_menu': SimpleLazyObject(_obtener_paginas_menu),
+        }
+    return request._configuracion_sitio
@@ -0,0 +1,175 @@
+# core/fragmentos.py
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Q
+from django.utils import timezone
+
+from .cache import obtener_generaciones, generacion_modelo
+from .paginas import clave_modelo
+from .models import Banner, Testimonio, Valoracion
+from turismo.models import LugarTuristico, Categoria, Evento, Establecimiento, Ruta
+from blog.models import Post, CategoriaBlog
+
+# Prefijo de las claves de los fragmentos y de sus estadísticas
+PREFIJO_FRAGMENTO = 'core:fragmento'
+PREFIJO_ESTADISTICAS = 'core:fragmento:estadisticas'
+
+
+# ========== CARGA DE CADA SECCIÓN DE LA PÁGINA PRINCIPAL ==========
+
+def _cargar_banners():
+    return list(Banner.objects.filter(activo=True).order_by('orden'))
+
+
+def _cargar_lugares_destacados():
+    return list(LugarTuristico.objects.filter(destacado=True).select_related('categoria')[:6])
+
+
+def _cargar_eventos_proximos():
+    return list(Evento.objects.filter(
+        fecha_inicio__gte=timezone.now(),
+        destacado=True
+    ).order_by('fecha_inicio')[:3])
+
+
+def _cargar_establecimientos_destacados():
+    # La valoración promedio se anota para no consultarla por cada establecimiento
+    return list(Establecimiento.objects.filter(destacado=True).annotate(
+        valoracion_promedio=Avg('valoraciones__puntuacion', filter=Q(valoraciones__aprobado=True))
+    )[:4])
+
+
+def _cargar_posts_recientes():
+    return list(Post.objects.filter(
+        publicado=True
+    ).select_related('autor').prefetch_related('categorias').order_by('-fecha_publicacion')[:3])
+
+
+def _cargar_rutas():
+    return list(Ruta.objects.all()[:2])
+
+
+def _cargar_testimonios():
+    return list(Testimonio.objects.filter(activo=True))
+
+
+# Fragmentos de la página principal: nombre en el contexto ->
+# (cargar, modelos de los que depende, segundos máximos de vida o None)
+FRAGMENTOS_HOME = {
+    'banners': (_cargar_banners, [Banner], None),
+    'lugares_destacados': (_cargar_lugares_destacados, [LugarTuristico, Categoria], None),
+    # Los eventos dejan de ser próximos con el tiempo, no solo al editarse
+    'eventos_proximos': (_cargar_eventos_proximos, [Evento], 300),
+    'establecimientos_destacados': (
+        _cargar_establecimientos_destacados, [Establecimiento, Valoracion], None
+    ),
+    'posts_recientes': (_cargar_posts_recientes, [Post, CategoriaBlog], None),
+    'rutas': (_cargar_rutas, [Ruta], None),
+    'testimonios': (_cargar_testimonios, [Testimonio], None),
+}
+
+# Modelos cuyas escrituras invalidan algún fragmento
+MODELOS_FRAGMENTOS = list({
+    modelo: None
+    for _, modelos, _ in FRAGMENTOS_HOME.values()
+    for modelo in modelos
+})
+
+
+# ========== CACHÉ DE FRAGMENTOS ==========
+
+def get_cache():
+    """Backend de caché configurado para los fragmentos"""
+    return caches[getattr(settings, 'CORE_FRAGMENTOS_CACHE', 'default')]
+
+
+def get_timeout():
+    """Tiempo de vida de los fragmentos (las claves viejas dejan de usarse solas)"""
+    return getattr(settings, 'CORE_FRAGMENTOS_TIMEOUT', 3600)
+
+
+def clave_fragmento(nombre, generaciones):
+    """La clave incluye la generación de cada modelo del que depende el fragmento"""
+    _, modelos, _ = FRAGMENTOS_HOME[nombre]
+    version = '.'.join(str(generaciones[generacion_modelo(modelo)]) for modelo in modelos)
+    return f'{PREFIJO_FRAGMENTO}:{nombre}:{version}'
+
+
+def _contar(backend, nombre, resultado):
+    clave = f'{PREFIJO_ESTADISTICAS}:{nombre}:{resultado}'
+    try:
+        backend.incr(clave)
+    except ValueError:
+        if not backend.add(clave, 1, None):
+            backend.incr(clave)
+
+
+def obtener_fragmentos(nombres=None):
+    """
+    Retorna {nombre: valor} de los fragmentos pedidos. Las generaciones y los
+    fragmentos se leen con una operación cada uno; solo se recargan los
+    fragmentos cuyos modelos cambiaron.
+    """
+    nombres = list(nombres or FRAGMENTOS_HOME)
+    backend = get_cache()
+    generaciones = obtener_generaciones({
+        generacion_modelo(modelo)
+        for nombre in nombres
+        for modelo in FRAGMENTOS_HOME[nombre][1]
+    })
+    claves = {clave_fragmento(nombre, generaciones): nombre for nombre in nombres}
+    encontrados = backend.get_many(claves.keys())
+
+    valores = {}
+    for clave, nombre in claves.items():
+        if clave in encontrados:
+            valores[nombre] = encontrados[clave]
+            _contar(backend, nombre, 'aciertos')
+            continue
+
+        cargar, _, maximo = FRAGMENTOS_HOME[nombre]
+        valores[nombre] = cargar()
+        timeout = get_timeout()
+        if maximo is not None:
+            timeout = maximo if timeout is None else min(timeout, maximo)
+        backend.set(clave, valores[nombre], timeout)
+        _contar(backend, nombre, 'fallos')
+
+    return valores
+
+
+def claves_sustitutas(nombres=None):
+    """Claves con las que se etiqueta la página que muestra los fragmentos"""
+    return {
+        clave_modelo(modelo)
+        for nombre in (nombres or FRAGMENTOS_HOME)
+        for modelo in FRAGMENTOS_HOME[nombre][1]
+    }
+
+
+def estadisticas_fragmentos():
+    """Retorna {nombre: {'aciertos': n, 'fallos': n}} de cada fragmento"""
+    backend = get_cache()
+    claves = [
+        f'{PREFIJO_ESTADISTICAS}:{nombre}:{resultado}'
+        for nombre in FRAGMENTOS_HOME
+        for resultado in ('aciertos', 'fallos')
+    ]
+    valores = backend.get_many(claves)
+    return {
+        nombre: {
+            resultado: valores.get(f'{PREFIJO_ESTADISTICAS}:{nombre}:{resultado}', 0)
+            for resultado in ('aciertos', 'fallos')
+        }
+        for nombre in FRAGMENTOS_HOME
+    }
+
+
+def reiniciar_estadisticas():
+    """Pone a cero las estadísticas de aciertos y fallos"""
+    get_cache().delete_many([
+        f'{PREFIJO_ESTADISTICAS}:{nombre}:{resultado}'
+        for nombre in FRAGMENTOS_HOME
+        for resultado in ('aciertos', 'fallos')
+    ])
@@ -0,0 +1,396 @@
+# core/geo.py
+# Índice espacial sin extensiones GIS: cada fila georreferenciada guarda la
+# celda geohash de sus coordenadas (ModeloGeorreferenciado en core/models.py)
+# y las búsquedas por rectángulo o por radio leen solo los rangos del índice
+# de las celdas candidatas. Funciona igual en MySQL y en SQLite.
+
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+ALFABETO = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Caracteres guardados por fila (celdas de unos 5 x 5 metros)
+PRECISION_GEOHASH = 9
+
+# Máximo de celdas con las que se cubre un rectángulo; con más se usa una
+# precisión menor (celdas más grandes)
+MAX_CELDAS = 16
+
+# Radio con el que empieza la búsqueda de vecinos (se multiplica por 4
+# mientras no aparezcan suficientes)
+RADIO_INICIAL_KM = 1.0
+
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180
+
+# Lado en píxeles de una tesela de los mapas web (Web Mercator)
+TAMANO_TESELA = 256
+
+# Latitud máxima representable en Web Mercator
+LATITUD_MAXIMA_MERCATOR = 85.05112878
+
+
+# ========== CELDAS GEOHASH ==========
+
+def _bits(precision):
+    """Bits de (latitud, longitud) de un geohash; la longitud lleva el bit extra"""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def tamano_celda(precision):
+    """Retorna (alto, ancho) en grados de las celdas de una precisión"""
+    bits_lat, bits_lng = _bits(precision)
+    return 180.0 / (1 << bits_lat), 360.0 / (1 << bits_lng)
+
+
+def _fila_columna(lat, lng, precision):
+    bits_lat, bits_lng = _bits(precision)
+    alto, ancho = tamano_celda(precision)
+    fila = min(int((lat + 90) / alto), (1 << bits_lat) - 1)
+    columna = min(int((lng + 180) / ancho), (1 << bits_lng) - 1)
+    return max(fila, 0), max(columna, 0)
+
+
+def _celda(fila, columna, precision):
+    """Geohash de la celda (fila, columna) de la cuadrícula de una precisión"""
+    bits_lat, bits_lng = _bits(precision)
+    valor = 0
+    # Los bits se intercalan empezando por la longitud
+    for k in range(5 * precision):
+        if k % 2 == 0:
+            bit = (columna >> (bits_lng - 1 - k // 2)) & 1
+        else:
+            bit = (fila >> (bits_lat - 1 - k // 2)) & 1
+        valor = (valor << 1) | bit
+    return ''.join(
+        ALFABETO[(valor >> 5 * (precision - 1 - posicion)) & 31]
+        for posicion in range(precision)
+    )
+
+
+def codificar(lat, lng, precision=PRECISION_GEOHASH):
+    """Geohash de unas coordenadas, o None si falta alguna"""
+    if lat is None or lng is None:
+        return None
+    return _celda(*_fila_columna(lat, lng, precision), precision)
+
+
+def decodificar(geohash):
+    """Retorna los límites (sur, oeste, norte, este) de la celda de un geohash"""
+    valor = 0
+    for letra in geohash:
+        valor = (valor << 5) | ALFABETO.index(letra)
+
+    precision = len(geohash)
+    fila = columna = 0
+    for k in range(5 * precision):
+        bit = (valor >> (5 * precision - 1 - k)) & 1
+        if k % 2 == 0:
+            columna = (columna << 1) | bit
+        else:
+            fila = (fila << 1) | bit
+
+    alto, ancho = tamano_celda(precision)
+    sur = fila * alto - 90
+    oeste = columna * ancho - 180
+    return sur, oeste, sur + alto, oeste + ancho
+
+
+def _sucesor(geohash):
+    """Primer geohash de la misma longitud posterior a todos los que empiezan por `geohash`"""
+    letras = list(geohash)
+    while letras:
+        posicion = ALFABETO.index(letras[-1])
+        if posicion < len(ALFABETO) - 1:
+            letras[-1] = ALFABETO[posicion + 1]
+            return ''.join(letras)
+        letras.pop()
+    return None
+
+
+def celdas_rectangulo(sur, oeste, norte, este, max_celdas=MAX_CELDAS):
+    """
+    Celdas que cubren un rectángulo, con la mayor precisión que no pase de
+    `max_celdas`. Si oeste > este el rectángulo cruza el antimeridiano.
+    Retorna None si ni con celdas de un carácter alcanza (no hay filtro útil).
+    """
+    for precision in range(PRECISION_GEOHASH, 0, -1):
+        fila_sur, columna_oeste = _fila_columna(sur, oeste, precision)
+        fila_norte, columna_este = _fila_columna(norte, este, precision)
+        if columna_oeste <= columna_este:
+            columnas = list(range(columna_oeste, columna_este + 1))
+        else:
+            ultima = (1 << _bits(precision)[1]) - 1
+            columnas = list(range(columna_oeste, ultima + 1)) + list(range(0, columna_este + 1))
+
+        if (fila_norte - fila_sur + 1) * len(columnas) <= max_celdas:
+            return sorted(
+                _celda(fila, columna, precision)
+                for fila in range(fila_sur, fila_norte + 1)
+                for columna in columnas
+            )
+    return None
+
+
+def _rangos(celdas):
+    """Une celdas consecutivas en rangos [inicio, fin) de valores del índice"""
+    rangos = []
+    for celda in celdas:
+        if rangos and rangos[-1][1] == celda:
+            rangos[-1][1] = _sucesor(celda)
+        else:
+            rangos.append([celda, _sucesor(celda)])
+    return rangos
+
+
+def filtro_celdas(celdas, campo='geohash'):
+    """
+    Q con un rango por grupo de celdas (campo >= celda AND campo < siguiente),
+    que la base de datos resuelve con el índice de la columna
+    """
+    filtro = Q()
+    for inicio, fin in _rangos(celdas):
+        condicion = Q(**{f'{campo}__gte': inicio})
+        if fin is not None:
+            condicion &= Q(**{f'{campo}__lt': fin})
+        filtro |= condicion
+    return filtro
+
+
+# ========== WEB MERCATOR ==========
+
+def pixel_mercator(lat, lng, zoom):
+    """Posición (x, y) en píxeles del mundo Web Mercator a un nivel de zoom"""
+    escala = TAMANO_TESELA * (1 << zoom)
+    lat = max(min(lat, LATITUD_MAXIMA_MERCATOR), -LATITUD_MAXIMA_MERCATOR)
+    seno = math.sin(math.radians(lat))
+    x = (lng + 180) / 360 * escala
+    y = (0.5 - math.log((1 + seno) / (1 - seno)) / (4 * math.pi)) * escala
+    return x, y
+
+
+def coordenadas_pixel(x, y, zoom):
+    """Inversa de pixel_mercator: retorna (lat, lng) de un píxel del mundo"""
+    escala = TAMANO_TESELA * (1 << zoom)
+    lng = x / escala * 360 - 180
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / escala))))
+    return lat, lng
+
+
+def tesela(lat, lng, zoom):
+    """Tesela (x, y) que contiene unas coordenadas a un nivel de zoom"""
+    x, y = pixel_mercator(lat, lng, zoom)
+    ultima = (1 << zoom) - 1
+    return min(int(x // TAMANO_TESELA), ultima), min(int(y // TAMANO_TESELA), ultima)
+
+
+def limites_tesela(zoom, x, y):
+    """Retorna los límites (sur, oeste, norte, este) de la tesela z/x/y"""
+    norte, oeste = coordenadas_pixel(x * TAMANO_TESELA, y * TAMANO_TESELA, zoom)
+    sur, este = coordenadas_pixel((x + 1) * TAMANO_TESELA, (y + 1) * TAMANO_TESELA, zoom)
+    return sur, oeste, norte, este
+
+
+def _teselas_segmento(x0, y0, x1, y1):
+    """Celdas enteras que atraviesa un segmento en coordenadas de tesela (recorrido de rejilla)"""
+    x, y = int(x0), int(y0)
+    dx, dy = x1 - x0, y1 - y0
+    paso_x = 1 if dx > 0 else -1
+    paso_y = 1 if dy > 0 else -1
+    # Fracción del segmento recorrida al cruzar la siguiente columna o fila
+    siguiente_x = ((x + (paso_x > 0)) - x0) / dx if dx else math.inf
+    siguiente_y = ((y + (paso_y > 0)) - y0) / dy if dy else math.inf
+    delta_x = abs(1 / dx) if dx else math.inf
+    delta_y = abs(1 / dy) if dy else math.inf
+
+    celdas = [(x, y)]
+    for _ in range(abs(int(x1) - x) + abs(int(y1) - y)):
+        if siguiente_x < siguiente_y:
+            x += paso_x
+            siguiente_x += delta_x
+        else:
+            y += paso_y
+            siguiente_y += delta_y
+        celdas.append((x, y))
+    return celdas
+
+
+def teselas_linea(coordenadas, zoom):
+    """Teselas (x, y) que atraviesa una línea de (lat, lng) a un nivel de zoom"""
+    ultima = (1 << zoom) - 1
+    puntos = [
+        tuple(valor / TAMANO_TESELA for valor in pixel_mercator(lat, lng, zoom))
+        for lat, lng in coordenadas
+    ]
+    teselas = set()
+    for inicio, fin in zip(puntos, puntos[1:] or puntos):
+        teselas.update(_teselas_segmento(*inicio, *fin))
+    return {(min(max(x, 0), ultima), min(max(y, 0), ultima)) for x, y in teselas}
+
+
+# ========== LÍNEAS ==========
+
+def codificar_polilinea(coordenadas, precision=5):
+    """
+    Codifica una lista de (lat, lng) con el algoritmo de polilíneas
+    codificadas de Google: diferencias entre puntos como enteros en base 64
+    """
+    factor = 10 ** precision
+    resultado = []
+    anterior_lat = anterior_lng = 0
+    for lat, lng in coordenadas:
+        actual_lat, actual_lng = round(lat * factor), round(lng * factor)
+        for diferencia in (actual_lat - anterior_lat, actual_lng - anterior_lng):
+            valor = ~(diferencia << 1) if diferencia < 0 else diferencia << 1
+            while valor >= 0x20:
+                resultado.append(chr((0x20 | (valor & 0x1f)) + 63))
+                valor >>= 5
+            resultado.append(chr(valor + 63))
+        anterior_lat, anterior_lng = actual_lat, actual_lng
+    return ''.join(resultado)
+
+
+def decodificar_polilinea(polilinea, precision=5):
+    """Inversa de codificar_polilinea: retorna la lista de (lat, lng)"""
+    factor = 10 ** precision
+    coordenadas = []
+    posicion = lat = lng = 0
+    while posicion < len(polilinea):
+        diferencias = []
+        for _ in range(2):
+            valor = desplazamiento = 0
+            while True:
+                byte = ord(polilinea[posicion]) - 63
+                posicion += 1
+                valor |= (byte & 0x1f) << desplazamiento
+                desplazamiento += 5
+                if byte < 0x20:
+                    break
+            diferencias.append(~(valor >> 1) if valor & 1 else valor >> 1)
+        lat += diferencias[0]
+        lng += diferencias[1]
+        coordenadas.append((lat / factor, lng / factor))
+    return coordenadas
+
+
+def _distancia_segmento(punto, inicio, fin):
+    """Distancia en el plano de un punto al segmento inicio-fin"""
+    dx, dy = fin[0] - inicio[0], fin[1] - inicio[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(punto[0] - inicio[0], punto[1] - inicio[1])
+    t = ((punto[0] - inicio[0]) * dx + (punto[1] - inicio[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(punto[0] - inicio[0] - t * dx, punto[1] - inicio[1] - t * dy)
+
+
+def simplificar_linea(coordenadas, zoom, tolerancia_px=1.0):
+    """
+    Simplifica una lista de (lat, lng) con Douglas-Peucker, quitando los
+    puntos que a ese zoom se separan de la línea menos de `tolerancia_px`
+    píxeles. Conserva siempre el primer y el último punto.
+    """
+    if len(coordenadas) < 3:
+        return list(coordenadas)
+
+    pixeles = [pixel_mercator(lat, lng, zoom) for lat, lng in coordenadas]
+    conservar = [False] * len(coordenadas)
+    conservar[0] = conservar[-1] = True
+    # Pila de tramos pendientes en lugar de recursión (rutas muy largas)
+    tramos = [(0, len(coordenadas) - 1)]
+    while tramos:
+        inicio, fin = tramos.pop()
+        maxima, indice = 0.0, None
+        for k in range(inicio + 1, fin):
+            distancia = _distancia_segmento(pixeles[k], pixeles[inicio], pixeles[fin])
+            if distancia > maxima:
+                maxima, indice = distancia, k
+        if indice is not None and maxima > tolerancia_px:
+            conservar[indice] = True
+            tramos.append((inicio, indice))
+            tramos.append((indice, fin))
+    return [punto for punto, queda in zip(coordenadas, conservar) if queda]
+
+
+# ========== CONSULTAS ==========
+
+def filtrar_rectangulo(queryset, sur, oeste, norte, este):
+    """Filas de un queryset georreferenciado dentro de un rectángulo (en grados)"""
+    queryset = queryset.filter(latitud__gte=sur, latitud__lte=norte)
+    if oeste <= este:
+        queryset = queryset.filter(longitud__gte=oeste, longitud__lte=este)
+    else:
+        queryset = queryset.filter(Q(longitud__gte=oeste) | Q(longitud__lte=este))
+
+    celdas = celdas_rectangulo(sur, oeste, norte, este)
+    if celdas:
+        queryset = queryset.filter(filtro_celdas(celdas))
+    return queryset
+
+
+def rectangulo_radio(lat, lng, radio_km):
+    """Rectángulo (sur, oeste, norte, este) que contiene el círculo de un radio"""
+    delta_lat = radio_km / KM_POR_GRADO
+    sur, norte = max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0)
+    if sur <= -90 or norte >= 90:
+        # El círculo incluye un polo: todas las longitudes
+        return sur, -180.0, norte, 180.0
+
+    delta_lng = delta_lat / math.cos(math.radians(lat))
+    if delta_lng >= 180:
+        return sur, -180.0, norte, 180.0
+    oeste = (lng - delta_lng + 540) % 360 - 180
+    este = (lng + delta_lng + 540) % 360 - 180
+    return sur, oeste, norte, este
+
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    """Distancia haversine entre dos puntos, en kilómetros"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * RADIO_TIERRA_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+def expresion_distancia(lat, lng):
+    """Expresión SQL con la distancia haversine (km) de cada fila a un punto"""
+    lat_radianes = math.radians(lat)
+    mitad_lat = (Radians(F('latitud')) - Value(lat_radianes)) / Value(2.0)
+    mitad_lng = (Radians(F('longitud')) - Value(math.radians(lng))) / Value(2.0)
+    a = (
+        Power(Sin(mitad_lat), Value(2.0))
+        + Value(math.cos(lat_radianes)) * Cos(Radians(F('latitud'))) * Power(Sin(mitad_lng), Value(2.0))
+    )
+    return Value(2 * RADIO_TIERRA_KM) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def filtrar_radio(queryset, lat, lng, radio_km):
+    """
+    Filas a `radio_km` kilómetros o menos de un punto, anotadas con
+    `distancia` (km). El rectángulo del círculo se resuelve con el índice y
+    la distancia exacta solo se calcula para esas filas.
+    """
+    return filtrar_rectangulo(queryset, *rectangulo_radio(lat, lng, radio_km)).annotate(
+        distancia=expresion_distancia(lat, lng)
+    ).filter(distancia__lte=radio_km)
+
+
+def vecinos_cercanos(queryset, lat, lng, limite, radio_maximo_km):
+    """
+    Las `limite` filas más cercanas a un punto (k vecinos más cercanos) a no
+    más de `radio_maximo_km`, ordenadas y anotadas con `distancia` (km).
+    Se busca en radios crecientes: si un radio ya contiene `limite` filas,
+    ninguna fila de fuera puede estar más cerca que ellas.
+    """
+    radio = RADIO_INICIAL_KM
+    while True:
+        radio = min(radio, radio_maximo_km)
+        vecinos = list(filtrar_radio(queryset, lat, lng, radio).order_by('distancia', 'pk')[:limite])
+        if len(vecinos) >= limite or radio >= radio_maximo_km:
+            return vecinos
+        radio *= 4
+
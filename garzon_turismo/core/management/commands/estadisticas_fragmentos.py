@@ -0,0 +1,29 @@
+# core/management/commands/estadisticas_fragmentos.py
+
+from django.core.management.base import BaseCommand
+
+from core.fragmentos import estadisticas_fragmentos, reiniciar_estadisticas
+
+
+class Command(BaseCommand):
+    help = "Muestra los aciertos y fallos de caché de cada fragmento de la página principal"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reiniciar',
+            action='store_true',
+            help="Pone a cero las estadísticas después de mostrarlas",
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'Fragmento':<30} {'Aciertos':>10} {'Fallos':>10} {'% Aciertos':>11}")
+        for nombre, valores in estadisticas_fragmentos().items():
+            total = valores['aciertos'] + valores['fallos']
+            porcentaje = f"{100 * valores['aciertos'] / total:.1f}" if total else '-'
+            self.stdout.write(
+                f"{nombre:<30} {valores['aciertos']:>10} {valores['fallos']:>10} {porcentaje:>11}"
+            )
+        
+        if options['reiniciar']:
+            reiniciar_estadisticas()
+            self.stdout.write(self.style.SUCCESS("Estadísticas reiniciadas"))
@@ -0,0 +1,32 @@
+# core/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.busqueda import INDICES, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla DocumentoBusqueda a partir de los modelos buscables"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tipos',
+            nargs='*',
+            help=f"Tipos a reconstruir (por defecto todos): {', '.join(INDICES)}",
+        )
+    
+    def handle(self, *args, **options):
+        tipos = options['tipos'] or None
+        desconocidos = set(tipos or []) - set(INDICES)
+        if desconocidos:
+            raise CommandError(f"Tipos desconocidos: {', '.join(sorted(desconocidos))}")
+        
+        with transaction.atomic():
+            totales = reconstruir_indice(tipos)
+        
+        for tipo, total in totales.items():
+            self.stdout.write(f"  {tipo}: {total} documentos")
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice de búsqueda reconstruido ({sum(totales.values())} documentos)"
+        ))
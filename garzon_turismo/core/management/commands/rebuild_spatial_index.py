@@ -0,0 +1,50 @@
+# core/management/commands/rebuild_spatial_index.py
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.geo import codificar
+from core.models import ModeloGeorreferenciado
+
+# Filas por cada UPDATE en lote
+TAMANO_LOTE = 1000
+
+
+def modelos_georreferenciados():
+    """Retorna {'app.modelo': modelo} de los modelos con índice espacial"""
+    return {
+        modelo._meta.label_lower: modelo for modelo in apps.get_models()
+        if issubclass(modelo, ModeloGeorreferenciado)
+    }
+
+
+class Command(BaseCommand):
+    help = "Recalcula la celda geohash de las filas georreferenciadas (índice espacial)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'modelos',
+            nargs='*',
+            help=f"Modelos a recalcular (por defecto todos): {', '.join(modelos_georreferenciados())}",
+        )
+
+    def handle(self, *args, **options):
+        disponibles = modelos_georreferenciados()
+        etiquetas = options['modelos'] or list(disponibles)
+        desconocidos = set(etiquetas) - set(disponibles)
+        if desconocidos:
+            raise CommandError(f"Modelos desconocidos: {', '.join(sorted(desconocidos))}")
+
+        for etiqueta in etiquetas:
+            modelo = disponibles[etiqueta]
+            cambios = []
+            filas = modelo.objects.order_by().values_list('pk', 'latitud', 'longitud', 'geohash')
+            for pk, latitud, longitud, actual in filas.iterator(chunk_size=TAMANO_LOTE):
+                geohash = codificar(latitud, longitud) or ''
+                if geohash != actual:
+                    cambios.append(modelo(pk=pk, geohash=geohash))
+            # Solo se escribe la columna del índice (sin save() ni señales)
+            modelo.objects.bulk_update(cambios, ['geohash'], batch_size=TAMANO_LOTE)
+            self.stdout.write(f"  {etiqueta}: {len(cambios)} filas actualizadas")
+
+        self.stdout.write(self.style.SUCCESS("Índice espacial actualizado"))
@@ -0,0 +1,85 @@
+# core/middleware.py
+
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .paginas import (
+    obtener_pagina, guardar_pagina, claves_de_contexto,
+    get_rutas_excluidas, MARCADOR_CSRF
+)
+
+# Páginas que toda respuesta usa a través de base.html
+CLAVES_COMUNES = {'core.configuracionsitio:*', 'core.paginaestatica:*'}
+
+
+class CachePaginasAnonimasMiddleware:
+    """
+    Guarda la respuesta completa de las peticiones GET de visitantes anónimos
+    y la etiqueta con claves sustitutas (ver core/paginas.py) para purgar
+    exactamente las páginas afectadas cuando se guarda un objeto.
+
+    Debe ir después de AuthenticationMiddleware y MessageMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._se_puede_cachear(request):
+            return self.get_response(request)
+
+        guardada = obtener_pagina(request)
+        if guardada is not None:
+            return self._responder_guardada(request, guardada)
+
+        response = self.get_response(request)
+        if self._se_puede_guardar(request, response):
+            claves = CLAVES_COMUNES | getattr(request, '_claves_sustitutas', set())
+            guardar_pagina(request, response, claves)
+            response['X-Cache-Pagina'] = 'MISS'
+        return response
+
+    def process_template_response(self, request, response):
+        if self._se_puede_cachear(request) and response.context_data:
+            if not hasattr(request, '_claves_sustitutas'):
+                request._claves_sustitutas = set()
+            request._claves_sustitutas |= claves_de_contexto(response.context_data)
+        return response
+
+    def _se_puede_cachear(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if request.user.is_authenticated:
+            return False
+        # Hay mensajes pendientes de mostrar (almacenados en cookie)
+        if 'messages' in request.COOKIES:
+            return False
+        return not any(request.path.startswith(ruta) for ruta in get_rutas_excluidas())
+
+    def _se_puede_guardar(self, request, response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        if response.cookies or response.has_header('Set-Cookie'):
+            return False
+        if 'private' in response.get('Cache-Control', '') or 'no-store' in response.get('Cache-Control', ''):
+            return False
+        if not response.get('Content-Type', '').startswith('text/html'):
+            return False
+        # La página mostró o agregó mensajes: son de este visitante
+        mensajes = getattr(request, '_messages', None)
+        if mensajes is not None and (mensajes.used or len(mensajes)):
+            return False
+        return True
+
+    def _responder_guardada(self, request, guardada):
+        contenido = guardada['contenido']
+        if guardada['csrf']:
+            # Cada visitante recibe su propio token (y su cookie CSRF)
+            contenido = contenido.replace(MARCADOR_CSRF, get_token(request))
+        response = HttpResponse(
+            contenido.encode(guardada['charset']),
+            content_type=guardada['content_type'],
+            status=guardada['status'],
+        )
+        response['X-Cache-Pagina'] = 'HIT'
+        return response
@@ -0,0 +1,92 @@
+# Generated by Django 5.2 on 2026-10-18 00:01
+
+from django.db import migrations, models
+
+
+# Índices de texto completo según el motor: FULLTEXT en MySQL (producción) y
+# una tabla FTS5 de contenido externo en SQLite (tests). Otros motores usan
+# la búsqueda de respaldo de core/busqueda.py.
+
+SQLITE_CREAR = [
+    """CREATE VIRTUAL TABLE core_documentobusqueda_fts USING fts5(
+        terminos_nombre, terminos_texto,
+        content='core_documentobusqueda', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER core_documentobusqueda_ai AFTER INSERT ON core_documentobusqueda BEGIN
+        INSERT INTO core_documentobusqueda_fts(rowid, terminos_nombre, terminos_texto)
+        VALUES (new.id, new.terminos_nombre, new.terminos_texto);
+    END""",
+    """CREATE TRIGGER core_documentobusqueda_ad AFTER DELETE ON core_documentobusqueda BEGIN
+        INSERT INTO core_documentobusqueda_fts(core_documentobusqueda_fts, rowid, terminos_nombre, terminos_texto)
+        VALUES ('delete', old.id, old.terminos_nombre, old.terminos_texto);
+    END""",
+    """CREATE TRIGGER core_documentobusqueda_au AFTER UPDATE ON core_documentobusqueda BEGIN
+        INSERT INTO core_documentobusqueda_fts(core_documentobusqueda_fts, rowid, terminos_nombre, terminos_texto)
+        VALUES ('delete', old.id, old.terminos_nombre, old.terminos_texto);
+        INSERT INTO core_documentobusqueda_fts(rowid, terminos_nombre, terminos_texto)
+        VALUES (new.id, new.terminos_nombre, new.terminos_texto);
+    END""",
+]
+
+SQLITE_BORRAR = [
+    "DROP TRIGGER IF EXISTS core_documentobusqueda_ai",
+    "DROP TRIGGER IF EXISTS core_documentobusqueda_ad",
+    "DROP TRIGGER IF EXISTS core_documentobusqueda_au",
+    "DROP TABLE IF EXISTS core_documentobusqueda_fts",
+]
+
+MYSQL_CREAR = [
+    "CREATE FULLTEXT INDEX core_documentobusqueda_ft ON core_documentobusqueda (terminos_nombre, terminos_texto)",
+]
+
+MYSQL_BORRAR = [
+    "DROP INDEX core_documentobusqueda_ft ON core_documentobusqueda",
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sentencia in sentencias.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+def crear_indice_texto(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_CREAR, 'mysql': MYSQL_CREAR})
+
+
+def borrar_indice_texto(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_BORRAR, 'mysql': MYSQL_BORRAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_remove_configuracionsitio_google_maps_api_key_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('nombre', models.CharField(max_length=255)),
+                ('descripcion', models.TextField(blank=True)),
+                ('categoria', models.CharField(blank=True, max_length=200)),
+                ('url', models.CharField(max_length=255)),
+                ('imagen', models.FileField(blank=True, max_length=255, upload_to='')),
+                ('destacado', models.BooleanField(default=False)),
+                ('terminos_nombre', models.TextField(blank=True)),
+                ('terminos_texto', models.TextField(blank=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Documento de Búsqueda',
+                'verbose_name_plural': 'Documentos de Búsqueda',
+                'ordering': ['tipo', 'nombre'],
+                'unique_together': {('tipo', 'objeto_id')},
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, borrar_indice_texto),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+# Índice FULLTEXT solo sobre el nombre (MySQL) para ponderar las
+# coincidencias en el nombre por encima del resto del texto. En SQLite la
+# tabla FTS5 ya pondera cada columna con bm25().
+
+MYSQL_CREAR = [
+    "CREATE FULLTEXT INDEX core_documentobusqueda_ft_nombre ON core_documentobusqueda (terminos_nombre)",
+]
+
+MYSQL_BORRAR = [
+    "DROP INDEX core_documentobusqueda_ft_nombre ON core_documentobusqueda",
+]
+
+
+def crear_indice_nombre(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for sentencia in MYSQL_CREAR:
+            schema_editor.execute(sentencia)
+
+
+def borrar_indice_nombre(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for sentencia in MYSQL_BORRAR:
+            schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_documentobusqueda'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_nombre, borrar_indice_nombre),
+    ]
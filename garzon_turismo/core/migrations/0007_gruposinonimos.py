@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_indice_texto_nombre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrupoSinonimos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('palabras', models.TextField(help_text='Una palabra por entrada, separadas por comas')),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Grupo de Sinónimos',
+                'verbose_name_plural': 'Grupos de Sinónimos',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_gruposinonimos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentobusqueda',
+            name='fecha',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_documentobusqueda_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultaBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origen', models.CharField(max_length=20)),
+                ('consulta', models.CharField(db_index=True, max_length=200)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('conteos', models.JSONField(blank=True, default=dict)),
+                ('duracion_ms', models.FloatField()),
+                ('sin_resultados', models.BooleanField(db_index=True, default=False)),
+                ('fecha', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Consulta de Búsqueda',
+                'verbose_name_plural': 'Consultas de Búsqueda',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@
 from django.db import models
 from django.utils.text import slugify
 
+from .geo import PRECISION_GEOHASH, codificar
+
 class TimeStampedModel(models.Model):
     """
     Modelo abstracto que proporciona campos de auditoría
@@ -13,6 +15,23 @@ class TimeStampedModel(models.Model):
     class Meta:
         abstract = True
 
+class ModeloGeorreferenciado(TimeStampedModel):
+    """
+    Modelo abstracto para filas con `latitud` y `longitud` (definidas en cada
+    modelo): mantiene la celda geohash que usa el índice espacial (core/geo.py)
+    """
+    geohash = models.CharField(max_length=PRECISION_GEOHASH, blank=True, db_index=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.geohash = codificar(self.latitud, self.longitud) or ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitud', 'longitud'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
 class ConfiguracionSitio(TimeStampedModel):
     """
     Configuración general del sitio web
@@ -186,4 +205,77 @@ class Valoracion(TimeStampedModel):
     class Meta:
         ordering = ['-created']
         verbose_name = "Valoración"
-        verbose_name_plural = "Valoraciones"
\ No newline at end of file
+        verbose_name_plural = "Valoraciones"
+
+
+class DocumentoBusqueda(models.Model):
+    """
+    Copia desnormalizada de un objeto buscable del sitio (lugar, evento,
+    ruta...). Se mantiene por señales y con `manage.py rebuild_search_index`;
+    ver core/busqueda.py
+    """
+    tipo = models.CharField(max_length=20)
+    objeto_id = models.PositiveIntegerField()
+    nombre = models.CharField(max_length=255)
+    descripcion = models.TextField(blank=True)
+    categoria = models.CharField(max_length=200, blank=True)
+    url = models.CharField(max_length=255)
+    imagen = models.FileField(max_length=255, blank=True)
+    destacado = models.BooleanField(default=False)
+    # Fecha del contenido (p. ej. publicación de un post) para ordenar por recencia
+    fecha = models.DateTimeField(null=True, blank=True)
+    
+    # Texto normalizado sobre el que se crea el índice de texto completo
+    terminos_nombre = models.TextField(blank=True)
+    terminos_texto = models.TextField(blank=True)
+    
+    actualizado = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.tipo}: {self.nombre}"
+    
+    class Meta:
+        ordering = ['tipo', 'nombre']
+        unique_together = ['tipo', 'objeto_id']
+        verbose_name = "Documento de Búsqueda"
+        verbose_name_plural = "Documentos de Búsqueda"
+
+class GrupoSinonimos(TimeStampedModel):
+    """
+    Palabras que la búsqueda trata como equivalentes, por ejemplo
+    "senderismo, caminata, trekking" (ver core/analisis.py)
+    """
+    palabras = models.TextField(help_text="Una palabra por entrada, separadas por comas")
+    activo = models.BooleanField(default=True)
+    
+    def get_palabras(self):
+        return [palabra.strip() for palabra in self.palabras.split(',') if palabra.strip()]
+    
+    def __str__(self):
+        return ', '.join(self.get_palabras())
+    
+    class Meta:
+        verbose_name = "Grupo de Sinónimos"
+        verbose_name_plural = "Grupos de Sinónimos"
+
+class ConsultaBusqueda(models.Model):
+    """
+    Registro de una búsqueda del sitio: texto normalizado, resultados y
+    duración. Se escribe por lotes desde core/telemetria.py
+    """
+    origen = models.CharField(max_length=20)
+    consulta = models.CharField(max_length=200, db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    conteos = models.JSONField(default=dict, blank=True)
+    duracion_ms = models.FloatField()
+    sin_resultados = models.BooleanField(default=False, db_index=True)
+    fecha = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.origen}: {self.consulta}"
+    
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = "Consulta de Búsqueda"
+        verbose_name_plural = "Consultas de Búsqueda"
+
@@ -0,0 +1,151 @@
+# core/paginacion.py
+
+import heapq
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F
+from django.db.models.functions import Collate
+
+
+# Intercalación binaria por motor: ordena los textos igual que Python
+# (por punto de código), para que la mezcla coincida con el ORDER BY
+COLACIONES_BINARIAS = {
+    'sqlite': 'BINARY',
+    'mysql': 'utf8mb4_bin',
+    'postgresql': 'C',
+}
+
+
+class ResultadosCombinados:
+    """
+    Secuencia perezosa que combina varios QuerySet (uno por tipo de objeto)
+    en un solo orden, para pasarla a Paginator o a un ListView.
+
+    `fuentes` es una lista de (tipo, queryset, campo_orden, convertir): cada
+    queryset se ordena por su campo y `convertir(objeto)` construye el
+    resultado que recibe la plantilla. Los totales salen de un COUNT por
+    tipo y una página se obtiene mezclando (k-way merge) solo las claves de
+    orden de las primeras filas de cada tipo; después se cargan únicamente
+    los objetos de la página. La memoria depende del número de página, no
+    del número de coincidencias.
+
+    La mezcla compara (valor, pk) tal como los ordenó la base de datos; los
+    campos de texto se ordenan con intercalación binaria (COLACIONES_BINARIAS)
+    para que el orden de cada consulta y el de la mezcla sean el mismo.
+    """
+
+    def __init__(self, fuentes):
+        self.fuentes = fuentes
+        self._conteos = None
+
+    def conteos(self):
+        """Retorna {tipo: total} (una consulta COUNT por tipo, memorizado)"""
+        if self._conteos is None:
+            self._conteos = {
+                tipo: queryset.count() for tipo, queryset, _, _ in self.fuentes
+            }
+        return self._conteos
+
+    def count(self):
+        return sum(self.conteos().values())
+
+    def __len__(self):
+        return self.count()
+
+    def _claves(self, indice, limite):
+        """Claves de orden de las primeras `limite` filas de una fuente"""
+        _, queryset, campo, _ = self.fuentes[indice]
+        if not self.conteos()[self.fuentes[indice][0]]:
+            return
+        orden = F(campo)
+        colacion = COLACIONES_BINARIAS.get(connections[queryset.db].vendor)
+        if colacion and self._es_texto(queryset.model, campo):
+            orden = Collate(campo, colacion)
+        filas = queryset.order_by(orden, 'pk').values_list(campo, 'pk')[:limite]
+        for valor, pk in filas:
+            yield (valor, pk), indice, pk
+
+    @staticmethod
+    def _es_texto(modelo, campo):
+        try:
+            tipo = modelo._meta.get_field(campo).get_internal_type()
+        except FieldDoesNotExist:
+            return False
+        return tipo in ('CharField', 'TextField', 'SlugField', 'EmailField')
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, int):
+            resultado = self[posicion:posicion + 1]
+            if not resultado:
+                raise IndexError(posicion)
+            return resultado[0]
+
+        inicio, fin, _ = posicion.indices(self.count())
+        if inicio >= fin:
+            return []
+
+        mezcla = heapq.merge(*[self._claves(i, fin) for i in range(len(self.fuentes))])
+        seleccion = list(islice(mezcla, inicio, fin))
+
+        # Cargar solo los objetos de la página, con una consulta por tipo
+        pks_por_fuente = {}
+        for _, indice, pk in seleccion:
+            pks_por_fuente.setdefault(indice, []).append(pk)
+        objetos = {
+            indice: self.fuentes[indice][1].in_bulk(pks)
+            for indice, pks in pks_por_fuente.items()
+        }
+
+        return [
+            self.fuentes[indice][3](objetos[indice][pk])
+            for _, indice, pk in seleccion
+        ]
+
+
+class ResultadosPorIds:
+    """
+    Secuencia de objetos a partir de una lista ordenada de pks (por ejemplo,
+    la guardada por core/resultados.py). Al paginarla solo se cargan, con una
+    consulta, los objetos de la página pedida.
+
+    Si solo se guardaron los pks de las primeras páginas, `total` es el
+    número de coincidencias y `restantes()` retorna la consulta (perezosa)
+    de los pks en el mismo orden: las páginas siguientes se leen de ella con
+    LIMIT/OFFSET.
+    """
+
+    def __init__(self, ids, queryset, total=None, restantes=None):
+        self.ids = ids
+        self.queryset = queryset
+        self.total = len(ids) if total is None else total
+        self.restantes = restantes
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.count()
+
+    def _pks(self, inicio, fin):
+        pks = list(self.ids[inicio:fin])
+        if fin > len(self.ids) and self.restantes is not None:
+            pks += list(self.restantes()[max(inicio, len(self.ids)):fin])
+        return pks
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, int):
+            resultado = self[posicion:posicion + 1]
+            if not resultado:
+                raise IndexError(posicion)
+            return resultado[0]
+
+        inicio, fin, _ = posicion.indices(self.count())
+        if inicio >= fin:
+            return []
+
+        ids = self._pks(inicio, fin)
+        objetos = self.queryset.in_bulk(ids)
+        # Un objeto eliminado después de guardar los resultados se omite
+        return [objetos[pk] for pk in ids if pk in objetos]
@@ -0,0 +1,142 @@
+# core/paginas.py
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.db import models
+
+from .cache import obtener_generaciones, incrementar_generacion
+
+# Prefijos de las páginas guardadas y de las generaciones de sus claves sustitutas
+PREFIJO_PAGINA = 'core:pagina'
+PREFIJO_SUSTITUTA = 'sustituta'
+
+# Marcador que reemplaza el token CSRF en la copia guardada
+MARCADOR_CSRF = '__CSRF_TOKEN__'
+
+# Campo oculto que genera {% csrf_token %}
+PATRON_CSRF = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def get_timeout():
+    """Tiempo máximo de vida de una página guardada"""
+    return getattr(settings, 'CORE_CACHE_PAGINAS_TIMEOUT', 300)
+
+
+def get_rutas_excluidas():
+    """Prefijos de rutas que nunca se guardan"""
+    return getattr(settings, 'CORE_CACHE_PAGINAS_EXCLUIR', ['/admin/'])
+
+
+def get_campos_contadores():
+    """Campos contadores por modelo ('app.modelo'), cuyo cambio no purga páginas"""
+    return getattr(settings, 'CORE_CACHE_PAGINAS_CAMPOS_CONTADORES', {})
+
+
+def solo_contadores(modelo, update_fields):
+    """Indica si un guardado con update_fields cambia solo campos contadores"""
+    if update_fields is None:
+        return False
+    contadores = get_campos_contadores().get(modelo._meta.label_lower, ())
+    return set(update_fields) <= set(contadores)
+
+
+# ========== CLAVES SUSTITUTAS ==========
+# Una página se etiqueta con las claves de los objetos que muestra:
+# 'turismo.lugarturistico:42' para un objeto y 'turismo.ruta:*' para
+# cualquier listado de rutas. Guardar un objeto purga ambas claves.
+
+def clave_objeto(modelo, pk):
+    return f'{modelo._meta.label_lower}:{pk}'
+
+
+def clave_modelo(modelo):
+    return f'{modelo._meta.label_lower}:*'
+
+
+def agregar_claves_sustitutas(request, *claves):
+    """Etiqueta la respuesta de la petición con claves adicionales"""
+    if not hasattr(request, '_claves_sustitutas'):
+        request._claves_sustitutas = set()
+    request._claves_sustitutas.update(claves)
+
+
+def claves_de_objeto(objeto):
+    """El objeto y los objetos a los que apunta por clave foránea"""
+    claves = {clave_objeto(type(objeto), objeto.pk)}
+    for campo in objeto._meta.concrete_fields:
+        if campo.is_relation and campo.many_to_one:
+            valor = getattr(objeto, campo.attname)
+            if valor is not None:
+                claves.add(clave_objeto(campo.related_model, valor))
+    return claves
+
+
+def claves_de_contexto(contexto):
+    """Deduce las claves sustitutas de los objetos y listados del contexto"""
+    claves = set()
+    for valor in contexto.values():
+        if isinstance(valor, models.Model):
+            claves |= claves_de_objeto(valor)
+        elif isinstance(valor, models.QuerySet):
+            claves.add(clave_modelo(valor.model))
+        elif isinstance(valor, Page):
+            if isinstance(valor.object_list, models.QuerySet):
+                claves.add(clave_modelo(valor.object_list.model))
+        elif isinstance(valor, (list, tuple)):
+            # Listas ya evaluadas (p. ej. fragmentos cacheados)
+            for modelo in {type(o) for o in valor if isinstance(o, models.Model)}:
+                claves.add(clave_modelo(modelo))
+    return claves
+
+
+def claves_a_purgar(objeto):
+    """El objeto, los listados de su modelo y los objetos padre que lo muestran"""
+    return claves_de_objeto(objeto) | {clave_modelo(type(objeto))}
+
+
+def purgar_claves(claves):
+    """Invalida todas las páginas etiquetadas con alguna de las claves"""
+    for clave in claves:
+        incrementar_generacion(f'{PREFIJO_SUSTITUTA}:{clave}')
+
+
+def _generaciones(claves):
+    nombres = {f'{PREFIJO_SUSTITUTA}:{clave}': clave for clave in claves}
+    return {
+        nombres[nombre]: generacion
+        for nombre, generacion in obtener_generaciones(nombres).items()
+    }
+
+
+# ========== PÁGINAS GUARDADAS ==========
+
+def clave_pagina(request):
+    url = request.build_absolute_uri()
+    return f'{PREFIJO_PAGINA}:{hashlib.md5(url.encode()).hexdigest()}'
+
+
+def obtener_pagina(request):
+    """Retorna la página guardada si ninguna de sus claves fue purgada"""
+    guardada = cache.get(clave_pagina(request))
+    if guardada is None:
+        return None
+    if _generaciones(guardada['generaciones']) != guardada['generaciones']:
+        return None
+    return guardada
+
+
+def guardar_pagina(request, response, claves):
+    """Guarda el contenido con el token CSRF reemplazado por un marcador"""
+    contenido = PATRON_CSRF.sub(rf'\g<1>{MARCADOR_CSRF}\g<2>', response.content.decode(response.charset))
+    cache.set(clave_pagina(request), {
+        'contenido': contenido,
+        'charset': response.charset,
+        'content_type': response['Content-Type'],
+        'status': response.status_code,
+        'csrf': MARCADOR_CSRF in contenido,
+        'generaciones': _generaciones(claves),
+    }, get_timeout())
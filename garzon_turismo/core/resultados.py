@@ -0,0 +1,74 @@
+# core/resultados.py
+# Caché de resultados de búsqueda por consulta normalizada
+
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import obtener_generacion, incrementar_generacion
+from .utils import normalizar_texto
+
+# Prefijo de las claves de resultados en la caché compartida
+PREFIJO_RESULTADOS = 'core:resultados'
+
+
+def get_timeout():
+    """Tiempo de vida de los resultados (se invalidan por generación)"""
+    return getattr(settings, 'CORE_BUSQUEDA_RESULTADOS_TIMEOUT', 900)
+
+
+def get_paginas_guardadas():
+    """Páginas de resultados cuyos pks se guardan (las siguientes se consultan)"""
+    return getattr(settings, 'CORE_BUSQUEDA_PAGINAS_GUARDADAS', 10)
+
+
+def limite_ids(por_pagina):
+    """Número máximo de pks que se guardan para una vista de `por_pagina` resultados"""
+    return get_paginas_guardadas() * por_pagina
+
+
+def nombre_generacion(ambito):
+    return f'resultados:{ambito}'
+
+
+# ========== INVALIDACIÓN ==========
+
+def invalidar_ambito(ambito):
+    """Marca como obsoletos todos los resultados guardados de un ámbito"""
+    # Ya y al confirmar, por si otra petición guardó resultados con los datos
+    # anteriores mientras la transacción seguía abierta
+    incrementar_generacion(nombre_generacion(ambito))
+    transaction.on_commit(partial(incrementar_generacion, nombre_generacion(ambito)))
+
+
+# ========== CONSULTA ==========
+
+def clave_resultados(ambito, texto, generacion, opciones):
+    """Clave para el texto normalizado y las opciones de la búsqueda"""
+    firma = repr((normalizar_texto(texto), sorted(opciones.items())))
+    resumen = hashlib.md5(firma.encode('utf-8')).hexdigest()
+    return f'{PREFIJO_RESULTADOS}:{ambito}:{generacion}:{resumen}'
+
+
+def obtener_resultados(ambito, texto, calcular, **opciones):
+    """
+    Retorna el resultado de `calcular()` para el texto buscado, guardado en la
+    caché mientras no cambie la generación del ámbito. `calcular` debe
+    retornar solo datos pequeños: {'ids': [pks en orden]}, limitados a las
+    primeras páginas con limite_ids() y con el número de coincidencias en
+    'total', y si hacen falta los totales por tipo en 'conteos'; la página se
+    carga después con ResultadosPorIds (core/paginacion.py).
+    "Café", "cafe" y " CAFÉ " comparten la misma entrada.
+    """
+    if not normalizar_texto(texto):
+        return calcular()
+
+    clave = clave_resultados(ambito, texto, obtener_generacion(nombre_generacion(ambito)), opciones)
+    resultados = cache.get(clave)
+    if resultados is None:
+        resultados = calcular()
+        cache.set(clave, resultados, get_timeout())
+    return resultados
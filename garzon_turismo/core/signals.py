@@ -0,0 +1,130 @@
+# core/signals.py
+
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .cache import (
+    incrementar_generacion, generacion_modelo,
+    GENERACION_CONFIGURACION, GENERACION_MENU
+)
+from .analisis import GENERACION_SINONIMOS
+from .busqueda import AMBITO_DOCUMENTOS
+from .fragmentos import MODELOS_FRAGMENTOS
+from .paginas import claves_a_purgar, clave_modelo, clave_objeto, purgar_claves, solo_contadores
+from .resultados import invalidar_ambito
+from .models import ConfiguracionSitio, PaginaEstatica, GrupoSinonimos
+from blog.models import CategoriaBlog, Post
+
+
+def invalidar_configuracion(sender, **kwargs):
+    """Obliga a todos los procesos a recargar la configuración del sitio"""
+    transaction.on_commit(partial(incrementar_generacion, GENERACION_CONFIGURACION))
+
+
+def invalidar_menu(sender, **kwargs):
+    """Obliga a todos los procesos a recargar el menú de páginas estáticas"""
+    transaction.on_commit(partial(incrementar_generacion, GENERACION_MENU))
+
+
+post_save.connect(invalidar_configuracion, sender=ConfiguracionSitio,
+                  dispatch_uid='configuracion_save')
+post_delete.connect(invalidar_configuracion, sender=ConfiguracionSitio,
+                    dispatch_uid='configuracion_delete')
+post_save.connect(invalidar_menu, sender=PaginaEstatica, dispatch_uid='menu_save')
+post_delete.connect(invalidar_menu, sender=PaginaEstatica, dispatch_uid='menu_delete')
+
+
+# ========== SINÓNIMOS DE LA BÚSQUEDA ==========
+
+def invalidar_sinonimos(sender, **kwargs):
+    """Recarga los sinónimos y descarta los resultados guardados con los anteriores"""
+    incrementar_generacion(GENERACION_SINONIMOS)
+    transaction.on_commit(partial(incrementar_generacion, GENERACION_SINONIMOS))
+    invalidar_ambito(AMBITO_DOCUMENTOS)
+
+
+post_save.connect(invalidar_sinonimos, sender=GrupoSinonimos, dispatch_uid='sinonimos_save')
+post_delete.connect(invalidar_sinonimos, sender=GrupoSinonimos, dispatch_uid='sinonimos_delete')
+
+
+# ========== FRAGMENTOS DE LA PÁGINA PRINCIPAL ==========
+
+def invalidar_generacion_modelo(sender, **kwargs):
+    """Invalida los fragmentos que dependen del modelo modificado"""
+    transaction.on_commit(partial(incrementar_generacion, generacion_modelo(sender)))
+
+
+def invalidar_categorias_post(sender, action, **kwargs):
+    """Cambiar las categorías de un post cambia el fragmento de posts"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidar_generacion_modelo(Post)
+
+
+for modelo in MODELOS_FRAGMENTOS:
+    nombre = modelo._meta.label_lower
+    post_save.connect(invalidar_generacion_modelo, sender=modelo,
+                      dispatch_uid=f'generacion_save_{nombre}')
+    post_delete.connect(invalidar_generacion_modelo, sender=modelo,
+                        dispatch_uid=f'generacion_delete_{nombre}')
+
+m2m_changed.connect(invalidar_categorias_post, sender=Post.categorias.through,
+                    dispatch_uid='generacion_post_categorias')
+
+
+# ========== CACHÉ DE PÁGINAS ANÓNIMAS ==========
+
+def purgar_paginas(sender, instance, update_fields=None, **kwargs):
+    """Purga las páginas etiquetadas con el objeto guardado o eliminado"""
+    if sender._meta.app_label not in getattr(settings, 'CORE_CACHE_PAGINAS_APPS', []):
+        return
+    # Un contador (p. ej. las vistas de una foto) no vale una purga por visita
+    if solo_contadores(sender, update_fields):
+        return
+    # Se purga ya y otra vez al confirmar, por si otra petición guardó la
+    # página con los datos anteriores mientras la transacción seguía abierta
+    claves = claves_a_purgar(instance)
+    purgar_claves(claves)
+    transaction.on_commit(partial(purgar_claves, claves))
+
+
+post_save.connect(purgar_paginas, dispatch_uid='paginas_save')
+post_delete.connect(purgar_paginas, dispatch_uid='paginas_delete')
+
+
+def purgar_paginas_categorias_post(sender, instance, action, reverse, pk_set, **kwargs):
+    """Cambiar las categorías de un post purga sus páginas y las de las categorías afectadas"""
+    if Post._meta.app_label not in getattr(settings, 'CORE_CACHE_PAGINAS_APPS', []):
+        return
+    campo = Post.categorias.field
+    if action == 'pre_clear':
+        # post_clear no trae los pks: se anotan los relacionados antes de quitarlos
+        origen, destino = campo.m2m_field_name(), campo.m2m_reverse_field_name()
+        if reverse:
+            origen, destino = destino, origen
+        instance._pks_categorias_post = set(
+            sender.objects.filter(**{origen: instance.pk}).values_list(destino, flat=True)
+        )
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_pks_categorias_post', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    # En sentido inverso (categoria.posts.add(...)) la instancia es la categoría
+    if reverse:
+        posts, pks_categorias = Post.objects.filter(pk__in=pk_set), {instance.pk}
+    else:
+        posts, pks_categorias = [instance], pk_set
+    claves = {clave_modelo(CategoriaBlog)}
+    claves.update(clave_objeto(CategoriaBlog, pk) for pk in pks_categorias)
+    for post in posts:
+        claves |= claves_a_purgar(post)
+    purgar_claves(claves)
+    transaction.on_commit(partial(purgar_claves, claves))
+
+
+m2m_changed.connect(purgar_paginas_categorias_post, sender=Post.categorias.through,
+                    dispatch_uid='paginas_post_categorias')
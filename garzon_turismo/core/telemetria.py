@@ -0,0 +1,102 @@
+# core/telemetria.py
+# Registro de las búsquedas del sitio (ConsultaBusqueda) por lotes
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.utils import timezone
+
+from .models import ConsultaBusqueda
+from .utils import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+# Registros pendientes del proceso y momento de la última escritura
+_pendientes = []
+_estado = {'ultima_escritura': time.monotonic()}
+_bloqueo = threading.Lock()
+
+
+def get_tamano_lote():
+    """Registros que se acumulan antes de escribirlos con un bulk_create"""
+    return getattr(settings, 'CORE_TELEMETRIA_LOTE', 50)
+
+
+def get_intervalo():
+    """Segundos máximos que un registro espera en memoria"""
+    return getattr(settings, 'CORE_TELEMETRIA_INTERVALO', 30)
+
+
+def get_maximo_pendientes():
+    """Si la base de datos no responde, los registros que sobran se descartan"""
+    return getattr(settings, 'CORE_TELEMETRIA_MAXIMO_PENDIENTES', 5000)
+
+
+def es_primera_pagina(request, parametro='page'):
+    """Pasar a otra página de resultados no es una búsqueda nueva: solo se registra la primera"""
+    return request.GET.get(parametro, '1') in ('', '1')
+
+
+def registrar_busqueda(origen, texto, inicio, total, conteos=None):
+    """
+    Guarda en memoria una búsqueda; `inicio` es el time.perf_counter() del
+    comienzo de la búsqueda. No escribe en la base de datos: los registros
+    se insertan por lotes al terminar una petición (ver vaciar_si_corresponde).
+    """
+    if not getattr(settings, 'CORE_TELEMETRIA_ACTIVA', True):
+        return
+    consulta = ConsultaBusqueda(
+        origen=origen,
+        consulta=normalizar_texto(texto)[:200],
+        total=total,
+        conteos=conteos or {},
+        duracion_ms=round((time.perf_counter() - inicio) * 1000, 2),
+        sin_resultados=total == 0,
+        fecha=timezone.now(),
+    )
+    with _bloqueo:
+        if len(_pendientes) < get_maximo_pendientes():
+            _pendientes.append(consulta)
+
+
+def vaciar():
+    """Escribe todos los registros pendientes con un solo bulk_create"""
+    with _bloqueo:
+        lote = _pendientes[:]
+        del _pendientes[:]
+        _estado['ultima_escritura'] = time.monotonic()
+    if lote:
+        ConsultaBusqueda.objects.bulk_create(lote)
+    return len(lote)
+
+
+def vaciar_si_corresponde(**kwargs):
+    """
+    Se ejecuta con request_finished, cuando la respuesta ya se envió: el
+    usuario no espera la inserción. Solo escribe si el lote está completo
+    o si los registros llevan esperando más que el intervalo.
+    """
+    if not _pendientes:
+        return
+    vencido = time.monotonic() - _estado['ultima_escritura'] >= get_intervalo()
+    if len(_pendientes) >= get_tamano_lote() or vencido:
+        try:
+            vaciar()
+        except Exception:
+            # La telemetría nunca debe romper una petición
+            logger.exception("No se pudieron guardar las consultas de búsqueda")
+
+
+def _vaciar_al_salir():
+    try:
+        vaciar()
+    except Exception:
+        logger.exception("No se pudieron guardar las consultas de búsqueda")
+
+
+request_finished.connect(vaciar_si_corresponde, dispatch_uid='telemetria_busquedas')
+atexit.register(_vaciar_al_salir)
@@ -1,3 +1,475 @@
-from django.test import TestCase
+from io import StringIO
+
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from unittest.mock import patch
+
+from .models import ConfiguracionSitio, PaginaEstatica, Testimonio, GrupoSinonimos, ConsultaBusqueda
+from .analisis import raiz, analizar, analizar_consulta
+from .trigramas import corregir, distancia_edicion
+from .busqueda import resaltar_fragmento
+from . import telemetria
+from .geo import (
+    codificar, decodificar, filtrar_radio, filtrar_rectangulo,
+    codificar_polilinea, decodificar_polilinea, simplificar_linea, tesela, teselas_linea
+)
+from .cache import get_configuracion, get_paginas_menu
+from .context_processors import configuracion_sitio
+from .fragmentos import obtener_fragmentos, estadisticas_fragmentos
+from .paginas import MARCADOR_CSRF, clave_modelo, clave_objeto
+from .paginacion import ResultadosCombinados
+from blog.models import CategoriaBlog, Post
+from contacto.models import Contacto
+from turismo.models import Categoria, LugarTuristico, Ruta, CategoriaFotografia, Fotografia
+from django.core.paginator import Paginator
+
+# ========== TESTS DE CACHÉ DE CONFIGURACIÓN ==========
+
+class ConfiguracionCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.config = ConfiguracionSitio.objects.create(
+                nombre_sitio="Sitio Test",
+                descripcion_sitio="Test",
+                email_contacto="test@example.com",
+                telefono_contacto="123",
+                direccion="Test"
+            )
+            PaginaEstatica.objects.create(titulo="Acerca", contenido="Test", en_menu=True)
+    
+    def test_sin_consultas_tras_la_primera_carga(self):
+        """Test que la configuración y el menú se leen de la memoria del proceso"""
+        get_configuracion()
+        get_paginas_menu()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_configuracion().nombre_sitio, "Sitio Test")
+            self.assertEqual(len(get_paginas_menu()), 1)
+    
+    def test_guardar_recarga_la_configuracion(self):
+        """Test que guardar la configuración incrementa la generación compartida"""
+        get_configuracion()
+        self.config.nombre_sitio = "Nuevo Nombre"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.config.save()
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(get_configuracion().nombre_sitio, "Nuevo Nombre")
+        # El menú no depende de la configuración
+        get_paginas_menu()
+        with self.assertNumQueries(0):
+            get_paginas_menu()
+    
+    def test_guardar_pagina_recarga_el_menu(self):
+        """Test que guardar una página estática recarga el menú"""
+        self.assertEqual(len(get_paginas_menu()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            PaginaEstatica.objects.create(titulo="Contacto", contenido="Test", en_menu=True)
+        self.assertEqual(len(get_paginas_menu()), 2)
+    
+    def test_context_processor(self):
+        """Test que el context processor expone los valores cacheados"""
+        get_configuracion()
+        get_paginas_menu()
+        contexto = configuracion_sitio(RequestFactory().get('/'))
+        with self.assertNumQueries(0):
+            self.assertEqual(contexto['config'].nombre_sitio, "Sitio Test")
+            self.assertEqual([p.titulo for p in contexto['paginas_menu']], ["Acerca"])
+
+# ========== TESTS DE FRAGMENTOS DE LA PÁGINA PRINCIPAL ==========
+
+class FragmentosHomeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        Testimonio.objects.create(nombre="Ana", contenido="Muy bueno")
+    
+    def test_fragmentos_cacheados(self):
+        """Test que la segunda lectura no consulta la base de datos"""
+        obtener_fragmentos()
+        with self.assertNumQueries(0):
+            valores = obtener_fragmentos()
+        self.assertEqual(len(valores['testimonios']), 1)
+    
+    def test_invalidacion_por_modelo(self):
+        """Test que guardar un modelo solo recarga los fragmentos que dependen de él"""
+        obtener_fragmentos()
+        with self.captureOnCommitCallbacks(execute=True):
+            Testimonio.objects.create(nombre="Luis", contenido="Excelente")
+        
+        with self.assertNumQueries(1):
+            valores = obtener_fragmentos()
+        self.assertEqual(len(valores['testimonios']), 2)
+        
+        estadisticas = estadisticas_fragmentos()
+        self.assertEqual(estadisticas['testimonios'], {'aciertos': 0, 'fallos': 2})
+        self.assertEqual(estadisticas['banners'], {'aciertos': 1, 'fallos': 1})
+
+
+# ========== TESTS DE CACHÉ DE PÁGINAS ANÓNIMAS ==========
+
+class CachePaginasAnonimasTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+    
+    def test_segunda_visita_desde_cache(self):
+        """Test que la segunda visita anónima se sirve sin consultas"""
+        self.assertEqual(self.client.get('/')['X-Cache-Pagina'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertEqual(response['X-Cache-Pagina'], 'HIT')
+    
+    def test_purga_por_clave_sustituta(self):
+        """Test que guardar un objeto mostrado purga la página"""
+        self.client.get('/')
+        
+        # Un modelo que la página no muestra no la purga
+        Contacto.objects.create(nombre="Ana", email="ana@example.com", asunto="Hola", mensaje="Test")
+        self.assertEqual(self.client.get('/')['X-Cache-Pagina'], 'HIT')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Testimonio.objects.create(nombre="Luis", contenido="Texto nuevo del testimonio")
+        response = self.client.get('/')
+        self.assertEqual(response['X-Cache-Pagina'], 'MISS')
+        self.assertContains(response, "Texto nuevo del testimonio")
+    
+    def test_token_csrf_por_visitante(self):
+        """Test que cada visitante recibe su propio token CSRF"""
+        Client().get('/contacto/')
+        response = self.client.get('/contacto/')
+        self.assertEqual(response['X-Cache-Pagina'], 'HIT')
+        self.assertNotContains(response, MARCADOR_CSRF)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertIn('csrftoken', response.cookies)
+    
+    def test_contador_de_vistas_fuera_de_cache(self):
+        """Test que cada visita a una foto cuenta y no purga las páginas guardadas"""
+        foto = Fotografia.objects.create(
+            titulo="Atardecer",
+            imagen=SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg"),
+            categoria=CategoriaFotografia.objects.create(nombre="Paisajes"),
+        )
+        url = foto.get_absolute_url()
+        for _ in range(2):
+            self.assertFalse(self.client.get(url).has_header('X-Cache-Pagina'))
+        foto.refresh_from_db()
+        self.assertEqual(foto.vistas, 2)
+        
+        with patch('core.signals.purgar_claves') as purgar:
+            foto.incrementar_vistas()
+            purgar.assert_not_called()
+            foto.save()
+            purgar.assert_called()
+    
+    def test_purga_al_cambiar_categorias_de_post(self):
+        """Test que cambiar las categorías de un post purga el post y las categorías afectadas"""
+        autor = User.objects.create_user(username='autor', password='clave-segura')
+        post = Post.objects.create(
+            titulo="Festival", autor=autor, contenido="Test",
+            imagen_destacada=SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg"),
+        )
+        cultura = CategoriaBlog.objects.create(nombre="Cultura")
+        agenda = CategoriaBlog.objects.create(nombre="Agenda")
+        clave_post = clave_objeto(Post, post.pk)
+        
+        def purgadas(cambio):
+            with patch('core.signals.purgar_claves') as purgar:
+                with self.captureOnCommitCallbacks(execute=True):
+                    cambio()
+            # Ya y otra vez al confirmar
+            self.assertEqual(purgar.call_count, 2)
+            return purgar.call_args.args[0]
+        
+        claves = purgadas(lambda: post.categorias.add(cultura, agenda))
+        self.assertLessEqual({clave_post, clave_objeto(CategoriaBlog, cultura.pk),
+                              clave_objeto(CategoriaBlog, agenda.pk), clave_modelo(CategoriaBlog)}, claves)
+        claves = purgadas(lambda: cultura.posts.remove(post))
+        self.assertLessEqual({clave_post, clave_objeto(CategoriaBlog, cultura.pk)}, claves)
+        self.assertNotIn(clave_objeto(CategoriaBlog, agenda.pk), claves)
+        claves = purgadas(post.categorias.clear)
+        self.assertLessEqual({clave_post, clave_objeto(CategoriaBlog, agenda.pk)}, claves)
+    
+    def test_usuarios_autenticados_sin_cache(self):
+        """Test que las peticiones autenticadas no usan la caché"""
+        self.client.get('/')
+        User.objects.create_user(username='admin', password='clave-segura')
+        self.client.login(username='admin', password='clave-segura')
+        self.assertFalse(self.client.get('/').has_header('X-Cache-Pagina'))
+
+
+# ========== TESTS DE PAGINACIÓN COMBINADA ==========
+
+class ResultadosCombinadosTest(TestCase):
+    def setUp(self):
+        categoria = Categoria.objects.create(nombre="Parques")
+        for nombre in ["Alto", "Cueva", "Eco", "Gruta"]:
+            LugarTuristico.objects.create(
+                nombre=nombre, categoria=categoria, descripcion="Test", direccion="Test"
+            )
+        for nombre in ["Bosque", "Dique", "Finca"]:
+            Ruta.objects.create(
+                nombre=nombre, descripcion="Test", duracion_estimada="1 hora",
+                distancia=1, dificultad="facil"
+            )
+        self.resultados = ResultadosCombinados([
+            ('lugar', LugarTuristico.objects.all(), 'nombre', lambda o: o.nombre),
+            ('ruta', Ruta.objects.all(), 'nombre', lambda o: o.nombre),
+        ])
+    
+    def test_orden_combinado_por_paginas(self):
+        """Test que las páginas siguen el orden combinado de todos los tipos"""
+        paginator = Paginator(self.resultados, 3)
+        self.assertEqual(paginator.count, 7)
+        self.assertEqual(self.resultados.conteos(), {'lugar': 4, 'ruta': 3})
+        self.assertEqual(list(paginator.page(1)), ["Alto", "Bosque", "Cueva"])
+        self.assertEqual(list(paginator.page(2)), ["Dique", "Eco", "Finca"])
+        self.assertEqual(list(paginator.page(3)), ["Gruta"])
+    
+    def test_consultas_por_pagina(self):
+        """Test que una página usa una consulta de claves y una de objetos por tipo"""
+        self.resultados.conteos()
+        with self.assertNumQueries(4):
+            self.resultados[0:3]
+    
+    def test_mezcla_con_mayusculas_y_tildes(self):
+        """Test que la mezcla sigue el mismo orden que la base de datos con mayúsculas y tildes"""
+        LugarTuristico.objects.all().delete()
+        Ruta.objects.all().delete()
+        categoria = Categoria.objects.get(nombre="Parques")
+        for nombre in ["abeja", "Ñame", "Zeta"]:
+            LugarTuristico.objects.create(
+                nombre=nombre, categoria=categoria, descripcion="Test", direccion="Test"
+            )
+        for nombre in ["Árbol", "cima", "Bosque"]:
+            Ruta.objects.create(
+                nombre=nombre, descripcion="Test", duracion_estimada="1 hora",
+                distancia=1, dificultad="facil"
+            )
+        esperado = sorted(["abeja", "Ñame", "Zeta", "Árbol", "cima", "Bosque"])
+        self.assertEqual(self.resultados[0:6], esperado)
+        paginator = Paginator(self.resultados, 4)
+        self.assertEqual(list(paginator.page(1)) + list(paginator.page(2)), esperado)
+
+
+# ========== TESTS DE ANÁLISIS DE TEXTO ==========
+
+class AnalisisTextoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+    
+    def test_raices(self):
+        """Test que las variantes de una palabra comparten raíz"""
+        self.assertEqual({raiz(p) for p in ["cafe", "cafes", "cafeteria", "cafeterias"]}, {"caf"})
+        self.assertEqual(raiz("hoteles"), raiz("hotel"))
+        self.assertEqual(raiz("senderismo"), raiz("senderos"))
+        self.assertEqual(raiz("rio"), "rio")
+    
+    def test_palabras_vacias_y_tildes(self):
+        """Test que se quitan tildes y palabras vacías"""
+        self.assertEqual(analizar("La Cafetería de Garzón"), ["caf", "garzon"])
+    
+    def test_sinonimos_editables(self):
+        """Test que un grupo de sinónimos amplía la consulta al guardarse"""
+        self.assertEqual(analizar_consulta("caminata"), [("caminat",)])
+        GrupoSinonimos.objects.create(palabras="senderismo, caminata")
+        self.assertEqual(analizar_consulta("caminatas"), [("caminat", "sender")])
+
+
+# ========== TESTS DE CORRECCIÓN DE ERRORES DE ESCRITURA ==========
+
+class TrigramasTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categoria = Categoria.objects.create(nombre="Templos")
+        self.lugar = LugarTuristico.objects.create(
+            nombre="Catedral de Garzón", categoria=self.categoria,
+            descripcion="Test", direccion="Test"
+        )
+    
+    def test_distancia_edicion(self):
+        self.assertEqual(distancia_edicion("garzom", "garzon", 2), 1)
+        self.assertEqual(distancia_edicion("catedal", "catedral", 2), 1)
+        self.assertEqual(distancia_edicion("hotel", "garzon", 2), 3)
+    
+    def test_corregir_palabras(self):
+        """Test que se corrigen las palabras desconocidas y no las conocidas"""
+        self.assertEqual(corregir("catedal garzom"), "catedral garzon")
+        self.assertIsNone(corregir("garzon"))
+        self.assertIsNone(corregir("xyzzy"))
+    
+    def test_indice_incremental(self):
+        """Test que el índice incorpora nombres nuevos y olvida los eliminados"""
+        self.assertEqual(corregir("garzom"), "garzon")
+        LugarTuristico.objects.create(
+            nombre="Mirador Artesanías", categoria=self.categoria,
+            descripcion="Test", direccion="Test"
+        )
+        self.assertEqual(corregir("artesanis"), "artesanias")
+        
+        self.lugar.delete()
+        self.assertIsNone(corregir("garzom"))
+
+
+# ========== TESTS DE FRAGMENTOS RESALTADOS ==========
+
+class FragmentosResaltadosTest(TestCase):
+    def test_resalta_variantes_y_escapa(self):
+        """Test que se resaltan las variantes de la palabra y se escapa el HTML"""
+        fragmento = resaltar_fragmento("<p>Las mejores <b>Cafeterías</b> & cafés</p>", "cafe")
+        self.assertEqual(
+            fragmento, "Las mejores <mark>Cafeterías</mark> &amp; <mark>cafés</mark>"
+        )
+    
+    def test_recorta_alrededor_de_la_coincidencia(self):
+        """Test que el fragmento empieza cerca de la primera coincidencia"""
+        texto = "relleno " * 100 + "cascada escondida " + "relleno " * 100
+        fragmento = resaltar_fragmento(texto, "cascadas", longitud=80)
+        self.assertTrue(fragmento.startswith("..."))
+        self.assertTrue(fragmento.endswith("..."))
+        self.assertIn("<mark>cascada</mark>", fragmento)
+        self.assertLess(len(fragmento), 120)
+
+
+# ========== TESTS DE TELEMETRÍA DE BÚSQUEDAS ==========
+
+@override_settings(CORE_TELEMETRIA_LOTE=2, CORE_TELEMETRIA_INTERVALO=3600)
+class TelemetriaBusquedasTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        del telemetria._pendientes[:]
+        categoria = Categoria.objects.create(nombre="Parques")
+        LugarTuristico.objects.create(
+            nombre="Parque de Garzón", categoria=categoria,
+            descripcion="Test", direccion="Test"
+        )
+    
+    def test_escritura_por_lotes(self):
+        """Test que las búsquedas se insertan juntas al completar el lote"""
+        self.client.get(reverse('turismo:turismo_search'), {'q': 'Garzón'})
+        self.assertEqual(ConsultaBusqueda.objects.count(), 0)
+        
+        self.client.get(reverse('turismo:turismo_search'), {'q': 'inexistente'})
+        consultas = {c.consulta: c for c in ConsultaBusqueda.objects.all()}
+        self.assertEqual(set(consultas), {'garzon', 'inexistente'})
+        self.assertEqual(consultas['garzon'].total, 1)
+        self.assertEqual(consultas['garzon'].conteos, {'lugar': 1})
+        self.assertTrue(consultas['inexistente'].sin_resultados)
+    
+    def test_solo_la_primera_pagina(self):
+        """Test que recorrer las páginas de resultados no cuenta como búsquedas nuevas"""
+        url = reverse('turismo:turismo_search')
+        for pagina in ('', '1', '2', '3'):
+            self.client.get(url, {'q': 'garzon', 'page': pagina})
+        telemetria.vaciar()
+        self.assertEqual(ConsultaBusqueda.objects.count(), 2)
+    
+    def test_reporte_admin(self):
+        """Test que el listado del admin muestra las búsquedas sin resultados"""
+        self.client.get(reverse('turismo:turismo_search'), {'q': 'inexistente'})
+        telemetria.vaciar()
+        User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.login(username='admin', password='clave')
+        response = self.client.get(reverse('admin:core_consultabusqueda_changelist'))
+        self.assertEqual(len(response.context['consultas_sin_resultados']), 1)
+        self.assertContains(response, "inexistente")
+
+
+# ========== TESTS DEL ÍNDICE ESPACIAL ==========
+
+class IndiceEspacialTest(TestCase):
+    def setUp(self):
+        categoria = Categoria.objects.create(nombre="Parques")
+        coordenadas = {
+            "Parque Principal": (2.1964, -75.6278),   # centro de Garzón
+            "Catedral": (2.1975, -75.6290),           # a ~0,2 km
+            "Represa El Quimbo": (2.1260, -75.6850),  # a ~10 km
+            "Neiva": (2.9273, -75.2819),              # a ~90 km
+        }
+        self.lugares = {
+            nombre: LugarTuristico.objects.create(
+                nombre=nombre, categoria=categoria, descripcion="Test",
+                direccion="Test", latitud=lat, longitud=lng
+            )
+            for nombre, (lat, lng) in coordenadas.items()
+        }
+        LugarTuristico.objects.create(
+            nombre="Sin coordenadas", categoria=categoria,
+            descripcion="Test", direccion="Test"
+        )
+    
+    def test_codificar(self):
+        """Test del geohash de referencia y de los límites de su celda"""
+        self.assertEqual(codificar(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        sur, oeste, norte, este = decodificar('u4pruydqqvj')
+        self.assertTrue(sur <= 57.64911 <= norte and oeste <= 10.40744 <= este)
+        self.assertIsNone(codificar(None, 10.0))
+    
+    def test_polilinea(self):
+        """Test de la polilínea de referencia y de la simplificación por zoom"""
+        coordenadas = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        self.assertEqual(codificar_polilinea(coordenadas), '_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        self.assertEqual(decodificar_polilinea('_p~iF~ps|U_ulLnnqC_mqNvxq`@'), coordenadas)
+        
+        # Una recta con una desviación de unos 10 m en el punto del medio
+        linea = [(2.19 + i / 10000, -75.63) for i in range(101)]
+        linea[50] = (linea[50][0], -75.6299)
+        self.assertEqual(simplificar_linea(linea, 10), [linea[0], linea[-1]])
+        detallada = simplificar_linea(linea, 18)
+        self.assertIn(linea[50], detallada)
+        self.assertLess(len(detallada), 10)
+    
+    def test_teselas_linea(self):
+        """Test que una línea solo ocupa las teselas que atraviesa"""
+        # Horizontal a lo largo de dos teselas y diagonal sin pasar por la esquina opuesta
+        self.assertEqual(teselas_linea([(0.5, 0.1), (0.5, 2.0)], 8), {(128, 127), (129, 127)})
+        sur_oeste, norte_este = tesela(2.1950, -75.6300, 18), tesela(2.1980, -75.6250, 18)
+        diagonal = teselas_linea([(2.1950, -75.6300), (2.1980, -75.6250)], 18)
+        self.assertIn(sur_oeste, diagonal)
+        self.assertIn(norte_este, diagonal)
+        self.assertNotIn((sur_oeste[0], norte_este[1]), diagonal)
+        rectangulo = (norte_este[0] - sur_oeste[0] + 1) * (sur_oeste[1] - norte_este[1] + 1)
+        self.assertLess(len(diagonal), rectangulo)
+        self.assertEqual(teselas_linea([(2.1950, -75.6300)], 18), {sur_oeste})
+    
+    def test_geohash_al_guardar(self):
+        """Test que la celda se mantiene al crear y al mover un lugar"""
+        lugar = self.lugares["Catedral"]
+        self.assertEqual(lugar.geohash, codificar(2.1975, -75.6290))
+        self.assertEqual(LugarTuristico.objects.get(nombre="Sin coordenadas").geohash, '')
+        
+        lugar.latitud, lugar.longitud = 2.9273, -75.2819
+        lugar.save(update_fields=['latitud', 'longitud'])
+        lugar.refresh_from_db()
+        self.assertEqual(lugar.geohash, codificar(2.9273, -75.2819))
+    
+    def test_radio(self):
+        """Test de la búsqueda por radio con distancias"""
+        cercanos = filtrar_radio(LugarTuristico.objects.all(), 2.1964, -75.6278, 12).order_by('distancia')
+        self.assertIn('geohash', str(cercanos.query))
+        self.assertEqual(
+            [lugar.nombre for lugar in cercanos],
+            ["Parque Principal", "Catedral", "Represa El Quimbo"]
+        )
+        self.assertAlmostEqual(cercanos[1].distancia, 0.18, places=1)
+        
+        self.assertEqual(filtrar_radio(LugarTuristico.objects.all(), 2.1964, -75.6278, 1).count(), 2)
+    
+    def test_rectangulo(self):
+        """Test de la búsqueda por rectángulo"""
+        lugares = filtrar_rectangulo(LugarTuristico.objects.all(), 2.0, -76.0, 2.5, -75.5)
+        self.assertEqual(lugares.count(), 3)
+    
+    def test_comando_rellena_geohash(self):
+        """Test que el comando recalcula las celdas de filas sin índice"""
+        LugarTuristico.objects.update(geohash='')
+        call_command('rebuild_spatial_index', 'turismo.lugarturistico', stdout=StringIO())
+        self.assertEqual(
+            LugarTuristico.objects.get(nombre="Neiva").geohash,
+            codificar(2.9273, -75.2819)
+        )
+        self.assertEqual(LugarTuristico.objects.get(nombre="Sin coordenadas").geohash, '')
 
-# Create your tests here.
@@ -0,0 +1,175 @@
+# core/trigramas.py
+# Corrección de errores de escritura con un índice de trigramas sobre las
+# palabras de los nombres de los documentos de búsqueda (core/busqueda.py)
+
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .busqueda import AMBITO_DOCUMENTOS
+from .cache import obtener_generacion
+from .models import DocumentoBusqueda
+from .resultados import nombre_generacion
+from .utils import extraer_terminos
+
+# Las palabras más cortas no se corrigen
+LONGITUD_MINIMA = 3
+
+# Margen al leer los documentos modificados, por diferencias de reloj
+# entre los servidores y la base de datos
+MARGEN_ACTUALIZACION = timedelta(seconds=5)
+
+
+def get_distancia_maxima():
+    """Número máximo de ediciones entre lo escrito y la palabra corregida"""
+    return getattr(settings, 'CORE_BUSQUEDA_DISTANCIA_MAXIMA', 2)
+
+
+def trigramas(palabra):
+    relleno = f'${palabra}$'
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def distancia_edicion(a, b, maximo):
+    """Distancia de Levenshtein entre a y b, o maximo + 1 si la supera"""
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior = list(range(len(b) + 1))
+    for i, letra_a in enumerate(a, 1):
+        actual = [i]
+        for j, letra_b in enumerate(b, 1):
+            actual.append(min(
+                anterior[j] + 1,
+                actual[j - 1] + 1,
+                anterior[j - 1] + (letra_a != letra_b),
+            ))
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior = actual
+    return anterior[-1]
+
+
+# ========== ÍNDICE ==========
+
+class IndiceTrigramas:
+    """
+    Vocabulario de palabras de los nombres con listas de trigramas -> palabras.
+    Cada palabra se guarda una vez con el número de documentos que la usan;
+    cuando ese número llega a cero queda inactiva en lugar de borrarse de las
+    listas, así que agregar y quitar documentos no recorre el índice.
+    """
+
+    def __init__(self):
+        self.palabras = []           # id -> palabra
+        self.ids = {}                # palabra -> id
+        self.frecuencias = []        # id -> documentos que la usan
+        self.listas = {}             # trigrama -> [ids]
+        self.documentos = {}         # pk del documento -> ids de sus palabras
+
+    def _id_palabra(self, palabra):
+        if palabra not in self.ids:
+            self.ids[palabra] = len(self.palabras)
+            self.palabras.append(palabra)
+            self.frecuencias.append(0)
+            for trigrama in trigramas(palabra):
+                self.listas.setdefault(trigrama, []).append(self.ids[palabra])
+        return self.ids[palabra]
+
+    def agregar(self, pk, nombre):
+        self.quitar(pk)
+        ids = {
+            self._id_palabra(palabra) for palabra in extraer_terminos(nombre)
+            if len(palabra) >= LONGITUD_MINIMA and palabra.isalpha()
+        }
+        for id_palabra in ids:
+            self.frecuencias[id_palabra] += 1
+        self.documentos[pk] = ids
+
+    def quitar(self, pk):
+        for id_palabra in self.documentos.pop(pk, ()):
+            self.frecuencias[id_palabra] -= 1
+
+    def contiene(self, palabra):
+        id_palabra = self.ids.get(palabra)
+        return id_palabra is not None and self.frecuencias[id_palabra] > 0
+
+    def similares(self, palabra, maximo):
+        """Palabras activas a `maximo` ediciones o menos, las más cercanas y usadas primero"""
+        propios = trigramas(palabra)
+        # Cada edición cambia como mucho tres trigramas
+        minimo_comunes = max(1, len(propios) - 3 * maximo)
+
+        comunes = {}
+        for trigrama in propios:
+            for id_palabra in self.listas.get(trigrama, ()):
+                comunes[id_palabra] = comunes.get(id_palabra, 0) + 1
+
+        candidatas = []
+        for id_palabra, total in comunes.items():
+            if total < minimo_comunes or not self.frecuencias[id_palabra]:
+                continue
+            distancia = distancia_edicion(palabra, self.palabras[id_palabra], maximo)
+            if distancia <= maximo:
+                candidatas.append((distancia, -self.frecuencias[id_palabra], self.palabras[id_palabra]))
+        return [candidata for _, _, candidata in sorted(candidatas)]
+
+
+# Índice del proceso: se carga completo una vez y después solo se aplican
+# los documentos modificados o eliminados desde la última lectura
+_estado = {'indice': None, 'generacion': None, 'desde': None}
+_bloqueo = threading.Lock()
+
+
+def obtener_indice():
+    """Retorna el índice del proceso, al día con la generación de los documentos"""
+    generacion = obtener_generacion(nombre_generacion(AMBITO_DOCUMENTOS))
+    if _estado['indice'] is not None and _estado['generacion'] == generacion:
+        return _estado['indice']
+
+    with _bloqueo:
+        if _estado['generacion'] != generacion:
+            _actualizar(generacion)
+    return _estado['indice']
+
+
+def _actualizar(generacion):
+    inicio = timezone.now()
+    documentos = DocumentoBusqueda.objects.order_by()
+    if _estado['indice'] is None:
+        indice = IndiceTrigramas()
+        for pk, nombre in documentos.values_list('pk', 'nombre').iterator(chunk_size=2000):
+            indice.agregar(pk, nombre)
+    else:
+        indice = _estado['indice']
+        modificados = documentos.filter(actualizado__gte=_estado['desde'] - MARGEN_ACTUALIZACION)
+        for pk, nombre in modificados.values_list('pk', 'nombre'):
+            indice.agregar(pk, nombre)
+        existentes = set(documentos.values_list('pk', flat=True))
+        for pk in set(indice.documentos) - existentes:
+            indice.quitar(pk)
+
+    _estado.update(indice=indice, generacion=generacion, desde=inicio)
+
+
+def corregir(texto):
+    """
+    Retorna el texto con las palabras desconocidas cambiadas por la más
+    parecida del vocabulario ("garzom" -> "garzon"), o None si no hay nada
+    que corregir.
+    """
+    indice = obtener_indice()
+    maximo = get_distancia_maxima()
+    cambios = False
+    palabras = []
+    for palabra in extraer_terminos(texto):
+        if len(palabra) >= LONGITUD_MINIMA and palabra.isalpha() and not indice.contiene(palabra):
+            # En palabras cortas una sola edición ya cambia demasiado
+            limite = 1 if len(palabra) <= 5 else maximo
+            similares = indice.similares(palabra, limite)
+            if similares:
+                palabra = similares[0]
+                cambios = True
+        palabras.append(palabra)
+    return ' '.join(palabras) if cambios else None
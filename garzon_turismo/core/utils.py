@@ -1,6 +1,9 @@
 # core/utils.py
 
 import os
+import re
+import unicodedata
+from collections.abc import Mapping
 from django.utils.text import slugify
 from django.utils import timezone
 
@@ -41,4 +44,42 @@ def get_client_ip(request):
         ip = x_forwarded_for.split(',')[0]
     else:
         ip = request.META.get('REMOTE_ADDR')
-    return ip
\ No newline at end of file
+    return ip
+
+def normalizar_texto(texto):
+    """
+    Pasa un texto a minúsculas, quita tildes, diéresis y virgulillas y
+    colapsa los espacios: "  Café en  Garzón" -> "cafe en garzon"
+    """
+    texto = unicodedata.normalize('NFD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.split())
+
+def extraer_terminos(texto):
+    """Retorna la lista de palabras normalizadas de un texto"""
+    return re.findall(r'\w+', normalizar_texto(texto))
+
+class DiccionarioPerezoso(Mapping):
+    """
+    Diccionario de solo lectura cuyos valores se calculan la primera vez
+    que se leen. `cargar(clave)` retorna un diccionario con el valor de la
+    clave pedida y, opcionalmente, de otras claves que se obtienen con la
+    misma consulta; todos quedan memorizados.
+    """
+    def __init__(self, claves, cargar):
+        self._claves = list(claves)
+        self._cargar = cargar
+        self._valores = {}
+    
+    def __getitem__(self, clave):
+        if clave not in self._valores:
+            if clave not in self._claves:
+                raise KeyError(clave)
+            self._valores.update(self._cargar(clave))
+        return self._valores[clave]
+    
+    def __iter__(self):
+        return iter(self._claves)
+    
+    def __len__(self):
+        return len(self._claves)
@@ -2,9 +2,13 @@
 
 from django.views.generic import TemplateView, DetailView, ListView
 from django.shortcuts import get_object_or_404, render
-from .models import PaginaEstatica, Testimonio, Banner, ConfiguracionSitio
-from turismo.models import LugarTuristico, Evento, Establecimiento, Ruta
-from blog.models import Post
+from .models import PaginaEstatica
+from .cache import get_configuracion
+from .fragmentos import obtener_fragmentos, claves_sustitutas as claves_sustitutas_fragmentos
+from .paginas import agregar_claves_sustitutas
+from turismo.marcadores import (
+    obtener_marcadores_json, claves_sustitutas as claves_sustitutas_marcadores
+)
 
 class HomeView(TemplateView):
     template_name = 'core/home.html'
@@ -14,62 +18,18 @@ class HomeView(TemplateView):
         
         # Configuración del sitio
         try:
-            context['config'] = ConfiguracionSitio.objects.first()
+            context['config'] = get_configuracion()
         except:
             pass
         
-        # Banners activos
-        context['banners'] = Banner.objects.filter(activo=True).order_by('orden')
+        # Secciones de la página (banners, destacados, posts...):
+        # cada una se cachea por separado, ver core/fragmentos.py
+        context.update(obtener_fragmentos())
+        agregar_claves_sustitutas(self.request, *claves_sustitutas_fragmentos())
         
-        # Lugares turísticos destacados
-        context['lugares_destacados'] = LugarTuristico.objects.filter(
-            destacado=True
-        )[:6]
-        
-        # Eventos próximos
-        from django.utils import timezone
-        context['eventos_proximos'] = Evento.objects.filter(
-            fecha_inicio__gte=timezone.now(),
-            destacado=True
-        ).order_by('fecha_inicio')[:3]
-        
-        # Establecimientos destacados
-        context['establecimientos_destacados'] = Establecimiento.objects.filter(
-            destacado=True
-        )[:4]
-        
-        # Posts recientes
-        context['posts_recientes'] = Post.objects.filter(
-            publicado=True
-        ).order_by('-fecha_publicacion')[:3]
-        
-        # Rutas destacadas
-        context['rutas'] = Ruta.objects.all()[:2]
-        
-        # Testimonios
-        context['testimonios'] = Testimonio.objects.filter(activo=True)
-        
-        # Datos para mapa
-        lugares_mapa = LugarTuristico.objects.filter(
-            latitud__isnull=False, 
-            longitud__isnull=False
-        )[:20]  # Limitar a 20 para no sobrecargar el mapa inicial
-        
-        # Preparar datos de marcadores para el mapa
-        import json
-        marcadores = []
-        
-        for lugar in lugares_mapa:
-            marcadores.append({
-                'nombre': lugar.nombre,
-                'latitud': lugar.latitud,
-                'longitud': lugar.longitud,
-                'categoria': lugar.categoria.nombre,
-                'imagen': lugar.imagen_principal.url if lugar.imagen_principal else '',
-                'url': lugar.get_absolute_url()
-            })
-        
-        context['marcadores_json'] = json.dumps(marcadores)
+        # Marcadores del mapa, compartidos con los mapas de turismo
+        context['marcadores_json'] = obtener_marcadores_json('home')
+        agregar_claves_sustitutas(self.request, *claves_sustitutas_marcadores('home'))
         
         return context
 
@@ -86,7 +46,7 @@ class TerminosCondicionesView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        config = ConfiguracionSitio.objects.first()
+        config = get_configuracion()
         if config:
             context['terminos_texto'] = config.texto_terminos
         return context
@@ -96,7 +56,7 @@ class PoliticaPrivacidadView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        config = ConfiguracionSitio.objects.first()
+        config = get_configuracion()
         if config:
             context['privacidad_texto'] = config.texto_privacidad
         return context
@@ -56,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.CachePaginasAnonimasMiddleware',
 ]
 
 ROOT_URLCONF = 'garzon_turismo.urls'
@@ -70,6 +71,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.configuracion_sitio',
                 'turismo.context_processors.contadores_turismo',
             ],
         },
@@ -94,6 +96,94 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# En producción con varios workers usar un backend compartido (Redis/Memcached)
+# para que las invalidaciones lleguen a todos los procesos.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'garzon-turismo',
+    },
+    # Teselas GeoJSON de los mapas (turismo/teselas.py): en disco para que
+    # las comparta todo el servidor; al superar MAX_ENTRIES se descarta
+    # 1/CULL_FREQUENCY de los archivos
+    'teselas': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'teselas'),
+        'TIMEOUT': None,  # Se invalidan por señales
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 4},
+    },
+}
+
+# Contadores de turismo (turismo/contadores.py)
+TURISMO_CONTADORES_TIMEOUT = None  # Se invalidan por señales
+TURISMO_CONTADORES_EVENTOS_TTL = 300
+# Leer los contadores de la tabla ContadorTurismo (mantenida por señales)
+# en lugar de recalcularlos; ejecutar antes `manage.py reconcile_contadores`
+TURISMO_CONTADORES_DESNORMALIZADOS = False
+
+# Listas de lugares y establecimientos cercanos (turismo/cercanias.py);
+# se rellenan con `manage.py rebuild_cercanias` (después de rebuild_spatial_index)
+TURISMO_CERCANOS_RADIO_KM = 50
+
+# Pirámide de grupos de marcadores de los mapas (turismo/piramide.py);
+# se rellena con `manage.py rebuild_piramide_mapa`
+TURISMO_MAPA_CELDA_PX = 60  # Marcadores a menos de esta distancia en pantalla se agrupan
+TURISMO_MAPA_NIVELES = (8, 18)  # Zooms precalculados; con más zoom no se agrupa
+
+# Polilíneas simplificadas de las rutas (turismo/rutas.py); se guardan en
+# cada ruta al cambiar sus puntos (`manage.py rebuild_resumen_rutas`)
+TURISMO_RUTAS_ZOOMS_SIMPLIFICADOS = (10, 13, 16)
+TURISMO_RUTAS_TOLERANCIA_PX = 1.0  # Desviación máxima en pantalla
+# Comparación de rutas en un mapa (api/rutas/comparar/)
+TURISMO_RUTAS_MAX_COMPARAR = 20
+TURISMO_RUTAS_COMPARACION_TIMEOUT = 300  # Se invalidan por señales
+
+# Teselas GeoJSON z/x/y de los mapas (turismo/teselas.py)
+TURISMO_TESELAS_CACHE = 'teselas'  # Alias de CACHES
+TURISMO_TESELAS_ZOOM_CACHE = 18  # Las teselas de más zoom no se guardan
+TURISMO_TESELAS_MAX_AGE = 300  # Cache-Control para el navegador y la CDN
+
+
+# Fragmentos de la página principal (core/fragmentos.py)
+CORE_FRAGMENTOS_CACHE = 'default'  # Alias de CACHES
+CORE_FRAGMENTOS_TIMEOUT = 3600
+
+# Caché de páginas completas para visitantes anónimos (core/middleware.py)
+CORE_CACHE_PAGINAS_TIMEOUT = 300
+CORE_CACHE_PAGINAS_APPS = ['core', 'turismo', 'blog']  # Sus cambios purgan páginas
+CORE_CACHE_PAGINAS_EXCLUIR = [
+    '/admin/',
+    '/turismo/admin/',
+    '/turismo/api/',
+    # Los resultados de búsqueda no se etiquetan por objeto
+    '/turismo/buscar/',
+    '/blog/buscar/',
+    # Cuentan cada visita (Fotografia.incrementar_vistas)
+    '/turismo/galeria/foto/',
+]
+# Contadores que un guardado con update_fields puede cambiar sin purgar páginas
+CORE_CACHE_PAGINAS_CAMPOS_CONTADORES = {'turismo.fotografia': ['vistas']}
+
+# Relevancia de la búsqueda de texto completo (core/busqueda.py)
+CORE_BUSQUEDA_PESOS = {'nombre': 3.0, 'texto': 1.0}
+CORE_BUSQUEDA_BONO_DESTACADO = 0.5  # +50 % para los documentos destacados
+CORE_BUSQUEDA_BONOS_RECENCIA = [(30, 0.5), (365, 0.2)]  # (días, bonificación)
+# Resultados guardados por consulta normalizada (core/resultados.py)
+CORE_BUSQUEDA_RESULTADOS_TIMEOUT = 900
+CORE_BUSQUEDA_PAGINAS_GUARDADAS = 10  # Las páginas siguientes se consultan con LIMIT/OFFSET
+# Ediciones permitidas al corregir palabras mal escritas (core/trigramas.py)
+CORE_BUSQUEDA_DISTANCIA_MAXIMA = 2
+
+# Telemetría de búsquedas (core/telemetria.py): se escribe por lotes al
+# terminar las peticiones
+CORE_TELEMETRIA_ACTIVA = True
+CORE_TELEMETRIA_LOTE = 50
+CORE_TELEMETRIA_INTERVALO = 30  # Segundos
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
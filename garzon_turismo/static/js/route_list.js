@@ -177,6 +177,16 @@ document.addEventListener('DOMContentLoaded', function() {
         observer.observe(statsContainer);
     }
     
+    // ========== MINIMAPAS DE LAS RUTAS ==========
+    // La línea llega como polilínea codificada y simplificada (data-polilinea)
+    document.querySelectorAll('.route-preview-map[data-polilinea]').forEach(preview => {
+        const puntos = decodePolyline(preview.dataset.polilinea);
+        if (puntos.length > 1) {
+            preview.innerHTML = '';
+            preview.appendChild(createRouteSvg(puntos, preview.dataset.color || '#5DAD47'));
+        }
+    });
+    
     // ========== SMOOTH SCROLL PARA NAVEGACIÓN ==========
     document.querySelectorAll('a[href^="#"]').forEach(anchor => {
         anchor.addEventListener('click', function (e) {
@@ -194,6 +204,65 @@ document.addEventListener('DOMContentLoaded', function() {
 
 // ========== FUNCIONES AUXILIARES ==========
 
+/**
+ * Decodificar una polilínea codificada (algoritmo de Google, precisión 5)
+ */
+function decodePolyline(encoded) {
+    const puntos = [];
+    let index = 0, lat = 0, lng = 0;
+    
+    while (index < encoded.length) {
+        const deltas = [];
+        for (let i = 0; i < 2; i++) {
+            let result = 0, shift = 0, byte;
+            do {
+                byte = encoded.charCodeAt(index++) - 63;
+                result |= (byte & 0x1f) << shift;
+                shift += 5;
+            } while (byte >= 0x20);
+            deltas.push(result & 1 ? ~(result >> 1) : result >> 1);
+        }
+        lat += deltas[0];
+        lng += deltas[1];
+        puntos.push([lat / 1e5, lng / 1e5]);
+    }
+    return puntos;
+}
+
+/**
+ * Crear un SVG con la línea de una ruta ajustada a su recuadro
+ */
+function createRouteSvg(puntos, color) {
+    const size = 100, margin = 8;
+    const lats = puntos.map(p => p[0]);
+    const lngs = puntos.map(p => p[1]);
+    const minLat = Math.min(...lats), maxLat = Math.max(...lats);
+    const minLng = Math.min(...lngs), maxLng = Math.max(...lngs);
+    const scale = (size - 2 * margin) / Math.max(maxLat - minLat, maxLng - minLng, 1e-9);
+    
+    const coords = puntos.map(([lat, lng]) => {
+        const x = margin + (lng - minLng) * scale;
+        const y = size - margin - (lat - minLat) * scale;
+        return `${x.toFixed(1)},${y.toFixed(1)}`;
+    });
+    
+    const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+    svg.setAttribute('viewBox', `0 0 ${size} ${size}`);
+    svg.setAttribute('width', '100%');
+    svg.setAttribute('height', '100%');
+    svg.setAttribute('role', 'img');
+    
+    const line = document.createElementNS('http://www.w3.org/2000/svg', 'polyline');
+    line.setAttribute('points', coords.join(' '));
+    line.setAttribute('fill', 'none');
+    line.setAttribute('stroke', color);
+    line.setAttribute('stroke-width', '3');
+    line.setAttribute('stroke-linejoin', 'round');
+    line.setAttribute('stroke-linecap', 'round');
+    svg.appendChild(line);
+    return svg;
+}
+
 /**
  * Crear efecto de corazón animado
  */
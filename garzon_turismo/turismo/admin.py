@@ -17,8 +17,11 @@ from .models import (
     # Modelos de actividades físicas
     CategoriaActividadFisica, ActividadFisica, ImagenActividadFisica,
     # Modelos de galería fotográfica
-    CategoriaFotografia, Fotografia, TagFotografia, FotografiaTag
+    CategoriaFotografia, Fotografia, TagFotografia, FotografiaTag,
+    # Contadores desnormalizados
+    ContadorTurismo
 )
+from . import rutas
 
 # ==========================================
 # WIDGETS PERSONALIZADOS
@@ -216,6 +219,11 @@ class RutaAdmin(admin.ModelAdmin):
             return format_html('<a href="{}" target="_blank">{}</a>', url, url)
         return "Guarda primero para ver la URL"
     url_absoluta.short_description = "URL de la ruta"
+    
+    def save_related(self, request, form, formsets, change):
+        # Los puntos del inline se guardan uno a uno: la ruta se recalcula una vez
+        with rutas.resumenes_diferidos():
+            super().save_related(request, form, formsets, change)
 
 @admin.register(Establecimiento)
 class EstablecimientoAdmin(admin.ModelAdmin):
@@ -688,6 +696,22 @@ class FotografiaAdmin(admin.ModelAdmin):
         )
     desactivar_fotografias.short_description = "Desactivar fotografías"
 
+# ==========================================
+# CONTADORES DESNORMALIZADOS
+# ==========================================
+
+@admin.register(ContadorTurismo)
+class ContadorTurismoAdmin(admin.ModelAdmin):
+    """Solo lectura: los valores se mantienen por señales y con reconcile_contadores"""
+    list_display = ('clave', 'valor')
+    search_fields = ('clave',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # ==========================================
 # CONFIGURACIÓN GLOBAL DEL ADMIN
 # ==========================================
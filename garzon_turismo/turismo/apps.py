@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TurismoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'turismo'
+
+    def ready(self):
+        # Registrar las señales de invalidación de cachés
+        from . import signals  # noqa: F401
+        # Registrar los documentos del índice de búsqueda
+        from . import busqueda  # noqa: F401
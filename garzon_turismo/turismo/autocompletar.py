@@ -0,0 +1,285 @@
+# turismo/autocompletar.py
+# Índice en memoria para la búsqueda rápida del encabezado (api_busqueda_rapida)
+
+import copy
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import cache
+
+from core.cache import incrementar_generacion, obtener_generaciones, obtener_local
+from core.utils import extraer_terminos
+from .models import (
+    LugarTuristico, Categoria, Transporte, Artesania, CategoriaArtesania,
+    ActividadFisica, CategoriaActividadFisica, Establecimiento, Evento
+)
+
+# Prefijo de las generaciones (una por grupo) en core/cache.py
+PREFIJO_GENERACION = 'autocompletar'
+
+# Consultas cuyo resultado recuerda cada índice (se vacía al llenarse)
+MAX_CONSULTAS_RECORDADAS = 1000
+
+# Registro de cambios por grupo: cada generación anota el pk del objeto que
+# cambió (o TODO_EL_GRUPO), para que los procesos actualicen solo esa entrada
+PREFIJO_CAMBIO = 'autocompletar:cambio'
+TODO_EL_GRUPO = '*'
+TIMEOUT_CAMBIOS = 3600
+
+# Con más cambios pendientes que estos se recarga el grupo completo
+MAX_CAMBIOS_INCREMENTALES = 100
+
+
+# ========== DATOS DE CADA GRUPO ==========
+# Cada grupo retorna ternas (pk, datos para la respuesta JSON, textos
+# indexados), de todos los objetos o solo de los `pks` indicados.
+# Se indexan los nombres y términos clave, no las descripciones largas.
+
+def _filtrar(queryset, pks):
+    return queryset if pks is None else queryset.filter(pk__in=pks)
+
+
+def _lugares(pks=None):
+    for lugar in _filtrar(LugarTuristico.objects.select_related('categoria'), pks):
+        yield lugar.pk, {
+            'nombre': lugar.nombre,
+            'descripcion': lugar.descripcion,
+            'url': lugar.get_absolute_url(),
+            'categoria': lugar.categoria.nombre
+        }, [lugar.nombre, lugar.categoria.nombre]
+
+
+def _transportes(pks=None):
+    for transporte in _filtrar(Transporte.objects.filter(disponible=True), pks):
+        yield transporte.pk, {
+            'nombre': transporte.nombre,
+            'origen': transporte.origen,
+            'destino': transporte.destino,
+            'url': transporte.get_absolute_url(),
+            'tipo': transporte.get_tipo_display()
+        }, [transporte.nombre, transporte.origen, transporte.destino]
+
+
+def _artesanias(pks=None):
+    artesanias = Artesania.objects.filter(disponible_venta=True).select_related('categoria')
+    for artesania in _filtrar(artesanias, pks):
+        yield artesania.pk, {
+            'nombre': artesania.nombre,
+            'artesano': artesania.artesano,
+            'lugar_origen': artesania.lugar_origen,
+            'url': artesania.get_absolute_url(),
+            'categoria': artesania.categoria.nombre
+        }, [artesania.nombre, artesania.artesano, artesania.lugar_origen, artesania.categoria.nombre]
+
+
+def _actividades(pks=None):
+    actividades = ActividadFisica.objects.filter(disponible=True).select_related('categoria')
+    for actividad in _filtrar(actividades, pks):
+        yield actividad.pk, {
+            'nombre': actividad.nombre,
+            'ubicacion': actividad.ubicacion,
+            'dificultad': actividad.get_dificultad_display(),
+            'url': actividad.get_absolute_url(),
+            'categoria': actividad.categoria.nombre
+        }, [actividad.nombre, actividad.ubicacion, actividad.instructor_guia, actividad.categoria.nombre]
+
+
+def _establecimientos(pks=None):
+    for establecimiento in _filtrar(Establecimiento.objects.all(), pks):
+        yield establecimiento.pk, {
+            'nombre': establecimiento.nombre,
+            'tipo': establecimiento.get_tipo_display(),
+            'direccion': establecimiento.direccion,
+            'url': establecimiento.get_absolute_url()
+        }, [establecimiento.nombre, establecimiento.get_tipo_display()]
+
+
+def _eventos(pks=None):
+    for evento in _filtrar(Evento.objects.all(), pks):
+        yield evento.pk, {
+            'nombre': evento.titulo,
+            'fecha': evento.fecha_inicio.strftime('%d/%m/%Y'),
+            'lugar': evento.lugar,
+            'url': evento.get_absolute_url()
+        }, [evento.titulo, evento.lugar]
+
+
+# Grupo de la respuesta -> (cargar, límite de resultados, modelos de los que
+# depende). El primer modelo es el de las entradas: su cambio actualiza solo
+# la entrada del objeto; el de los demás (categorías) recarga el grupo.
+GRUPOS_AUTOCOMPLETAR = {
+    'lugares': (_lugares, 3, [LugarTuristico, Categoria]),
+    'transportes': (_transportes, 3, [Transporte]),
+    'artesanias': (_artesanias, 3, [Artesania, CategoriaArtesania]),
+    'actividades': (_actividades, 3, [ActividadFisica, CategoriaActividadFisica]),
+    'establecimientos': (_establecimientos, 2, [Establecimiento]),
+    'eventos': (_eventos, 2, [Evento]),
+}
+
+# Modelo -> grupos que hay que recargar cuando cambia
+DEPENDENCIAS_AUTOCOMPLETAR = {}
+for _grupo, (_, _, _modelos) in GRUPOS_AUTOCOMPLETAR.items():
+    for _modelo in _modelos:
+        DEPENDENCIAS_AUTOCOMPLETAR.setdefault(_modelo, []).append(_grupo)
+
+
+def nombre_generacion(grupo):
+    return f'{PREFIJO_GENERACION}:{grupo}'
+
+
+def clave_cambio(grupo, generacion):
+    return f'{PREFIJO_CAMBIO}:{grupo}:{generacion}'
+
+
+def registrar_cambio(grupo, pk=TODO_EL_GRUPO):
+    """Marca el grupo como modificado y anota qué objeto cambió"""
+    generacion = incrementar_generacion(nombre_generacion(grupo))
+    cache.set(clave_cambio(grupo, generacion), pk, TIMEOUT_CAMBIOS)
+
+
+# ========== ÍNDICE DE PREFIJOS ==========
+
+class IndicePrefijos:
+    """
+    Lista ordenada de términos normalizados (sin tildes, en minúsculas) que
+    apuntan a sus entradas; un prefijo se resuelve con búsqueda binaria.
+    Recuerda los resultados por consulta normalizada: el índice se reemplaza
+    (por una copia con las entradas modificadas, o recargado) cuando cambia
+    la generación de su grupo, y con él esos resultados.
+    """
+    def __init__(self, elementos):
+        self.consultas = {}
+        self.entradas = []
+        self.posicion_por_pk = {}
+        pares = []
+        for pk, datos, textos in elementos:
+            posicion = len(self.entradas)
+            self.entradas.append(None)
+            self.posicion_por_pk[pk] = posicion
+            pares.extend((termino, posicion) for termino in self._guardar(posicion, datos, textos))
+        pares.sort()
+        self.terminos = [termino for termino, _ in pares]
+        self.posiciones = [posicion for _, posicion in pares]
+
+    def _guardar(self, posicion, datos, textos):
+        terminos = set(extraer_terminos(' '.join(t for t in textos if t)))
+        self.entradas[posicion] = (datos, terminos)
+        return terminos
+
+    def _rango(self, termino):
+        return bisect_left(self.terminos, termino), bisect_right(self.terminos, termino)
+
+    def _quitar(self, posicion):
+        for termino in self.entradas[posicion][1]:
+            inicio, fin = self._rango(termino)
+            i = bisect_left(self.posiciones, posicion, inicio, fin)
+            del self.terminos[i]
+            del self.posiciones[i]
+        self.entradas[posicion] = None
+
+    def _insertar(self, posicion, datos, textos):
+        for termino in self._guardar(posicion, datos, textos):
+            inicio, fin = self._rango(termino)
+            i = bisect_left(self.posiciones, posicion, inicio, fin)
+            self.terminos.insert(i, termino)
+            self.posiciones.insert(i, posicion)
+
+    def con_cambios(self, pks, elementos):
+        """
+        Copia del índice con las entradas de `pks` reemplazadas por
+        `elementos` (las que no aparecen en ellos se quitan). Una entrada
+        actualizada conserva su lugar; las nuevas van al final. El índice
+        original no se modifica: otras peticiones pueden estar leyéndolo.
+        """
+        nuevo = copy.copy(self)
+        nuevo.consultas = {}
+        nuevo.entradas = list(self.entradas)
+        nuevo.posicion_por_pk = dict(self.posicion_por_pk)
+        nuevo.terminos = list(self.terminos)
+        nuevo.posiciones = list(self.posiciones)
+
+        for pk in pks:
+            posicion = nuevo.posicion_por_pk.get(pk)
+            if posicion is not None:
+                nuevo._quitar(posicion)
+        vigentes = set()
+        for pk, datos, textos in elementos:
+            vigentes.add(pk)
+            posicion = nuevo.posicion_por_pk.get(pk)
+            if posicion is None:
+                posicion = nuevo.posicion_por_pk[pk] = len(nuevo.entradas)
+                nuevo.entradas.append(None)
+            nuevo._insertar(posicion, datos, textos)
+        for pk in set(pks) - vigentes:
+            nuevo.posicion_por_pk.pop(pk, None)
+        return nuevo
+
+    def _con_prefijo(self, prefijo):
+        inicio = bisect_left(self.terminos, prefijo)
+        fin = bisect_left(self.terminos, prefijo + '\uffff')
+        return set(self.posiciones[inicio:fin])
+
+    def buscar(self, terminos, limite):
+        """Entradas con algún término que empiece por cada término buscado"""
+        if not terminos:
+            return []
+        clave = (tuple(terminos), limite)
+        if clave not in self.consultas:
+            if len(self.consultas) >= MAX_CONSULTAS_RECORDADAS:
+                self.consultas.clear()
+            self.consultas[clave] = self._buscar(terminos, limite)
+        return self.consultas[clave]
+
+    def _buscar(self, terminos, limite):
+        # Se parte del término más largo, que suele ser el más selectivo
+        terminos = sorted(terminos, key=len, reverse=True)
+        candidatos = sorted(self._con_prefijo(terminos[0]))
+        resultados = []
+        for posicion in candidatos:
+            datos, propios = self.entradas[posicion]
+            if all(any(p.startswith(t) for p in propios) for t in terminos[1:]):
+                resultados.append(datos)
+                if len(resultados) >= limite:
+                    break
+        return resultados
+
+
+def _actualizar_indice(grupo, indice, desde, hasta):
+    """
+    Aplica al índice los cambios registrados entre dos generaciones leyendo
+    solo esos objetos; None (recarga completa) si falta alguno en el
+    registro, si cambió una categoría o si son demasiados
+    """
+    if hasta - desde > MAX_CAMBIOS_INCREMENTALES:
+        return None
+    claves = [clave_cambio(grupo, generacion) for generacion in range(desde + 1, hasta + 1)]
+    cambios = cache.get_many(claves)
+    if len(cambios) < len(claves) or TODO_EL_GRUPO in cambios.values():
+        return None
+    pks = set(cambios.values())
+    cargar = GRUPOS_AUTOCOMPLETAR[grupo][0]
+    return indice.con_cambios(pks, cargar(pks))
+
+
+def obtener_indices():
+    """Retorna {grupo: IndicePrefijos}, actualizando solo las entradas modificadas"""
+    generaciones = obtener_generaciones([nombre_generacion(g) for g in GRUPOS_AUTOCOMPLETAR])
+    return {
+        grupo: obtener_local(
+            nombre_generacion(grupo),
+            lambda cargar=cargar: IndicePrefijos(cargar()),
+            generaciones[nombre_generacion(grupo)],
+            actualizar=lambda indice, desde, hasta, grupo=grupo: _actualizar_indice(
+                grupo, indice, desde, hasta
+            ),
+        )
+        for grupo, (cargar, _, _) in GRUPOS_AUTOCOMPLETAR.items()
+    }
+
+
+def autocompletar(texto):
+    """Retorna {grupo: [resultados]} para el texto escrito"""
+    terminos = extraer_terminos(texto)
+    return {
+        grupo: indice.buscar(terminos, GRUPOS_AUTOCOMPLETAR[grupo][1])
+        for grupo, indice in obtener_indices().items()
+    }
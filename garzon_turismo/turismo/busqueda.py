@@ -0,0 +1,160 @@
+# turismo/busqueda.py
+# Documentos de búsqueda de los modelos de turismo (ver core/busqueda.py)
+
+from core.busqueda import registrar_indice
+from .models import (
+    LugarTuristico, Establecimiento, Evento, Ruta, Transporte,
+    Artesania, ActividadFisica, Categoria, CategoriaArtesania,
+    CategoriaActividadFisica, Fotografia, CategoriaFotografia
+)
+
+# Tipos que muestra la búsqueda general de turismo
+TIPOS_TURISMO = [
+    'lugar', 'establecimiento', 'evento', 'ruta',
+    'transporte', 'artesania', 'actividad'
+]
+
+# Tipo de documento de la galería fotográfica
+TIPO_FOTOGRAFIA = 'fotografia'
+
+
+def _documento_lugar(lugar):
+    return {
+        'nombre': lugar.nombre,
+        'descripcion': lugar.descripcion,
+        'categoria': lugar.categoria.nombre,
+        'imagen': lugar.imagen_principal,
+        'fecha': lugar.created,
+        'destacado': lugar.destacado,
+    }
+
+
+def _documento_establecimiento(estab):
+    return {
+        'nombre': estab.nombre,
+        'descripcion': estab.descripcion,
+        'categoria': estab.get_tipo_display(),
+        'imagen': estab.imagen,
+        'fecha': estab.created,
+        'destacado': estab.destacado,
+        'textos_extra': [estab.servicios],
+    }
+
+
+def _documento_evento(evento):
+    return {
+        'nombre': evento.titulo,
+        'descripcion': evento.descripcion,
+        'categoria': 'Evento',
+        'imagen': evento.imagen,
+        'fecha': evento.created,
+        'destacado': evento.destacado,
+        'textos_extra': [evento.lugar],
+    }
+
+
+def _documento_ruta(ruta):
+    return {
+        'nombre': ruta.nombre,
+        'descripcion': ruta.descripcion,
+        'categoria': f"Ruta ({ruta.get_dificultad_display()})",
+        'imagen': ruta.imagen_principal,
+        'fecha': ruta.created,
+    }
+
+
+def _documento_transporte(transporte):
+    return {
+        'nombre': transporte.nombre,
+        'descripcion': transporte.descripcion,
+        'categoria': f"Transporte ({transporte.get_tipo_display()})",
+        'imagen': transporte.imagen,
+        'fecha': transporte.created,
+        'destacado': transporte.destacado,
+        'textos_extra': [transporte.origen, transporte.destino],
+    }
+
+
+def _documento_artesania(artesania):
+    categoria = artesania.categoria.nombre if artesania.categoria else "Sin categoría"
+    return {
+        'nombre': artesania.nombre,
+        'descripcion': artesania.descripcion,
+        'categoria': f"Artesanía ({categoria})",
+        'imagen': artesania.imagen_principal,
+        'fecha': artesania.created,
+        'destacado': artesania.destacado,
+        'textos_extra': [artesania.artesano, artesania.lugar_origen],
+    }
+
+
+def _documento_actividad(actividad):
+    categoria = actividad.categoria.nombre if actividad.categoria else "Sin categoría"
+    return {
+        'nombre': actividad.nombre,
+        'descripcion': actividad.descripcion,
+        'categoria': f"Actividad ({categoria})",
+        'imagen': actividad.imagen_principal,
+        'fecha': actividad.created,
+        'destacado': actividad.destacado,
+        'textos_extra': [actividad.ubicacion, actividad.instructor_guia],
+    }
+
+
+def _documento_fotografia(foto):
+    return {
+        'nombre': foto.titulo,
+        'descripcion': foto.descripcion,
+        'categoria': foto.categoria.nombre,
+        'imagen': foto.imagen,
+        'fecha': foto.created,
+        'destacado': foto.destacada,
+        'textos_extra': [foto.ubicacion, foto.fotografo],
+    }
+
+
+registrar_indice(
+    'lugar', LugarTuristico,
+    lambda: LugarTuristico.objects.select_related('categoria'),
+    _documento_lugar,
+    relaciones={Categoria: 'categoria'},
+)
+registrar_indice(
+    'establecimiento', Establecimiento,
+    lambda: Establecimiento.objects.all(),
+    _documento_establecimiento,
+)
+registrar_indice(
+    'evento', Evento,
+    lambda: Evento.objects.all(),
+    _documento_evento,
+)
+registrar_indice(
+    'ruta', Ruta,
+    lambda: Ruta.objects.all(),
+    _documento_ruta,
+)
+registrar_indice(
+    'transporte', Transporte,
+    lambda: Transporte.objects.filter(disponible=True),
+    _documento_transporte,
+)
+registrar_indice(
+    'artesania', Artesania,
+    lambda: Artesania.objects.filter(disponible_venta=True).select_related('categoria'),
+    _documento_artesania,
+    relaciones={CategoriaArtesania: 'categoria'},
+)
+registrar_indice(
+    'actividad', ActividadFisica,
+    lambda: ActividadFisica.objects.filter(disponible=True).select_related('categoria'),
+    _documento_actividad,
+    relaciones={CategoriaActividadFisica: 'categoria'},
+)
+registrar_indice(
+    TIPO_FOTOGRAFIA, Fotografia,
+    lambda: Fotografia.objects.filter(activa=True).select_related('categoria'),
+    _documento_fotografia,
+    relaciones={CategoriaFotografia: 'categoria'},
+    campos_sin_indice=('vistas',),
+)
@@ -0,0 +1,146 @@
+# turismo/cercanias.py
+# Listas de cercanía entre lugares turísticos y establecimientos, guardadas
+# en la tabla Cercania para que las páginas de detalle no calculen
+# distancias. Se recalculan (turismo/signals.py) solo para los objetos cuya
+# lista puede cambiar cuando un objeto se crea, se mueve o se elimina.
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from core.geo import filtrar_radio, vecinos_cercanos
+from .models import Cercania, Establecimiento, LugarTuristico
+
+# Sentido -> (modelo de origen, campo de origen, campo de destino,
+#             consulta de destinos, relaciones de la lectura, límite)
+SENTIDOS_CERCANIA = {
+    'lugar': (
+        LugarTuristico, 'lugar', 'establecimiento',
+        lambda: Establecimiento.objects.all(),
+        'establecimiento', 4,
+    ),
+    'establecimiento': (
+        Establecimiento, 'establecimiento', 'lugar',
+        lambda: LugarTuristico.objects.select_related('categoria'),
+        'lugar__categoria', 3,
+    ),
+}
+
+SENTIDO_POR_MODELO = {datos[0]: sentido for sentido, datos in SENTIDOS_CERCANIA.items()}
+
+# Sentido de las listas en las que aparecen los objetos de cada modelo
+SENTIDO_INVERSO = {'lugar': 'establecimiento', 'establecimiento': 'lugar'}
+
+
+def get_radio_maximo():
+    """Distancia máxima (km) a la que un objeto se considera cercano"""
+    return getattr(settings, 'TURISMO_CERCANOS_RADIO_KM', 50)
+
+
+# ========== CÁLCULO ==========
+
+def calcular_cercanos(objeto, limite=None):
+    """Vecinos más cercanos de un objeto, anotados con `distancia` (km)"""
+    _, _, _, destinos, _, limite_lista = SENTIDOS_CERCANIA[SENTIDO_POR_MODELO[type(objeto)]]
+    if not objeto.tiene_coordenadas():
+        return []
+    return vecinos_cercanos(
+        destinos(), objeto.latitud, objeto.longitud,
+        limite or limite_lista, get_radio_maximo()
+    )
+
+
+def guardar_cercanos(objeto):
+    """Reemplaza la lista guardada de un objeto"""
+    sentido = SENTIDO_POR_MODELO[type(objeto)]
+    _, campo_origen, campo_destino, _, _, _ = SENTIDOS_CERCANIA[sentido]
+    Cercania.objects.filter(sentido=sentido, **{campo_origen: objeto}).delete()
+    Cercania.objects.bulk_create([
+        Cercania(sentido=sentido, distancia=destino.distancia, **{
+            campo_origen: objeto, campo_destino: destino
+        })
+        for destino in calcular_cercanos(objeto)
+    ])
+
+
+def obtener_cercanos(objeto):
+    """Lee la lista guardada de un objeto (una consulta), con `distancia` en cada destino"""
+    sentido = SENTIDO_POR_MODELO[type(objeto)]
+    _, campo_origen, campo_destino, _, relaciones, _ = SENTIDOS_CERCANIA[sentido]
+    filas = Cercania.objects.filter(
+        sentido=sentido, **{campo_origen: objeto}
+    ).select_related(relaciones).order_by('distancia')
+
+    cercanos = []
+    for fila in filas:
+        destino = getattr(fila, campo_destino)
+        destino.distancia = fila.distancia
+        cercanos.append(destino)
+    return cercanos
+
+
+# ========== ACTUALIZACIÓN ==========
+
+def listas_con(modelo, pk):
+    """pks de los objetos del otro modelo en cuya lista aparece este objeto"""
+    sentido = SENTIDO_INVERSO[SENTIDO_POR_MODELO[modelo]]
+    _, campo_origen, campo_destino, _, _, _ = SENTIDOS_CERCANIA[sentido]
+    return set(Cercania.objects.filter(
+        sentido=sentido, **{campo_destino: pk}
+    ).values_list(f'{campo_origen}_id', flat=True))
+
+
+def _listas_alcanzadas(sentido, objeto):
+    """
+    pks de los orígenes de un sentido cuya lista cambiaría con el objeto en
+    su posición actual: los que tienen la lista incompleta o cuyo último
+    vecino está más lejos que el objeto
+    """
+    modelo_origen, campo_origen, _, _, _, limite = SENTIDOS_CERCANIA[sentido]
+    distancias = dict(filtrar_radio(
+        modelo_origen.objects.all(), objeto.latitud, objeto.longitud, get_radio_maximo()
+    ).values_list('pk', 'distancia'))
+
+    resumen = {
+        fila[campo_origen]: (fila['total'], fila['maxima'])
+        for fila in Cercania.objects.filter(
+            sentido=sentido, **{f'{campo_origen}__in': list(distancias)}
+        ).values(campo_origen).annotate(total=Count('pk'), maxima=Max('distancia'))
+    }
+    alcanzadas = set()
+    for pk, distancia in distancias.items():
+        total, maxima = resumen.get(pk, (0, 0))
+        if total < limite or distancia < maxima:
+            alcanzadas.add(pk)
+    return alcanzadas
+
+
+def actualizar_cercanias(modelo, pk, anteriores=()):
+    """
+    Recalcula la lista de un objeto creado, movido o eliminado, y las del
+    otro modelo que lo incluían (`anteriores` si ya se borraron sus filas) o
+    que deben incluirlo ahora
+    """
+    sentido_inverso = SENTIDO_INVERSO[SENTIDO_POR_MODELO[modelo]]
+    afectados = set(anteriores) | listas_con(modelo, pk)
+
+    objeto = modelo.objects.filter(pk=pk).first()
+    if objeto is not None:
+        guardar_cercanos(objeto)
+        if objeto.tiene_coordenadas():
+            afectados |= _listas_alcanzadas(sentido_inverso, objeto)
+
+    modelo_origen = SENTIDOS_CERCANIA[sentido_inverso][0]
+    for origen in modelo_origen.objects.filter(pk__in=afectados):
+        guardar_cercanos(origen)
+
+
+def reconstruir_cercanias():
+    """Recalcula todas las listas; retorna {sentido: objetos procesados}"""
+    totales = {}
+    for sentido, (modelo_origen, _, _, _, _, _) in SENTIDOS_CERCANIA.items():
+        Cercania.objects.filter(sentido=sentido).delete()
+        totales[sentido] = 0
+        for objeto in modelo_origen.objects.all().iterator():
+            guardar_cercanos(objeto)
+            totales[sentido] += 1
+    return totales
@@ -0,0 +1,245 @@
+# turismo/contadores.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import (
+    LugarTuristico, Ruta, Establecimiento, Evento,
+    Transporte, Artesania, ActividadFisica, Categoria,
+    CategoriaArtesania, CategoriaActividadFisica, ContadorTurismo
+)
+
+# Prefijo de las claves de caché de los contadores
+PREFIJO_CACHE = 'turismo:contadores'
+
+# Grupos de contadores: cada grupo pertenece a un único modelo y se resuelve
+# con una sola consulta de agregación condicional. Los filtros son búsquedas
+# exactas para poder evaluarlos también fuera de la base de datos.
+GRUPOS_CONTADORES = {
+    'rutas': (Ruta, {
+        'rutas': {},
+        'rutas_faciles': {'dificultad': 'facil'},
+        'rutas_medias': {'dificultad': 'media'},
+        'rutas_dificiles': {'dificultad': 'dificil'},
+    }),
+    'lugares': (LugarTuristico, {
+        'destinos': {},
+        'lugares_turisticos': {},
+        'lugares_destacados': {'destacado': True},
+    }),
+    'establecimientos': (Establecimiento, {
+        'establecimientos': {},
+        'hoteles': {'tipo': 'hotel'},
+        'restaurantes': {'tipo': 'restaurante'},
+        'cafeterias': {'tipo': 'cafe'},
+        'bares': {'tipo': 'bar'},
+    }),
+    'eventos': (Evento, {
+        'eventos': {},
+    }),
+    'transportes': (Transporte, {
+        'transportes': {'disponible': True},
+        'buses': {'tipo': 'bus', 'disponible': True},
+        'taxis': {'tipo': 'taxi', 'disponible': True},
+        'tours': {'tipo': 'tour', 'disponible': True},
+    }),
+    # Las categorías de artesanías y actividades son dinámicas,
+    # por eso se cuentan por el slug de la categoría
+    'artesanias': (Artesania, {
+        'artesanias': {'disponible_venta': True},
+        'ceramicas': {'categoria__slug': 'ceramica', 'disponible_venta': True},
+        'textiles': {'categoria__slug': 'textil', 'disponible_venta': True},
+        'maderas': {'categoria__slug': 'madera', 'disponible_venta': True},
+    }),
+    'actividades': (ActividadFisica, {
+        'experiencias': {'disponible': True},
+        'actividades_fisicas': {'disponible': True},
+        'senderismo': {'categoria__slug': 'senderismo', 'disponible': True},
+        'ciclismo': {'categoria__slug': 'ciclismo', 'disponible': True},
+        'escalada': {'categoria__slug': 'escalada', 'disponible': True},
+    }),
+    'categorias': (Categoria, {
+        'categorias': {},
+    }),
+}
+
+# Grupo dependiente del tiempo: se refresca por TTL además de por señales
+GRUPO_EVENTOS_ACTIVOS = 'eventos_activos'
+
+# Modelos cuyos cambios invalidan cada grupo
+DEPENDENCIAS_GRUPOS = {
+    Ruta: ['rutas'],
+    LugarTuristico: ['lugares'],
+    Establecimiento: ['establecimientos'],
+    Evento: ['eventos', GRUPO_EVENTOS_ACTIVOS],
+    Transporte: ['transportes'],
+    Artesania: ['artesanias'],
+    CategoriaArtesania: ['artesanias'],
+    ActividadFisica: ['actividades'],
+    CategoriaActividadFisica: ['actividades'],
+    Categoria: ['categorias'],
+}
+
+MODELOS_CONTADOS = list(DEPENDENCIAS_GRUPOS)
+
+# Grupo al que pertenece cada contador
+GRUPO_POR_CLAVE = {
+    clave: grupo
+    for grupo, (_, definiciones) in GRUPOS_CONTADORES.items()
+    for clave in definiciones
+}
+GRUPO_POR_CLAVE['eventos_activos'] = GRUPO_EVENTOS_ACTIVOS
+
+# Grupo cuyo modelo contado es cada modelo
+GRUPO_POR_MODELO = {
+    modelo: grupo for grupo, (modelo, _) in GRUPOS_CONTADORES.items()
+}
+
+
+def clave_cache(grupo):
+    return f'{PREFIJO_CACHE}:{grupo}'
+
+
+def get_timeout():
+    """Tiempo de vida de los grupos invalidados por señales (None = sin expiración)"""
+    return getattr(settings, 'TURISMO_CONTADORES_TIMEOUT', None)
+
+
+def get_ttl_eventos_activos():
+    """Tiempo máximo de vida del contador de eventos activos, en segundos"""
+    return getattr(settings, 'TURISMO_CONTADORES_EVENTOS_TTL', 300)
+
+
+def calcular_grupo(grupo):
+    """Calcula todos los contadores de un grupo con una sola consulta"""
+    modelo, definiciones = GRUPOS_CONTADORES[grupo]
+    agregados = {
+        clave: Count('pk', filter=Q(**filtro)) if filtro else Count('pk')
+        for clave, filtro in definiciones.items()
+    }
+    return modelo.objects.aggregate(**agregados)
+
+
+def usar_tabla():
+    """Indica si los contadores se leen de la tabla ContadorTurismo"""
+    return getattr(settings, 'TURISMO_CONTADORES_DESNORMALIZADOS', False)
+
+
+def guardar_en_tabla(valores):
+    """Inserta o actualiza en bloque los contadores indicados"""
+    ContadorTurismo.objects.bulk_create(
+        [ContadorTurismo(clave=clave, valor=valor) for clave, valor in valores.items()],
+        update_conflicts=True,
+        unique_fields=['clave'],
+        update_fields=['valor'],
+    )
+
+
+def leer_grupo_tabla(grupo):
+    """Lee los contadores de un grupo desde ContadorTurismo por clave primaria"""
+    _, definiciones = GRUPOS_CONTADORES[grupo]
+    valores = dict(
+        ContadorTurismo.objects.filter(clave__in=definiciones).values_list('clave', 'valor')
+    )
+    if len(valores) < len(definiciones):
+        # La tabla todavía no tiene este grupo: se calcula y se guarda
+        valores = calcular_grupo(grupo)
+        guardar_en_tabla(valores)
+    return valores
+
+
+def claves_de_fila(modelo, pk):
+    """Retorna las claves de contador en las que cuenta la fila indicada"""
+    grupo = GRUPO_POR_MODELO.get(modelo)
+    if grupo is None:
+        return set()
+    
+    _, definiciones = GRUPOS_CONTADORES[grupo]
+    campos = {campo for filtro in definiciones.values() for campo in filtro}
+    fila = modelo.objects.filter(pk=pk).values('pk', *campos).first()
+    if fila is None:
+        return set()
+    
+    return {
+        clave for clave, filtro in definiciones.items()
+        if all(fila[campo] == valor for campo, valor in filtro.items())
+    }
+
+
+def aplicar_diferencia(anteriores, actuales):
+    """Incrementa o decrementa atómicamente los contadores que cambiaron"""
+    suman = actuales - anteriores
+    restan = anteriores - actuales
+    if suman:
+        ContadorTurismo.objects.filter(clave__in=suman).update(valor=F('valor') + 1)
+    if restan:
+        ContadorTurismo.objects.filter(clave__in=restan).update(valor=F('valor') - 1)
+
+
+def calcular_eventos_activos():
+    """
+    Cuenta los eventos que no han terminado y calcula cuántos segundos
+    faltan para que el próximo de ellos termine (momento en el que el
+    contador cambia aunque nadie edite un evento).
+    """
+    ahora = timezone.now()
+    resultado = Evento.objects.aggregate(
+        eventos_activos=Count('pk', filter=Q(fecha_fin__gte=ahora)),
+        proximo_fin=Min('fecha_fin', filter=Q(fecha_fin__gte=ahora)),
+    )
+    ttl = get_ttl_eventos_activos()
+    if resultado['proximo_fin'] is not None:
+        segundos = int((resultado['proximo_fin'] - ahora).total_seconds()) + 1
+        ttl = max(1, min(ttl, segundos))
+    return {'eventos_activos': resultado['eventos_activos']}, ttl
+
+
+def obtener_grupos(grupos):
+    """
+    Obtiene varios grupos de contadores: los que están en caché se leen con
+    una sola operación y los demás se calculan y se guardan.
+    """
+    claves = {clave_cache(grupo): grupo for grupo in grupos}
+    en_cache = cache.get_many(claves.keys())
+    valores = {}
+    pendientes = {}
+
+    for clave, grupo in claves.items():
+        if clave in en_cache:
+            valores[grupo] = en_cache[clave]
+        elif grupo == GRUPO_EVENTOS_ACTIVOS:
+            valores[grupo], ttl = calcular_eventos_activos()
+            cache.set(clave, valores[grupo], ttl)
+        elif usar_tabla():
+            valores[grupo] = pendientes[clave] = leer_grupo_tabla(grupo)
+        else:
+            valores[grupo] = pendientes[clave] = calcular_grupo(grupo)
+
+    if pendientes:
+        cache.set_many(pendientes, get_timeout())
+
+    return valores
+
+
+def obtener_grupo_de_clave(clave):
+    """Retorna los contadores del grupo al que pertenece la clave"""
+    grupo = GRUPO_POR_CLAVE[clave]
+    return obtener_grupos([grupo])[grupo]
+
+
+def obtener_contadores():
+    """Retorna el diccionario plano con todos los contadores"""
+    grupos = list(GRUPOS_CONTADORES) + [GRUPO_EVENTOS_ACTIVOS]
+    contadores = {}
+    for valores in obtener_grupos(grupos).values():
+        contadores.update(valores)
+    return contadores
+
+
+def invalidar_contadores(modelo):
+    """Elimina de la caché los grupos que dependen del modelo indicado"""
+    grupos = DEPENDENCIAS_GRUPOS.get(modelo, [])
+    if grupos:
+        cache.delete_many([clave_cache(grupo) for grupo in grupos])
@@ -424,4 +424,26 @@ class BusquedaAvanzadaForm(forms.Form):
         required=False,
         initial='relevancia',
         widget=forms.Select(attrs={'class': 'form-control'})
-    )
\ No newline at end of file
+    )
+    
+    # Campo del formulario -> tipo de documento de búsqueda (core/busqueda.py)
+    TIPOS_POR_CAMPO = {
+        'incluir_lugares': 'lugar',
+        'incluir_establecimientos': 'establecimiento',
+        'incluir_rutas': 'ruta',
+        'incluir_eventos': 'evento',
+        'incluir_transportes': 'transporte',
+        'incluir_artesanias': 'artesania',
+        'incluir_actividades': 'actividad',
+    }
+    
+    def get_tipos(self):
+        """Tipos marcados; si no se marca ninguno se busca en todos"""
+        tipos = [
+            tipo for campo, tipo in self.TIPOS_POR_CAMPO.items()
+            if self.cleaned_data.get(campo)
+        ]
+        return tipos or list(self.TIPOS_POR_CAMPO.values())
+    
+    def get_orden(self):
+        return self.cleaned_data.get('orden') or 'relevancia'
@@ -0,0 +1,20 @@
+# turismo/management/commands/rebuild_cercanias.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from turismo.cercanias import reconstruir_cercanias
+
+
+class Command(BaseCommand):
+    help = "Recalcula las listas de lugares y establecimientos cercanos (tabla Cercania)"
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            totales = reconstruir_cercanias()
+        
+        for sentido, total in totales.items():
+            self.stdout.write(f"  {sentido}: {total} listas")
+        self.stdout.write(self.style.SUCCESS(
+            f"Listas de cercanía reconstruidas ({sum(totales.values())} listas)"
+        ))
@@ -0,0 +1,33 @@
+# turismo/management/commands/rebuild_piramide_mapa.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from turismo.marcadores import TIPOS_MARCADOR
+from turismo.piramide import reconstruir_piramide
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la pirámide de grupos de marcadores de los mapas (tabla GrupoMarcadores)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tipos',
+            nargs='*',
+            help=f"Tipos a reconstruir (por defecto todos): {', '.join(TIPOS_MARCADOR)}",
+        )
+    
+    def handle(self, *args, **options):
+        tipos = options['tipos'] or None
+        desconocidos = set(tipos or []) - set(TIPOS_MARCADOR)
+        if desconocidos:
+            raise CommandError(f"Tipos desconocidos: {', '.join(sorted(desconocidos))}")
+        
+        with transaction.atomic():
+            totales = reconstruir_piramide(tipos)
+        
+        for tipo, total in totales.items():
+            self.stdout.write(f"  {tipo}: {total} celdas")
+        self.stdout.write(self.style.SUCCESS(
+            f"Pirámide de marcadores reconstruida ({sum(totales.values())} celdas)"
+        ))
@@ -0,0 +1,14 @@
+# turismo/management/commands/rebuild_resumen_rutas.py
+
+from django.core.management.base import BaseCommand
+
+from turismo.rutas import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = "Recalcula el resumen de la geometría guardado en cada ruta (centro, límites, puntos, longitud)"
+    
+    def handle(self, *args, **options):
+        # Cada ruta se recalcula en su propia transacción
+        total = reconstruir_resumenes()
+        self.stdout.write(self.style.SUCCESS(f"Resumen recalculado para {total} rutas"))
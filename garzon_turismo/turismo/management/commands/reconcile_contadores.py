@@ -0,0 +1,55 @@
+# turismo/management/commands/reconcile_contadores.py
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from turismo import contadores
+from turismo.models import ContadorTurismo
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla ContadorTurismo y reporta las diferencias encontradas"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Solo reporta las diferencias, sin modificar la tabla",
+        )
+    
+    def handle(self, *args, **options):
+        reales = {}
+        for grupo in contadores.GRUPOS_CONTADORES:
+            reales.update(contadores.calcular_grupo(grupo))
+        
+        almacenados = dict(ContadorTurismo.objects.values_list('clave', 'valor'))
+        
+        diferencias = 0
+        for clave, valor in sorted(reales.items()):
+            anterior = almacenados.get(clave)
+            if anterior != valor:
+                diferencias += 1
+                self.stdout.write(self.style.WARNING(
+                    f"  {clave}: almacenado={anterior if anterior is not None else '-'} real={valor}"
+                ))
+        
+        sobrantes = set(almacenados) - set(reales)
+        for clave in sorted(sobrantes):
+            self.stdout.write(self.style.WARNING(f"  {clave}: clave obsoleta"))
+        
+        if options['dry_run']:
+            self.stdout.write(f"{diferencias} contador(es) con diferencias (sin cambios)")
+            return
+        
+        with transaction.atomic():
+            contadores.guardar_en_tabla(reales)
+            ContadorTurismo.objects.filter(clave__in=sobrantes).delete()
+        
+        cache.delete_many([
+            contadores.clave_cache(grupo) for grupo in contadores.GRUPOS_CONTADORES
+        ])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(reales)} contadores reconstruidos, {diferencias} con diferencias"
+        ))
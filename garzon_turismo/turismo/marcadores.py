@@ -0,0 +1,222 @@
+# turismo/marcadores.py
+
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import incrementar_generacion, obtener_generaciones
+from core.paginas import clave_modelo
+
+from .models import (
+    LugarTuristico, ActividadFisica, Establecimiento,
+    Categoria, CategoriaActividadFisica
+)
+
+# Prefijo de las claves de caché de los marcadores (por tipo y por conjunto)
+PREFIJO_MARCADORES = 'turismo:marcadores'
+
+# Número de lugares que se muestran en el mapa de la página principal
+LIMITE_MARCADORES_HOME = 20
+
+
+# ========== CONSTRUCCIÓN DE MARCADORES ==========
+
+def _url_imagen(imagen):
+    return imagen.url if imagen else None
+
+
+def _marcador_lugar(lugar):
+    return {
+        'tipo': 'lugar',
+        'nombre': lugar.nombre,
+        'categoria': lugar.categoria.nombre,
+        'latitud': float(lugar.latitud),
+        'longitud': float(lugar.longitud),
+        'imagen': _url_imagen(lugar.imagen_principal),
+        'url': lugar.get_absolute_url(),
+        'icon': 'place'
+    }
+
+
+def _marcador_actividad(actividad):
+    return {
+        'tipo': 'actividad',
+        'nombre': actividad.nombre,
+        'categoria': actividad.categoria.nombre,
+        'latitud': float(actividad.latitud),
+        'longitud': float(actividad.longitud),
+        'imagen': _url_imagen(actividad.imagen_principal),
+        'url': actividad.get_absolute_url(),
+        'icon': 'fitness_center',
+        'dificultad': actividad.dificultad
+    }
+
+
+def _marcador_establecimiento(estab):
+    return {
+        'tipo': 'establecimiento',
+        'nombre': estab.nombre,
+        'categoria': estab.get_tipo_display(),
+        'latitud': float(estab.latitud),
+        'longitud': float(estab.longitud),
+        'imagen': _url_imagen(estab.imagen),
+        'url': estab.get_absolute_url(),
+        'icon': 'business'
+    }
+
+
+def _lugares():
+    return LugarTuristico.objects.filter(
+        latitud__isnull=False,
+        longitud__isnull=False
+    ).select_related('categoria')
+
+
+def _actividades():
+    return ActividadFisica.objects.filter(
+        latitud__isnull=False,
+        longitud__isnull=False,
+        disponible=True
+    ).select_related('categoria')
+
+
+def _establecimientos():
+    return Establecimiento.objects.filter(
+        latitud__isnull=False,
+        longitud__isnull=False
+    )
+
+
+# Tipo de marcador -> (modelo, consulta de objetos georreferenciados, constructor)
+TIPOS_MARCADOR = {
+    'lugar': (LugarTuristico, _lugares, _marcador_lugar),
+    'actividad': (ActividadFisica, _actividades, _marcador_actividad),
+    'establecimiento': (Establecimiento, _establecimientos, _marcador_establecimiento),
+}
+
+TIPO_POR_MODELO = {modelo: tipo for tipo, (modelo, _, _) in TIPOS_MARCADOR.items()}
+
+# Modelos cuyos cambios obligan a reconstruir todos los marcadores de un tipo
+DEPENDENCIAS_CATEGORIAS = {
+    Categoria: 'lugar',
+    CategoriaActividadFisica: 'actividad',
+}
+
+
+# ========== MARCADORES POR TIPO ==========
+# Cada tipo guarda sus marcadores ({pk: marcador}) en su propia entrada de
+# la caché, con su propia generación (core/cache.py): un cambio de un objeto
+# solo toca la entrada de su tipo. Cada conjunto que usan las vistas guarda
+# además su JSON ya serializado, con las generaciones de sus tipos en la
+# clave, para no repetir json.dumps en cada petición.
+
+# Conjunto -> tipos que incluye
+CONJUNTOS_MARCADORES = {
+    'home': ('lugar',),
+    'mapa': ('lugar', 'establecimiento'),
+    'mapa_general': ('lugar', 'actividad', 'establecimiento'),
+}
+
+
+def get_timeout():
+    """Tiempo de vida de los marcadores guardados (se invalidan por generación)"""
+    return getattr(settings, 'TURISMO_MARCADORES_TIMEOUT', 3600)
+
+
+def nombre_generacion(tipo):
+    return f'marcadores:{tipo}'
+
+
+def clave_tipo(tipo, generacion):
+    return f'{PREFIJO_MARCADORES}:{tipo}:{generacion}'
+
+
+def clave_conjunto(conjunto, generaciones):
+    return f"{PREFIJO_MARCADORES}:conjunto:{conjunto}:{':'.join(map(str, generaciones))}"
+
+
+def construir_tipo(tipo):
+    """Construye los marcadores de un tipo con una sola consulta"""
+    _, consulta, constructor = TIPOS_MARCADOR[tipo]
+    return {objeto.pk: constructor(objeto) for objeto in consulta()}
+
+
+def obtener_tipos(tipos, generaciones=None):
+    """Retorna {tipo: {pk: marcador}}, construyendo solo los tipos que no estén guardados"""
+    if generaciones is None:
+        generaciones = obtener_generaciones([nombre_generacion(tipo) for tipo in tipos])
+    claves = {tipo: clave_tipo(tipo, generaciones[nombre_generacion(tipo)]) for tipo in tipos}
+    guardados = cache.get_many(claves.values())
+    marcadores = {}
+    for tipo, clave in claves.items():
+        if clave not in guardados:
+            guardados[clave] = construir_tipo(tipo)
+            cache.set(clave, guardados[clave], get_timeout())
+        marcadores[tipo] = guardados[clave]
+    return marcadores
+
+
+def _obtener_conjunto(conjunto):
+    tipos = CONJUNTOS_MARCADORES[conjunto]
+    generaciones = obtener_generaciones([nombre_generacion(tipo) for tipo in tipos])
+    clave = clave_conjunto(conjunto, [generaciones[nombre_generacion(tipo)] for tipo in tipos])
+    datos = cache.get(clave)
+    if datos is None:
+        marcadores = obtener_tipos(tipos, generaciones)
+        lista = [m for tipo in tipos for m in marcadores[tipo].values()]
+        if conjunto == 'home':
+            lista = lista[:LIMITE_MARCADORES_HOME]
+        datos = {'json': json.dumps(lista), 'total': len(lista)}
+        cache.set(clave, datos, get_timeout())
+    return datos
+
+
+def obtener_marcadores_json(conjunto):
+    """Retorna el JSON de marcadores de un conjunto ('home', 'mapa', 'mapa_general')"""
+    return _obtener_conjunto(conjunto)['json']
+
+
+def claves_sustitutas(conjunto):
+    """Claves con las que se etiquetan las páginas que muestran el conjunto"""
+    modelos = [TIPOS_MARCADOR[tipo][0] for tipo in CONJUNTOS_MARCADORES[conjunto]]
+    return [clave_modelo(modelo) for modelo in modelos]
+
+
+def obtener_total_marcadores(conjunto):
+    return _obtener_conjunto(conjunto)['total']
+
+
+def totales_por_tipo(tipos=None):
+    """Retorna {tipo: objetos georreferenciados} (un COUNT por tipo)"""
+    return {tipo: TIPOS_MARCADOR[tipo][1]().count() for tipo in tipos or TIPOS_MARCADOR}
+
+
+# ========== ACTUALIZACIÓN INCREMENTAL ==========
+
+def actualizar_marcador(modelo, pk):
+    """
+    Vuelve a construir solo el marcador de un objeto (o lo quita del mapa).
+    La copia actualizada se guarda con una generación nueva del tipo, así que
+    dos actualizaciones simultáneas no se pisan: si falta la entrada de la
+    generación anterior (otra actualización no la ha escrito todavía, o se
+    perdió), el tipo se construye completo en la próxima lectura.
+    """
+    tipo = TIPO_POR_MODELO[modelo]
+    generacion = incrementar_generacion(nombre_generacion(tipo))
+    marcadores = cache.get(clave_tipo(tipo, generacion - 1))
+    if marcadores is None:
+        return
+
+    _, consulta, constructor = TIPOS_MARCADOR[tipo]
+    objeto = consulta().filter(pk=pk).first()
+    if objeto is None:
+        marcadores.pop(pk, None)
+    else:
+        marcadores[pk] = constructor(objeto)
+    cache.set(clave_tipo(tipo, generacion), marcadores, get_timeout())
+
+
+def reconstruir_tipo(tipo):
+    """Marca como obsoletos todos los marcadores de un tipo (se construyen en la próxima lectura)"""
+    incrementar_generacion(nombre_generacion(tipo))
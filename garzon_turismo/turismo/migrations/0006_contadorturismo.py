@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turismo', '0005_categoriafotografia_tagfotografia_fotografia_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorTurismo',
+            fields=[
+                ('clave', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('valor', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de Turismo',
+                'verbose_name_plural': 'Contadores de Turismo',
+                'ordering': ['clave'],
+            },
+        ),
+    ]
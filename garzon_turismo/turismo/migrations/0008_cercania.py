@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 00:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turismo', '0007_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cercania',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sentido', models.CharField(choices=[('lugar', 'Establecimientos cercanos a un lugar'), ('establecimiento', 'Lugares cercanos a un establecimiento')], max_length=20)),
+                ('distancia', models.FloatField(help_text='Distancia en kilómetros')),
+                ('establecimiento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cercanias', to='turismo.establecimiento')),
+                ('lugar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cercanias', to='turismo.lugarturistico')),
+            ],
+            options={
+                'verbose_name': 'Cercanía',
+                'verbose_name_plural': 'Cercanías',
+                'indexes': [models.Index(fields=['sentido', 'lugar', 'distancia'], name='turismo_cer_sentido_e84fec_idx'), models.Index(fields=['sentido', 'establecimiento', 'distancia'], name='turismo_cer_sentido_a276f2_idx')],
+                'unique_together': {('sentido', 'lugar', 'establecimiento')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turismo', '0008_cercania'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrupoMarcadores',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('tipo', models.CharField(max_length=20)),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('total', models.PositiveIntegerField()),
+                ('latitud', models.FloatField(help_text='Centro de los objetos de la celda')),
+                ('longitud', models.FloatField()),
+                ('sur', models.FloatField()),
+                ('oeste', models.FloatField()),
+                ('norte', models.FloatField()),
+                ('este', models.FloatField()),
+                ('objeto_id', models.PositiveIntegerField(blank=True, help_text='pk del objeto si la celda tiene uno solo', null=True)),
+            ],
+            options={
+                'verbose_name': 'Grupo de Marcadores',
+                'verbose_name_plural': 'Grupos de Marcadores',
+                'unique_together': {('zoom', 'tipo', 'y', 'x')},
+            },
+        ),
+    ]
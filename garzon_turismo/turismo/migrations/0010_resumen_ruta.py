@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-18 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turismo', '0009_grupomarcadores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ruta',
+            name='centro_latitud',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='centro_longitud',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='limite_este',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='limite_norte',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='limite_oeste',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='limite_sur',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='longitud_trazado',
+            field=models.FloatField(default=0, editable=False, help_text='Longitud en kilómetros de la línea que une los puntos (haversine)'),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='nombre_fin',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='nombre_inicio',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='puntos_con_lugares',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='total_puntos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turismo', '0010_resumen_ruta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ruta',
+            name='polilinea',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='polilineas_zoom',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -5,7 +5,7 @@ from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from core.models import TimeStampedModel
+from core.models import TimeStampedModel, ModeloGeorreferenciado
 import json
 
 class Categoria(TimeStampedModel):
@@ -27,7 +27,7 @@ class Categoria(TimeStampedModel):
     class Meta:
         verbose_name_plural = "Categorías"
 
-class LugarTuristico(TimeStampedModel):
+class LugarTuristico(ModeloGeorreferenciado):
     nombre = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
     descripcion = models.TextField()
@@ -82,6 +82,11 @@ class LugarTuristico(TimeStampedModel):
             }
         return None
     
+    def get_establecimientos_cercanos(self, limite=4):
+        """Establecimientos más cercanos por distancia, con su `distancia` en km"""
+        from .cercanias import calcular_cercanos
+        return calcular_cercanos(self, limite)
+    
     def get_rutas(self):
         """Obtener las rutas que incluyen este lugar"""
         return Ruta.objects.filter(puntos__lugar_turistico=self).distinct()
@@ -134,9 +139,44 @@ class Ruta(TimeStampedModel):
         help_text="Configuración específica del mapa (centro, zoom, estilo, etc.)"
     )
     
+    # Resumen de la geometría de los puntos (turismo/rutas.py), recalculado
+    # en la misma transacción cada vez que cambia un PuntoRuta
+    total_puntos = models.PositiveIntegerField(default=0, editable=False)
+    puntos_con_lugares = models.PositiveIntegerField(default=0, editable=False)
+    centro_latitud = models.FloatField(null=True, blank=True, editable=False)
+    centro_longitud = models.FloatField(null=True, blank=True, editable=False)
+    limite_sur = models.FloatField(null=True, blank=True, editable=False)
+    limite_oeste = models.FloatField(null=True, blank=True, editable=False)
+    limite_norte = models.FloatField(null=True, blank=True, editable=False)
+    limite_este = models.FloatField(null=True, blank=True, editable=False)
+    nombre_inicio = models.CharField(max_length=200, blank=True, editable=False)
+    nombre_fin = models.CharField(max_length=200, blank=True, editable=False)
+    longitud_trazado = models.FloatField(
+        default=0, editable=False,
+        help_text="Longitud en kilómetros de la línea que une los puntos (haversine)"
+    )
+    # Línea de los puntos como polilínea codificada, completa y simplificada
+    # por zoom ({"zoom": polilínea}) para miniaturas y mapas de comparación
+    polilinea = models.TextField(blank=True, editable=False)
+    polilineas_zoom = models.JSONField(default=dict, blank=True, editable=False)
+    
+    # Campos que solo escribe turismo/rutas.py (con update()): guardar una
+    # instancia cargada antes de cambiar los puntos no debe pisarlos
+    CAMPOS_RESUMEN = (
+        'total_puntos', 'puntos_con_lugares', 'centro_latitud', 'centro_longitud',
+        'limite_sur', 'limite_oeste', 'limite_norte', 'limite_este',
+        'nombre_inicio', 'nombre_fin', 'longitud_trazado', 'polilinea', 'polilineas_zoom',
+    )
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.nombre)
+        if (not args and not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_RESUMEN
+            ]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -172,67 +212,38 @@ class Ruta(TimeStampedModel):
             puntos_ruta__ruta=self
         ).distinct()
     
+    def get_datos_mapa(self):
+        """Datos de los mapas de la ruta, leyendo sus puntos una sola vez"""
+        from .rutas import DatosMapaRuta
+        return DatosMapaRuta(self)
+    
     def get_coordenadas_puntos(self):
         """Retorna todas las coordenadas de los puntos de esta ruta para el mapa"""
-        puntos = self.get_puntos_ordenados()
-        coordenadas = []
-        
-        for punto in puntos:
-            coord_data = {
-                'lat': float(punto.latitud),
-                'lng': float(punto.longitud),
-                'orden': punto.orden,
-                'nombre': punto.get_nombre_display(),
-                'descripcion': punto.get_descripcion_display(),
-                'tiempo_estancia': punto.tiempo_estancia,
-                'es_lugar_turistico': punto.lugar_turistico is not None,
-            }
-            
-            # Si tiene lugar turístico asociado, agregar información adicional
-            if punto.lugar_turistico:
-                coord_data.update({
-                    'lugar_url': punto.lugar_turistico.get_absolute_url(),
-                    'imagen': punto.lugar_turistico.get_imagen_principal_url(),
-                    'categoria': punto.lugar_turistico.categoria.nombre,
-                })
-            elif punto.get_imagen():
-                coord_data['imagen'] = punto.get_imagen().url
-            
-            coordenadas.append(coord_data)
-        
-        return coordenadas
+        return self.get_datos_mapa().coordenadas
     
     def get_centro_mapa(self):
-        """Calcula el centro del mapa basado en los puntos de la ruta"""
-        puntos = self.get_puntos_ordenados()
-        if not puntos:
-            # Coordenadas por defecto para Garzón, Huila
-            return {'lat': 2.1964, 'lng': -75.6472}
-        
-        latitudes = [punto.latitud for punto in puntos]
-        longitudes = [punto.longitud for punto in puntos]
-        
-        centro_lat = sum(latitudes) / len(latitudes)
-        centro_lng = sum(longitudes) / len(longitudes)
-        
-        return {'lat': centro_lat, 'lng': centro_lng}
+        """Centro del mapa según el resumen guardado de los puntos"""
+        from .rutas import centro_resumen
+        return centro_resumen(self)
     
     def get_configuracion_mapa(self):
         """Retorna la configuración completa del mapa para esta ruta"""
-        config_base = {
-            'centro': self.get_centro_mapa(),
-            'zoom': 13,
-            'puntos': self.get_coordenadas_puntos(),
-            'estilo_marcador': 'numbered',  # numbered, colored, custom
-            'mostrar_ruta': True,
-            'color_ruta': self.get_color_dificultad_hex(),
-        }
-        
-        # Si hay configuración personalizada, la fusiona
-        if self.mapa_configuracion:
-            config_base.update(self.mapa_configuracion)
-        
-        return config_base
+        return self.get_datos_mapa().get_configuracion_mapa()
+    
+    def get_polilinea(self, zoom=None):
+        """
+        Línea de la ruta como polilínea codificada; con `zoom`, la variante
+        simplificada más detallada que hace falta para ese zoom
+        """
+        if zoom is not None:
+            zooms = sorted(int(nivel) for nivel in self.polilineas_zoom if int(nivel) >= zoom)
+            if zooms:
+                return self.polilineas_zoom[str(zooms[0])]
+        return self.polilinea
+    
+    def get_polilinea_miniatura(self):
+        """Variante más simplificada de la línea, para los mapas en miniatura"""
+        return self.get_polilinea(0)
     
     def get_color_dificultad_hex(self):
         """Retorna color hexadecimal basado en la dificultad para usar en mapas"""
@@ -245,23 +256,12 @@ class Ruta(TimeStampedModel):
     
     def tiene_puntos(self):
         """Verifica si la ruta tiene puntos definidos"""
-        return self.puntos.exists()
+        return self.total_puntos > 0
     
     def get_bounds_mapa(self):
-        """Calcula los límites del mapa para ajustar automáticamente el zoom"""
-        puntos = self.get_puntos_ordenados()
-        if not puntos:
-            return None
-        
-        latitudes = [punto.latitud for punto in puntos]
-        longitudes = [punto.longitud for punto in puntos]
-        
-        return {
-            'north': max(latitudes),
-            'south': min(latitudes),
-            'east': max(longitudes),
-            'west': min(longitudes)
-        }
+        """Límites del mapa para ajustar el zoom, según el resumen guardado"""
+        from .rutas import bounds_resumen
+        return bounds_resumen(self)
 
 class PuntoRuta(models.Model):
     ruta = models.ForeignKey(Ruta, on_delete=models.CASCADE, related_name='puntos')
@@ -406,7 +406,7 @@ class PuntoRuta(models.Model):
 
 # Resto de modelos sin cambios significativos...
 
-class Establecimiento(TimeStampedModel):
+class Establecimiento(ModeloGeorreferenciado):
     TIPO_CHOICES = (
         ('hotel', 'Hotel'),
         ('restaurante', 'Restaurante'),
@@ -456,6 +456,10 @@ class Establecimiento(TimeStampedModel):
     
     def get_valoracion_promedio(self):
         """Calcula la valoración promedio del establecimiento"""
+        if hasattr(self, 'valoracion_promedio'):
+            # Ya anotada por la consulta (ver core/fragmentos.py)
+            return round(self.valoracion_promedio or 0, 1)
+        
         from django.db.models import Avg
         from core.models import Valoracion
         
@@ -474,10 +478,9 @@ class Establecimiento(TimeStampedModel):
         return self.latitud is not None and self.longitud is not None
     
     def get_lugares_cercanos(self, limite=3):
-        """Obtiene lugares turísticos cercanos (implementación simplificada)"""
-        if not self.tiene_coordenadas():
-            return LugarTuristico.objects.filter(destacado=True)[:limite]
-        return LugarTuristico.objects.filter(destacado=True)[:limite]
+        """Lugares turísticos más cercanos por distancia, con su `distancia` en km"""
+        from .cercanias import calcular_cercanos
+        return calcular_cercanos(self, limite)
 
 class Evento(TimeStampedModel):
     titulo = models.CharField(max_length=200)
@@ -676,7 +679,7 @@ class CategoriaActividadFisica(TimeStampedModel):
         ordering = ['orden', 'nombre']
 
 
-class ActividadFisica(TimeStampedModel):
+class ActividadFisica(ModeloGeorreferenciado):
     DIFICULTAD_CHOICES = (
         ('principiante', 'Principiante'),
         ('intermedio', 'Intermedio'),
@@ -1015,4 +1018,79 @@ class FavoritesFotografia(models.Model):
     class Meta:
         unique_together = ['fotografia', 'ip_address']
         verbose_name = "Fotografía Favorita"
-        verbose_name_plural = "Fotografías Favoritas"
\ No newline at end of file
+        verbose_name_plural = "Fotografías Favoritas"
+
+class ContadorTurismo(models.Model):
+    """
+    Contadores desnormalizados del sitio (ver turismo/contadores.py).
+    Se mantienen con incrementos atómicos desde las señales de los modelos
+    y se reconstruyen con `manage.py reconcile_contadores`.
+    """
+    clave = models.CharField(max_length=50, primary_key=True)
+    valor = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.clave}: {self.valor}"
+    
+    class Meta:
+        ordering = ['clave']
+        verbose_name = "Contador de Turismo"
+        verbose_name_plural = "Contadores de Turismo"
+
+class Cercania(models.Model):
+    """
+    Listas precalculadas de cercanía entre lugares turísticos y
+    establecimientos (ver turismo/cercanias.py). Cada fila pertenece a la
+    lista de su origen según el sentido; se recalculan por señales cuando
+    cambian las coordenadas y con `manage.py rebuild_cercanias`.
+    """
+    SENTIDO_CHOICES = (
+        ('lugar', 'Establecimientos cercanos a un lugar'),
+        ('establecimiento', 'Lugares cercanos a un establecimiento'),
+    )
+    
+    sentido = models.CharField(max_length=20, choices=SENTIDO_CHOICES)
+    lugar = models.ForeignKey(LugarTuristico, on_delete=models.CASCADE, related_name='cercanias')
+    establecimiento = models.ForeignKey(Establecimiento, on_delete=models.CASCADE, related_name='cercanias')
+    distancia = models.FloatField(help_text="Distancia en kilómetros")
+    
+    def __str__(self):
+        return f"{self.lugar} - {self.establecimiento} ({self.distancia:.1f} km)"
+    
+    class Meta:
+        unique_together = ['sentido', 'lugar', 'establecimiento']
+        indexes = [
+            models.Index(fields=['sentido', 'lugar', 'distancia']),
+            models.Index(fields=['sentido', 'establecimiento', 'distancia']),
+        ]
+        verbose_name = "Cercanía"
+        verbose_name_plural = "Cercanías"
+
+class GrupoMarcadores(models.Model):
+    """
+    Celda de la pirámide de marcadores del mapa (ver turismo/piramide.py):
+    objetos de un tipo que caen en la celda (x, y) de la pantalla a un zoom.
+    Se mantiene por señales y se reconstruye con `manage.py rebuild_piramide_mapa`.
+    """
+    zoom = models.PositiveSmallIntegerField()
+    tipo = models.CharField(max_length=20)
+    x = models.IntegerField()
+    y = models.IntegerField()
+    total = models.PositiveIntegerField()
+    latitud = models.FloatField(help_text="Centro de los objetos de la celda")
+    longitud = models.FloatField()
+    sur = models.FloatField()
+    oeste = models.FloatField()
+    norte = models.FloatField()
+    este = models.FloatField()
+    objeto_id = models.PositiveIntegerField(null=True, blank=True, help_text="pk del objeto si la celda tiene uno solo")
+    
+    def __str__(self):
+        return f"{self.tipo} z{self.zoom} ({self.x}, {self.y}): {self.total}"
+    
+    class Meta:
+        # También sirve de índice para leer un rango de celdas de un nivel
+        unique_together = ['zoom', 'tipo', 'y', 'x']
+        verbose_name = "Grupo de Marcadores"
+        verbose_name_plural = "Grupos de Marcadores"
+
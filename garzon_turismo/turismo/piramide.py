@@ -0,0 +1,237 @@
+# turismo/piramide.py
+# Pirámide precalculada de grupos de marcadores para los mapas: un nivel por
+# zoom con los objetos de cada tipo contados por celda de la pantalla
+# (tabla GrupoMarcadores). La celda (x, y) de un nivel cubre exactamente
+# las celdas (2x..2x+1, 2y..2y+1) del nivel siguiente, así que cada nivel se
+# calcula desde el de abajo y un cambio solo recalcula una celda por nivel.
+
+from django.conf import settings
+from django.db.models import Q
+
+from core.geo import coordenadas_pixel, filtrar_rectangulo, pixel_mercator
+from .marcadores import TIPOS_MARCADOR, TIPO_POR_MODELO
+from .models import GrupoMarcadores
+
+# Campos de GrupoMarcadores que se combinan al agrupar celdas
+CAMPOS_GRUPO = ('total', 'latitud', 'longitud', 'sur', 'oeste', 'norte', 'este', 'objeto_id')
+
+# Filas por cada INSERT en lote al reconstruir
+TAMANO_LOTE = 1000
+
+# Campos que, además de las coordenadas, deciden si un objeto está en el mapa
+CAMPOS_VISIBILIDAD = {'actividad': ('disponible',)}
+
+
+def get_niveles():
+    """Retorna (zoom mínimo, zoom máximo) de la pirámide"""
+    return getattr(settings, 'TURISMO_MAPA_NIVELES', (8, 18))
+
+
+def get_lado_celda():
+    """Lado en píxeles de las celdas en las que se agrupan los marcadores"""
+    return getattr(settings, 'TURISMO_MAPA_CELDA_PX', 60)
+
+
+def campos_posicion(modelo):
+    """Campos cuyo cambio obliga a actualizar la pirámide para un modelo"""
+    return ('latitud', 'longitud') + CAMPOS_VISIBILIDAD.get(TIPO_POR_MODELO[modelo], ())
+
+
+def celda(lat, lng, zoom):
+    """Celda (x, y) de la pantalla que contiene unas coordenadas"""
+    x, y = pixel_mercator(lat, lng, zoom)
+    lado = get_lado_celda()
+    return int(x // lado), int(y // lado)
+
+
+def _punto(pk, lat, lng):
+    return {
+        'total': 1, 'latitud': lat, 'longitud': lng,
+        'sur': lat, 'oeste': lng, 'norte': lat, 'este': lng, 'objeto_id': pk,
+    }
+
+
+def _combinar(partes):
+    """Combina celdas (o puntos) en una: total, centro ponderado y límites"""
+    total = sum(parte['total'] for parte in partes)
+    return {
+        'total': total,
+        'latitud': sum(parte['latitud'] * parte['total'] for parte in partes) / total,
+        'longitud': sum(parte['longitud'] * parte['total'] for parte in partes) / total,
+        'sur': min(parte['sur'] for parte in partes),
+        'oeste': min(parte['oeste'] for parte in partes),
+        'norte': max(parte['norte'] for parte in partes),
+        'este': max(parte['este'] for parte in partes),
+        'objeto_id': partes[0]['objeto_id'] if total == 1 else None,
+    }
+
+
+# ========== CONSTRUCCIÓN ==========
+
+def reconstruir_piramide(tipos=None):
+    """Reconstruye todos los niveles; retorna {tipo: filas guardadas}"""
+    minimo, maximo = get_niveles()
+    totales = {}
+    for tipo in tipos or TIPOS_MARCADOR:
+        _, consulta, _ = TIPOS_MARCADOR[tipo]
+        puntos = {}
+        for pk, lat, lng in consulta().values_list('pk', 'latitud', 'longitud').iterator():
+            puntos.setdefault(celda(lat, lng, maximo), []).append(_punto(pk, lat, lng))
+        nivel = {clave: _combinar(partes) for clave, partes in puntos.items()}
+
+        filas = []
+        for zoom in range(maximo, minimo - 1, -1):
+            filas.extend(
+                GrupoMarcadores(zoom=zoom, tipo=tipo, x=x, y=y, **datos)
+                for (x, y), datos in nivel.items()
+            )
+            padres = {}
+            for (x, y), datos in nivel.items():
+                padres.setdefault((x // 2, y // 2), []).append(datos)
+            nivel = {clave: _combinar(partes) for clave, partes in padres.items()}
+
+        GrupoMarcadores.objects.filter(tipo=tipo).delete()
+        GrupoMarcadores.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+        totales[tipo] = len(filas)
+    return totales
+
+
+def _guardar_celda(tipo, zoom, x, y, partes):
+    if partes:
+        GrupoMarcadores.objects.update_or_create(
+            zoom=zoom, tipo=tipo, x=x, y=y, defaults=_combinar(partes)
+        )
+    else:
+        GrupoMarcadores.objects.filter(zoom=zoom, tipo=tipo, x=x, y=y).delete()
+
+
+def _recalcular_base(tipo, x, y, zoom):
+    """Recalcula una celda del nivel más detallado a partir de los objetos"""
+    lado = get_lado_celda()
+    norte, oeste = coordenadas_pixel(x * lado, y * lado, zoom)
+    sur, este = coordenadas_pixel((x + 1) * lado, (y + 1) * lado, zoom)
+    # Con margen: la pertenencia exacta se decide con celda()
+    margen = 1e-6
+    _, consulta, _ = TIPOS_MARCADOR[tipo]
+    filas = filtrar_rectangulo(
+        consulta(), sur - margen, oeste - margen, norte + margen, este + margen
+    ).values_list('pk', 'latitud', 'longitud')
+    _guardar_celda(tipo, zoom, x, y, [
+        _punto(pk, lat, lng) for pk, lat, lng in filas if celda(lat, lng, zoom) == (x, y)
+    ])
+
+
+def _recalcular_desde_hijos(tipo, x, y, zoom):
+    hijos = GrupoMarcadores.objects.filter(
+        zoom=zoom + 1, tipo=tipo, y__in=[2 * y, 2 * y + 1], x__in=[2 * x, 2 * x + 1]
+    ).values(*CAMPOS_GRUPO)
+    _guardar_celda(tipo, zoom, x, y, list(hijos))
+
+
+def actualizar_objeto(modelo, pk, anterior=None):
+    """
+    Actualiza las celdas de un objeto creado, modificado o eliminado: las de
+    su posición anterior (lat, lng) y las de la actual, en todos los niveles
+    """
+    tipo = TIPO_POR_MODELO[modelo]
+    _, consulta, _ = TIPOS_MARCADOR[tipo]
+    actual = consulta().filter(pk=pk).values_list('latitud', 'longitud').first()
+    minimo, maximo = get_niveles()
+
+    posiciones = [
+        posicion for posicion in (anterior, actual)
+        if posicion and None not in posicion
+    ]
+    celdas = {celda(lat, lng, maximo) for lat, lng in posiciones}
+    for x, y in celdas:
+        _recalcular_base(tipo, x, y, maximo)
+    for zoom in range(maximo - 1, minimo - 1, -1):
+        celdas = {(x // 2, y // 2) for x, y in celdas}
+        for x, y in celdas:
+            _recalcular_desde_hijos(tipo, x, y, zoom)
+
+
+# ========== CONSULTA POR ÁREA VISIBLE ==========
+
+def _formato_grupo(partes):
+    datos = _combinar(partes)
+    conteos = {}
+    for parte in partes:
+        conteos[parte['tipo']] = conteos.get(parte['tipo'], 0) + parte['total']
+    return {
+        'latitud': datos['latitud'],
+        'longitud': datos['longitud'],
+        'total': datos['total'],
+        'conteos': conteos,
+        'limites': {clave: datos[clave] for clave in ('sur', 'oeste', 'norte', 'este')},
+    }
+
+
+def _construir_marcadores(pks_por_tipo):
+    marcadores = []
+    for tipo, pks in pks_por_tipo.items():
+        _, consulta, constructor = TIPOS_MARCADOR[tipo]
+        objetos = consulta().in_bulk(pks)
+        marcadores.extend(constructor(objetos[pk]) for pk in pks if pk in objetos)
+    return marcadores
+
+
+def _sin_grupos(sur, oeste, norte, este, tipos):
+    """Todos los objetos del área como marcadores (zooms mayores que la pirámide)"""
+    pks_por_tipo = {}
+    for tipo in tipos:
+        _, consulta, _ = TIPOS_MARCADOR[tipo]
+        pks_por_tipo[tipo] = list(
+            filtrar_rectangulo(consulta(), sur, oeste, norte, este).values_list('pk', flat=True)
+        )
+    return {
+        'marcadores': _construir_marcadores(pks_por_tipo),
+        'grupos': [],
+        'conteos': {tipo: len(pks) for tipo, pks in pks_por_tipo.items()},
+    }
+
+
+def marcadores_en_area(sur, oeste, norte, este, zoom, tipos=None):
+    """
+    Retorna {'marcadores': [...], 'grupos': [...], 'conteos': {tipo: total}}
+    para un rectángulo, leyendo el rango de celdas del nivel de la pirámide
+    de ese zoom. Las celdas con un solo objeto se devuelven como marcadores;
+    las demás como grupos con su centro, el total por tipo y sus límites.
+    Los conteos incluyen las celdas del borde completas.
+    """
+    tipos = tipos or list(TIPOS_MARCADOR)
+    minimo, maximo = get_niveles()
+    if zoom > maximo:
+        return _sin_grupos(sur, oeste, norte, este, tipos)
+
+    # Por debajo del nivel mínimo se juntan sus celdas de a 2^n x 2^n
+    nivel = max(zoom, minimo)
+    factor = 1 << (nivel - zoom)
+    x_oeste, y_norte = celda(norte, oeste, nivel)
+    x_este, y_sur = celda(sur, este, nivel)
+    if x_oeste <= x_este:
+        filtro_x = Q(x__gte=x_oeste, x__lte=x_este)
+    else:
+        # El área cruza el antimeridiano
+        filtro_x = Q(x__gte=x_oeste) | Q(x__lte=x_este)
+
+    filas = GrupoMarcadores.objects.filter(
+        filtro_x, zoom=nivel, tipo__in=tipos, y__gte=y_norte, y__lte=y_sur
+    ).values('tipo', 'x', 'y', *CAMPOS_GRUPO)
+
+    celdas = {}
+    for fila in filas:
+        celdas.setdefault((fila['x'] // factor, fila['y'] // factor), []).append(fila)
+
+    conteos = dict.fromkeys(tipos, 0)
+    solos = {}
+    grupos = []
+    for partes in celdas.values():
+        for parte in partes:
+            conteos[parte['tipo']] += parte['total']
+        if len(partes) == 1 and partes[0]['total'] == 1:
+            solos.setdefault(partes[0]['tipo'], []).append(partes[0]['objeto_id'])
+        else:
+            grupos.append(_formato_grupo(partes))
+
+    return {'marcadores': _construir_marcadores(solos), 'grupos': grupos, 'conteos': conteos}
@@ -0,0 +1,360 @@
+# turismo/rutas.py
+# Datos de los mapas de una ruta a partir de una sola lectura de sus puntos
+# (con el lugar turístico y su categoría): centro, límites, conteos, primer
+# y último punto e información de cada marcador, en una pasada. El resumen
+# de la geometría se guarda además en la propia Ruta para los listados.
+
+import threading
+from contextlib import contextmanager
+from functools import partial
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import incrementar_generacion, obtener_generacion
+from core.geo import codificar_polilinea, decodificar_polilinea, distancia_km, simplificar_linea
+from core.paginas import clave_modelo, purgar_claves
+from . import teselas
+from .models import PuntoRuta, Ruta
+
+# Centro de los mapas de las rutas sin puntos (Garzón, Huila)
+CENTRO_POR_DEFECTO = {'lat': 2.1964, 'lng': -75.6472}
+
+ZOOM_MAPA_RUTA = 13
+
+
+def puntos_ruta(ruta):
+    """Puntos de una ruta en orden, con el lugar turístico y su categoría (una consulta)"""
+    return list(
+        ruta.puntos.select_related('lugar_turistico__categoria').order_by('orden')
+    )
+
+
+def coordenadas_punto(punto):
+    """Datos de un punto para los mapas (formato de Ruta.get_coordenadas_puntos)"""
+    datos = {
+        'lat': float(punto.latitud),
+        'lng': float(punto.longitud),
+        'orden': punto.orden,
+        'nombre': punto.get_nombre_display(),
+        'descripcion': punto.get_descripcion_display(),
+        'tiempo_estancia': punto.tiempo_estancia,
+        'es_lugar_turistico': punto.lugar_turistico is not None,
+    }
+
+    # Si tiene lugar turístico asociado, agregar información adicional
+    if punto.lugar_turistico:
+        datos.update({
+            'lugar_url': punto.lugar_turistico.get_absolute_url(),
+            'imagen': punto.lugar_turistico.get_imagen_principal_url(),
+            'categoria': punto.lugar_turistico.categoria.nombre,
+        })
+    return datos
+
+
+class DatosMapaRuta:
+    """
+    Todo lo que las vistas de una ruta muestran de sus puntos, calculado al
+    construirse con una sola consulta (o con `puntos` ya cargados en orden)
+    """
+
+    def __init__(self, ruta, puntos=None):
+        self.ruta = ruta
+        self.puntos = puntos_ruta(ruta) if puntos is None else list(puntos)
+        self.coordenadas = [coordenadas_punto(punto) for punto in self.puntos]
+
+        self.total_puntos = len(self.puntos)
+        self.primer_punto = self.puntos[0] if self.puntos else None
+        self.ultimo_punto = self.puntos[-1] if self.puntos else None
+
+        lugares = {}
+        for punto in self.puntos:
+            if punto.lugar_turistico is not None:
+                lugares.setdefault(punto.lugar_turistico.pk, punto.lugar_turistico)
+        self.lugares = list(lugares.values())
+
+        resumen = calcular_resumen(self.puntos)
+        self.puntos_con_lugares = resumen['puntos_con_lugares']
+        self.longitud_trazado = resumen['longitud_trazado']
+        self.centro = centro_resumen(resumen)
+        self.bounds = bounds_resumen(resumen)
+
+    def get_configuracion_mapa(self):
+        """Configuración completa del mapa (formato de Ruta.get_configuracion_mapa)"""
+        configuracion = {
+            'centro': self.centro,
+            'zoom': ZOOM_MAPA_RUTA,
+            'puntos': self.coordenadas,
+            'estilo_marcador': 'numbered',  # numbered, colored, custom
+            'mostrar_ruta': True,
+            'color_ruta': self.ruta.get_color_dificultad_hex(),
+        }
+
+        # Si hay configuración personalizada, la fusiona
+        if self.ruta.mapa_configuracion:
+            configuracion.update(self.ruta.mapa_configuracion)
+        return configuracion
+
+    def get_marcadores(self):
+        """Información de marcador (PuntoRuta.get_info_marcador) de cada punto"""
+        return [punto.get_info_marcador() for punto in self.puntos]
+
+
+# ========== RESUMEN GUARDADO EN LA RUTA ==========
+
+def get_zooms_simplificados():
+    """Zooms para los que se guarda una variante simplificada de la línea"""
+    return getattr(settings, 'TURISMO_RUTAS_ZOOMS_SIMPLIFICADOS', (10, 13, 16))
+
+
+def get_tolerancia_px():
+    """Desviación máxima (píxeles de pantalla) de la línea simplificada"""
+    return getattr(settings, 'TURISMO_RUTAS_TOLERANCIA_PX', 1.0)
+
+
+def calcular_polilineas(puntos):
+    """Campos polilinea y polilineas_zoom de Ruta para unos puntos en orden"""
+    coordenadas = [(float(punto.latitud), float(punto.longitud)) for punto in puntos]
+    simplificadas = {}
+    if len(coordenadas) > 2:
+        simplificadas = {
+            str(zoom): codificar_polilinea(simplificar_linea(coordenadas, zoom, get_tolerancia_px()))
+            for zoom in get_zooms_simplificados()
+        }
+    return {'polilinea': codificar_polilinea(coordenadas), 'polilineas_zoom': simplificadas}
+
+
+def calcular_resumen(puntos):
+    """Valores de los campos de resumen de Ruta para unos puntos en orden"""
+    if not puntos:
+        return {
+            'total_puntos': 0, 'puntos_con_lugares': 0,
+            'centro_latitud': None, 'centro_longitud': None,
+            'limite_sur': None, 'limite_oeste': None,
+            'limite_norte': None, 'limite_este': None,
+            'nombre_inicio': '', 'nombre_fin': '', 'longitud_trazado': 0,
+        }
+
+    latitudes = [float(punto.latitud) for punto in puntos]
+    longitudes = [float(punto.longitud) for punto in puntos]
+    return {
+        'total_puntos': len(puntos),
+        'puntos_con_lugares': sum(1 for punto in puntos if punto.lugar_turistico_id),
+        'centro_latitud': sum(latitudes) / len(latitudes),
+        'centro_longitud': sum(longitudes) / len(longitudes),
+        'limite_sur': min(latitudes),
+        'limite_oeste': min(longitudes),
+        'limite_norte': max(latitudes),
+        'limite_este': max(longitudes),
+        'nombre_inicio': puntos[0].get_nombre_display(),
+        'nombre_fin': puntos[-1].get_nombre_display(),
+        'longitud_trazado': sum(
+            distancia_km(latitudes[i], longitudes[i], latitudes[i + 1], longitudes[i + 1])
+            for i in range(len(puntos) - 1)
+        ),
+    }
+
+
+def centro_resumen(resumen):
+    """Centro {'lat', 'lng'} del mapa a partir de un resumen (dict o Ruta)"""
+    if isinstance(resumen, Ruta):
+        resumen = vars(resumen)
+    if resumen['centro_latitud'] is None:
+        return dict(CENTRO_POR_DEFECTO)
+    return {'lat': resumen['centro_latitud'], 'lng': resumen['centro_longitud']}
+
+
+def bounds_resumen(resumen):
+    """Límites del mapa a partir de un resumen (dict o Ruta), o None sin puntos"""
+    if isinstance(resumen, Ruta):
+        resumen = vars(resumen)
+    if resumen['limite_sur'] is None:
+        return None
+    return {
+        'north': resumen['limite_norte'],
+        'south': resumen['limite_sur'],
+        'east': resumen['limite_este'],
+        'west': resumen['limite_oeste'],
+    }
+
+
+def actualizar_resumen(ruta_id):
+    """
+    Recalcula y guarda el resumen de una ruta. La fila de la ruta queda
+    bloqueada hasta que se confirma la transacción en curso, para que dos
+    cambios simultáneos de sus puntos no guarden resúmenes mezclados
+    """
+    with transaction.atomic():
+        bloqueada = Ruta.objects.select_for_update().filter(pk=ruta_id).values_list(
+            'polilinea', flat=True
+        )
+        anterior = next(iter(bloqueada), None)
+        if anterior is None:
+            return
+        puntos = list(
+            PuntoRuta.objects.filter(ruta=ruta_id).select_related('lugar_turistico').order_by('orden')
+        )
+        polilineas = calcular_polilineas(puntos)
+        # update() no envía señales: el resumen no es un cambio de la ruta
+        Ruta.objects.filter(pk=ruta_id).update(**calcular_resumen(puntos), **polilineas)
+
+        # Las teselas del mapa muestran la línea guardada: se borran las que
+        # atravesaba la anterior y las que atraviesa la nueva
+        if polilineas['polilinea'] != anterior:
+            lineas = [decodificar_polilinea(anterior), decodificar_polilinea(polilineas['polilinea'])]
+            transaction.on_commit(partial(teselas.invalidar_lineas, [l for l in lineas if l]))
+
+
+# Rutas anotadas por los bloques resumenes_diferidos() activos de cada hilo
+_diferidos = threading.local()
+
+
+@contextmanager
+def resumenes_diferidos():
+    """
+    Agrupa los cambios de puntos de un bloque (p. ej. el inline del admin):
+    cada ruta afectada se recalcula una sola vez al salir del bloque, en la
+    misma transacción. Si el bloque falla no se recalcula nada.
+    """
+    pila = _diferidos.__dict__.setdefault('pila', [])
+    ids_rutas = set()
+    pila.append(ids_rutas)
+    try:
+        yield
+    finally:
+        pila.pop()
+    actualizar_resumenes(ids_rutas)
+
+
+def actualizar_resumenes(ids_rutas):
+    """
+    Recalcula el resumen de unas rutas dentro de la transacción en curso: si
+    falla, el cambio de los puntos tampoco se guarda. Dentro de
+    resumenes_diferidos() solo se anotan para recalcularlas al salir.
+    """
+    ids_rutas = set(ids_rutas) - {None}
+    if not ids_rutas:
+        return
+    pila = getattr(_diferidos, 'pila', None)
+    if pila:
+        pila[-1].update(ids_rutas)
+        return
+
+    # En orden, para que dos transacciones bloqueen las rutas en el mismo orden
+    for ruta_id in sorted(ids_rutas):
+        actualizar_resumen(ruta_id)
+    # Los listados de rutas y las comparaciones muestran el resumen, que se
+    # guarda sin save(): ya y al confirmar, como las demás invalidaciones
+    claves = {clave_modelo(Ruta)}
+    purgar_claves(claves)
+    transaction.on_commit(partial(purgar_claves, claves))
+    invalidar_comparaciones()
+
+
+def reconstruir_resumenes():
+    """Recalcula el resumen de todas las rutas; retorna cuántas se procesaron"""
+    total = 0
+    for ruta_id in Ruta.objects.values_list('pk', flat=True).iterator():
+        actualizar_resumen(ruta_id)
+        total += 1
+    return total
+
+
+# ========== COMPARACIÓN DE RUTAS ==========
+
+# Colores para diferenciar las rutas comparadas
+COLORES_COMPARACION = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
+
+# Generación (core/cache.py) de las comparaciones guardadas
+GENERACION_COMPARACION = 'rutas:comparacion'
+
+PREFIJO_COMPARACION = 'turismo:comparar_rutas'
+
+
+def get_max_rutas_comparar():
+    return getattr(settings, 'TURISMO_RUTAS_MAX_COMPARAR', 20)
+
+
+def get_timeout_comparacion():
+    """Tiempo de vida de una comparación guardada (se invalidan por generación)"""
+    return getattr(settings, 'TURISMO_RUTAS_COMPARACION_TIMEOUT', 300)
+
+
+def invalidar_comparaciones():
+    """Marca como obsoletas todas las comparaciones guardadas"""
+    # Ya y al confirmar, por si otra petición guardó una comparación con los
+    # datos anteriores mientras la transacción seguía abierta
+    incrementar_generacion(GENERACION_COMPARACION)
+    transaction.on_commit(partial(incrementar_generacion, GENERACION_COMPARACION))
+
+
+def _calcular_comparacion(ids):
+    rutas = list(Ruta.objects.filter(pk__in=ids))
+
+    # Todos los puntos de todas las rutas en una consulta, agrupados por ruta
+    puntos = PuntoRuta.objects.filter(ruta__in=ids).select_related(
+        'lugar_turistico__categoria'
+    ).order_by('ruta_id', 'orden')
+    puntos_por_ruta = {
+        ruta_id: list(grupo) for ruta_id, grupo in groupby(puntos, key=lambda punto: punto.ruta_id)
+    }
+
+    rutas_data = []
+    resumenes = []
+    for i, ruta in enumerate(rutas):
+        puntos_ruta = puntos_por_ruta.get(ruta.pk)
+        if not puntos_ruta:
+            continue
+        color = COLORES_COMPARACION[i % len(COLORES_COMPARACION)]
+        datos = DatosMapaRuta(ruta, puntos_ruta)
+        configuracion = datos.get_configuracion_mapa()
+        configuracion['color_ruta'] = color
+        rutas_data.append({
+            'id': ruta.id,
+            'nombre': ruta.nombre,
+            'slug': ruta.slug,
+            'config_mapa': configuracion,
+            'color': color,
+        })
+        resumenes.append((datos.total_puntos, datos.centro, datos.bounds))
+
+    # Centro y límites generales a partir de los de cada ruta (el centro
+    # ponderado por número de puntos es el promedio de todos los puntos)
+    centro_general = bounds_general = None
+    if resumenes:
+        total = sum(cantidad for cantidad, _, _ in resumenes)
+        centro_general = {
+            'lat': sum(cantidad * centro['lat'] for cantidad, centro, _ in resumenes) / total,
+            'lng': sum(cantidad * centro['lng'] for cantidad, centro, _ in resumenes) / total,
+        }
+        bounds_general = {
+            'north': max(bounds['north'] for _, _, bounds in resumenes),
+            'south': min(bounds['south'] for _, _, bounds in resumenes),
+            'east': max(bounds['east'] for _, _, bounds in resumenes),
+            'west': min(bounds['west'] for _, _, bounds in resumenes),
+        }
+
+    return {
+        'rutas': rutas_data,
+        'centro_general': centro_general,
+        'bounds_general': bounds_general,
+        'total_rutas': len(rutas_data),
+    }
+
+
+def comparar_rutas(ids):
+    """
+    Datos para mostrar varias rutas en un mapa: configuración de cada una y
+    centro y límites generales. Lee todos los puntos en una consulta y guarda
+    el resultado por conjunto de ids (sin importar el orden ni repetidos).
+    """
+    ids = sorted(set(ids))
+    generacion = obtener_generacion(GENERACION_COMPARACION)
+    clave = f"{PREFIJO_COMPARACION}:{generacion}:{','.join(map(str, ids))}"
+    datos = cache.get(clave)
+    if datos is None:
+        datos = _calcular_comparacion(ids)
+        cache.set(clave, datos, get_timeout_comparacion())
+    return datos
@@ -0,0 +1,354 @@
+# turismo/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from . import autocompletar, cercanias, contadores, marcadores, piramide, rutas, teselas
+from .models import Categoria, LugarTuristico, PuntoRuta, Ruta
+
+
+def invalidar_contadores_turismo(sender, **kwargs):
+    """Invalida los contadores cacheados cuando cambia un modelo contado"""
+    # Se espera al commit para que otra petición no vuelva a cachear
+    # valores de una transacción que todavía no es visible
+    transaction.on_commit(partial(contadores.invalidar_contadores, sender))
+
+
+# ========== CONTADORES DESNORMALIZADOS (ContadorTurismo) ==========
+
+def capturar_claves_contador(sender, instance, **kwargs):
+    """Guarda en la instancia las claves en las que contaba antes del cambio"""
+    if not contadores.usar_tabla():
+        return
+    if instance._state.adding or instance.pk is None:
+        instance._claves_contador = set()
+    else:
+        instance._claves_contador = contadores.claves_de_fila(sender, instance.pk)
+
+
+def actualizar_tabla_contadores(sender, instance, **kwargs):
+    """Aplica a ContadorTurismo la diferencia causada por un guardado"""
+    if not contadores.usar_tabla():
+        return
+    if sender in contadores.GRUPO_POR_MODELO:
+        actuales = contadores.claves_de_fila(sender, instance.pk)
+        contadores.aplicar_diferencia(getattr(instance, '_claves_contador', set()), actuales)
+        instance._claves_contador = actuales
+    else:
+        # Cambios en categorías (p. ej. el slug) afectan a grupos completos
+        for grupo in contadores.DEPENDENCIAS_GRUPOS[sender]:
+            contadores.guardar_en_tabla(contadores.calcular_grupo(grupo))
+
+
+def descontar_tabla_contadores(sender, instance, **kwargs):
+    """Descuenta de ContadorTurismo una fila eliminada"""
+    if contadores.usar_tabla():
+        contadores.aplicar_diferencia(getattr(instance, '_claves_contador', set()), set())
+
+
+for modelo in contadores.MODELOS_CONTADOS:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        invalidar_contadores_turismo, sender=modelo,
+        dispatch_uid=f'contadores_save_{nombre}'
+    )
+    post_delete.connect(
+        invalidar_contadores_turismo, sender=modelo,
+        dispatch_uid=f'contadores_delete_{nombre}'
+    )
+    post_save.connect(
+        actualizar_tabla_contadores, sender=modelo,
+        dispatch_uid=f'tabla_contadores_save_{nombre}'
+    )
+
+for modelo in contadores.GRUPO_POR_MODELO:
+    nombre = modelo._meta.model_name
+    pre_save.connect(
+        capturar_claves_contador, sender=modelo,
+        dispatch_uid=f'tabla_contadores_pre_save_{nombre}'
+    )
+    pre_delete.connect(
+        capturar_claves_contador, sender=modelo,
+        dispatch_uid=f'tabla_contadores_pre_delete_{nombre}'
+    )
+    post_delete.connect(
+        descontar_tabla_contadores, sender=modelo,
+        dispatch_uid=f'tabla_contadores_delete_{nombre}'
+    )
+
+
+# ========== MARCADORES DEL MAPA ==========
+
+def actualizar_marcador(sender, instance, **kwargs):
+    """Actualiza en la caché solo el marcador del objeto modificado"""
+    transaction.on_commit(partial(marcadores.actualizar_marcador, sender, instance.pk))
+
+
+def reconstruir_marcadores_categoria(sender, **kwargs):
+    """Un cambio de categoría afecta a todos los marcadores de su tipo"""
+    tipo = marcadores.DEPENDENCIAS_CATEGORIAS[sender]
+    transaction.on_commit(partial(marcadores.reconstruir_tipo, tipo))
+
+
+for modelo in marcadores.TIPO_POR_MODELO:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        actualizar_marcador, sender=modelo,
+        dispatch_uid=f'marcadores_save_{nombre}'
+    )
+    post_delete.connect(
+        actualizar_marcador, sender=modelo,
+        dispatch_uid=f'marcadores_delete_{nombre}'
+    )
+
+for modelo in marcadores.DEPENDENCIAS_CATEGORIAS:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        reconstruir_marcadores_categoria, sender=modelo,
+        dispatch_uid=f'marcadores_categoria_save_{nombre}'
+    )
+    post_delete.connect(
+        reconstruir_marcadores_categoria, sender=modelo,
+        dispatch_uid=f'marcadores_categoria_delete_{nombre}'
+    )
+
+
+# ========== ÍNDICE DE BÚSQUEDA RÁPIDA ==========
+
+def recargar_autocompletar(sender, instance, **kwargs):
+    """Obliga a todos los procesos a actualizar la entrada del objeto (o el grupo completo)"""
+    for grupo in autocompletar.DEPENDENCIAS_AUTOCOMPLETAR[sender]:
+        modelo_entradas = autocompletar.GRUPOS_AUTOCOMPLETAR[grupo][2][0]
+        pk = instance.pk if sender is modelo_entradas else autocompletar.TODO_EL_GRUPO
+        # Ya (para este proceso) y al confirmar (por si otro proceso leyó
+        # los datos anteriores mientras la transacción seguía abierta)
+        autocompletar.registrar_cambio(grupo, pk)
+        transaction.on_commit(partial(autocompletar.registrar_cambio, grupo, pk))
+
+
+for modelo in autocompletar.DEPENDENCIAS_AUTOCOMPLETAR:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        recargar_autocompletar, sender=modelo,
+        dispatch_uid=f'autocompletar_save_{nombre}'
+    )
+    post_delete.connect(
+        recargar_autocompletar, sender=modelo,
+        dispatch_uid=f'autocompletar_delete_{nombre}'
+    )
+
+
+# ========== POSICIÓN ANTERIOR DE LOS OBJETOS DEL MAPA ==========
+
+def capturar_posicion(sender, instance, **kwargs):
+    """Guarda en la instancia las coordenadas (y campos de visibilidad) anteriores al cambio"""
+    if instance._state.adding or instance.pk is None:
+        instance._posicion_anterior = None
+    else:
+        instance._posicion_anterior = sender.objects.filter(
+            pk=instance.pk
+        ).values_list(*piramide.campos_posicion(sender)).first()
+
+
+def posicion_actual(sender, instance):
+    return tuple(getattr(instance, campo) for campo in piramide.campos_posicion(sender))
+
+
+for modelo in marcadores.TIPO_POR_MODELO:
+    pre_save.connect(
+        capturar_posicion, sender=modelo,
+        dispatch_uid=f'posicion_pre_save_{modelo._meta.model_name}'
+    )
+
+
+# ========== LISTAS DE CERCANÍA ==========
+
+def actualizar_cercanias(sender, instance, created, **kwargs):
+    """Recalcula las listas afectadas si el objeto es nuevo o se movió"""
+    anterior = getattr(instance, '_posicion_anterior', None)
+    if created or anterior is None or anterior[:2] != (instance.latitud, instance.longitud):
+        transaction.on_commit(partial(cercanias.actualizar_cercanias, sender, instance.pk))
+
+
+def capturar_listas_cercania(sender, instance, **kwargs):
+    """Antes de borrar, anota las listas que incluían el objeto (sus filas se borran en cascada)"""
+    instance._listas_cercania = cercanias.listas_con(sender, instance.pk)
+
+
+def quitar_de_cercanias(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        cercanias.actualizar_cercanias, sender, instance.pk,
+        getattr(instance, '_listas_cercania', ())
+    ))
+
+
+for modelo in cercanias.SENTIDO_POR_MODELO:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        actualizar_cercanias, sender=modelo,
+        dispatch_uid=f'cercanias_save_{nombre}'
+    )
+    pre_delete.connect(
+        capturar_listas_cercania, sender=modelo,
+        dispatch_uid=f'cercanias_pre_delete_{nombre}'
+    )
+    post_delete.connect(
+        quitar_de_cercanias, sender=modelo,
+        dispatch_uid=f'cercanias_delete_{nombre}'
+    )
+
+
+# ========== PIRÁMIDE DE GRUPOS DEL MAPA ==========
+
+def actualizar_piramide(sender, instance, created, **kwargs):
+    """Actualiza las celdas de la posición anterior y la actual si cambió"""
+    anterior = getattr(instance, '_posicion_anterior', None)
+    if created or anterior != posicion_actual(sender, instance):
+        transaction.on_commit(partial(
+            piramide.actualizar_objeto, sender, instance.pk, anterior and anterior[:2]
+        ))
+
+
+def quitar_de_piramide(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        piramide.actualizar_objeto, sender, instance.pk, (instance.latitud, instance.longitud)
+    ))
+
+
+for modelo in marcadores.TIPO_POR_MODELO:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        actualizar_piramide, sender=modelo,
+        dispatch_uid=f'piramide_save_{nombre}'
+    )
+    post_delete.connect(
+        quitar_de_piramide, sender=modelo,
+        dispatch_uid=f'piramide_delete_{nombre}'
+    )
+
+
+# ========== TESELAS GEOJSON DEL MAPA ==========
+
+def invalidar_teselas_marcador(sender, instance, **kwargs):
+    """Borra las teselas de la posición anterior y la actual del objeto"""
+    anterior = getattr(instance, '_posicion_anterior', None)
+    puntos = [(instance.latitud, instance.longitud)]
+    if anterior:
+        puntos.append(anterior[:2])
+    transaction.on_commit(partial(teselas.invalidar_puntos, puntos))
+
+
+def invalidar_teselas_categoria(sender, **kwargs):
+    transaction.on_commit(teselas.invalidar_todas)
+
+
+def invalidar_teselas_ruta(sender, instance, **kwargs):
+    """El nombre o la dificultad de la ruta aparecen en las teselas de su línea"""
+    # Los cambios de la línea los invalida el recálculo del resumen (rutas.py)
+    transaction.on_commit(partial(teselas.invalidar_ruta, instance.pk))
+
+
+def capturar_linea_ruta(sender, instance, **kwargs):
+    """Antes de borrar, anota la línea guardada de la ruta (sus puntos se borran en cascada)"""
+    instance._linea_ruta = teselas.linea_guardada(instance.pk)
+
+
+def quitar_ruta_de_teselas(sender, instance, **kwargs):
+    linea = getattr(instance, '_linea_ruta', None)
+    if linea:
+        transaction.on_commit(partial(teselas.invalidar_lineas, [linea]))
+
+
+for modelo in marcadores.TIPO_POR_MODELO:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        invalidar_teselas_marcador, sender=modelo,
+        dispatch_uid=f'teselas_save_{nombre}'
+    )
+    post_delete.connect(
+        invalidar_teselas_marcador, sender=modelo,
+        dispatch_uid=f'teselas_delete_{nombre}'
+    )
+
+for modelo in marcadores.DEPENDENCIAS_CATEGORIAS:
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        invalidar_teselas_categoria, sender=modelo,
+        dispatch_uid=f'teselas_categoria_save_{nombre}'
+    )
+    post_delete.connect(
+        invalidar_teselas_categoria, sender=modelo,
+        dispatch_uid=f'teselas_categoria_delete_{nombre}'
+    )
+
+post_save.connect(invalidar_teselas_ruta, sender=Ruta, dispatch_uid='teselas_save_ruta')
+pre_delete.connect(capturar_linea_ruta, sender=Ruta, dispatch_uid='teselas_pre_delete_ruta')
+post_delete.connect(quitar_ruta_de_teselas, sender=Ruta, dispatch_uid='teselas_delete_ruta')
+
+
+# ========== RESUMEN DE LA GEOMETRÍA DE LAS RUTAS ==========
+
+def capturar_punto_ruta(sender, instance, **kwargs):
+    """Guarda en el punto la ruta a la que pertenecía antes del cambio"""
+    instance._ruta_anterior = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._ruta_anterior = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('ruta_id', flat=True).first()
+
+
+def actualizar_resumen_ruta(sender, instance, **kwargs):
+    """Un punto creado, movido, reordenado o eliminado cambia el resumen de su ruta"""
+    # Al borrar una ruta sus puntos se borran en cascada: no hay resumen que guardar
+    origen = kwargs.get('origin')
+    if isinstance(origen, Ruta) or getattr(origen, 'model', None) is Ruta:
+        return
+    rutas.actualizar_resumenes({instance.ruta_id, getattr(instance, '_ruta_anterior', None)})
+
+
+def capturar_rutas_lugar(sender, instance, **kwargs):
+    """Antes de borrar un lugar, anota las rutas que lo usan (sus puntos quedan sin lugar)"""
+    instance._rutas_lugar = set(
+        PuntoRuta.objects.filter(lugar_turistico=instance.pk).values_list('ruta_id', flat=True)
+    )
+
+
+def actualizar_resumen_rutas_lugar(sender, instance, created=False, **kwargs):
+    """El nombre de un lugar puede ser el inicio o el fin de las rutas que pasan por él"""
+    if created:
+        return
+    ids_rutas = getattr(instance, '_rutas_lugar', None)
+    if ids_rutas is None:
+        ids_rutas = set(
+            PuntoRuta.objects.filter(lugar_turistico=instance.pk).values_list('ruta_id', flat=True)
+        )
+    rutas.actualizar_resumenes(ids_rutas)
+
+
+pre_save.connect(capturar_punto_ruta, sender=PuntoRuta, dispatch_uid='resumen_ruta_pre_save_puntoruta')
+post_save.connect(actualizar_resumen_ruta, sender=PuntoRuta, dispatch_uid='resumen_ruta_save_puntoruta')
+post_delete.connect(actualizar_resumen_ruta, sender=PuntoRuta, dispatch_uid='resumen_ruta_delete_puntoruta')
+pre_delete.connect(capturar_rutas_lugar, sender=LugarTuristico, dispatch_uid='resumen_ruta_pre_delete_lugar')
+post_save.connect(actualizar_resumen_rutas_lugar, sender=LugarTuristico, dispatch_uid='resumen_ruta_save_lugar')
+post_delete.connect(actualizar_resumen_rutas_lugar, sender=LugarTuristico, dispatch_uid='resumen_ruta_delete_lugar')
+
+
+# ========== COMPARACIONES DE RUTAS GUARDADAS ==========
+
+def invalidar_comparaciones_rutas(sender, **kwargs):
+    """Los datos de la ruta o las categorías de sus lugares aparecen en las comparaciones"""
+    rutas.invalidar_comparaciones()
+
+
+for modelo in (Ruta, Categoria):
+    nombre = modelo._meta.model_name
+    post_save.connect(
+        invalidar_comparaciones_rutas, sender=modelo,
+        dispatch_uid=f'comparaciones_rutas_save_{nombre}'
+    )
+    post_delete.connect(
+        invalidar_comparaciones_rutas, sender=modelo,
+        dispatch_uid=f'comparaciones_rutas_delete_{nombre}'
+    )
@@ -0,0 +1,170 @@
+# turismo/teselas.py
+# Teselas GeoJSON z/x/y con las capas de los mapas (lugares,
+# establecimientos, actividades y rutas), para que el navegador y una CDN
+# guarden los datos del mapa por tesela. Se generan con el índice espacial
+# (core/geo.py), se guardan en la caché de disco TURISMO_TESELAS_CACHE y al
+# cambiar un objeto solo se borran las teselas que lo contienen (para una
+# ruta, las que atraviesa su línea anterior o la nueva).
+
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.cache import incrementar_generacion, obtener_generacion
+from core.geo import (
+    decodificar_polilinea, filtrar_rectangulo, limites_tesela, tesela, teselas_linea
+)
+from .marcadores import TIPOS_MARCADOR
+from .models import Ruta
+
+# Generación (core/cache.py) de todas las teselas, para los cambios que
+# afectan a capas completas (p. ej. el nombre de una categoría)
+GENERACION_TESELAS = 'teselas'
+
+# Zoom máximo que se sirve
+ZOOM_MAXIMO = 22
+
+# Con más teselas que borrar se invalidan todas (cambiando la generación)
+MAX_TESELAS_INVALIDAR = 1024
+
+
+def get_cache():
+    return caches[getattr(settings, 'TURISMO_TESELAS_CACHE', 'teselas')]
+
+
+def get_zoom_cache():
+    """Zoom máximo de las teselas que se guardan en caché"""
+    return getattr(settings, 'TURISMO_TESELAS_ZOOM_CACHE', 18)
+
+
+def get_max_age():
+    """Segundos que el navegador o la CDN pueden reutilizar una tesela"""
+    return getattr(settings, 'TURISMO_TESELAS_MAX_AGE', 300)
+
+
+def clave_tesela(zoom, x, y, generacion):
+    return f'turismo:tesela:{generacion}:{zoom}:{x}:{y}'
+
+
+# ========== GENERACIÓN ==========
+
+def _feature_marcador(marcador):
+    propiedades = dict(marcador)
+    latitud = propiedades.pop('latitud')
+    longitud = propiedades.pop('longitud')
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [longitud, latitud]},
+        'properties': propiedades,
+    }
+
+
+def _features_rutas(zoom, x, y):
+    """Líneas (las guardadas en el resumen) de las rutas que atraviesan la tesela"""
+    sur, oeste, norte, este = limites_tesela(zoom, x, y)
+    # El rectángulo guardado en la ruta descarta casi todas en la consulta
+    rutas = Ruta.objects.filter(
+        total_puntos__gte=2,
+        limite_sur__lte=norte, limite_norte__gte=sur,
+        limite_oeste__lte=este, limite_este__gte=oeste,
+    ).only('nombre', 'slug', 'dificultad', 'polilinea')
+
+    features = []
+    for ruta in rutas:
+        linea = decodificar_polilinea(ruta.polilinea)
+        # Solo la incluyen las teselas que atraviesa la línea: son las que
+        # se borran cuando cambia (invalidar_lineas)
+        if (x, y) not in teselas_linea(linea, zoom):
+            continue
+        features.append({
+            'type': 'Feature',
+            'geometry': {
+                'type': 'LineString',
+                'coordinates': [[lng, lat] for lat, lng in linea],
+            },
+            'properties': {
+                'tipo': 'ruta',
+                'nombre': ruta.nombre,
+                'dificultad': ruta.dificultad,
+                'url': ruta.get_absolute_url(),
+            },
+        })
+    return features
+
+
+def generar_tesela(zoom, x, y):
+    """GeoJSON (FeatureCollection ya serializado) de la tesela z/x/y"""
+    sur, oeste, norte, este = limites_tesela(zoom, x, y)
+    features = []
+    for _, consulta, constructor in TIPOS_MARCADOR.values():
+        features.extend(
+            _feature_marcador(constructor(objeto))
+            for objeto in filtrar_rectangulo(consulta(), sur, oeste, norte, este)
+        )
+    features.extend(_features_rutas(zoom, x, y))
+    return json.dumps(
+        {'type': 'FeatureCollection', 'features': features},
+        separators=(',', ':'),
+    )
+
+
+def obtener_tesela(zoom, x, y):
+    """Retorna la tesela de la caché de disco, generándola si no está"""
+    if zoom > get_zoom_cache():
+        return generar_tesela(zoom, x, y)
+
+    cache = get_cache()
+    clave = clave_tesela(zoom, x, y, obtener_generacion(GENERACION_TESELAS))
+    contenido = cache.get(clave)
+    if contenido is None:
+        contenido = generar_tesela(zoom, x, y)
+        cache.set(clave, contenido)
+    return contenido
+
+
+# ========== INVALIDACIÓN ==========
+
+def invalidar_puntos(puntos):
+    """Borra, en todos los zooms en caché, las teselas que contienen unos puntos (lat, lng)"""
+    generacion = obtener_generacion(GENERACION_TESELAS)
+    claves = {
+        clave_tesela(zoom, *tesela(lat, lng, zoom), generacion)
+        for lat, lng in puntos if lat is not None and lng is not None
+        for zoom in range(get_zoom_cache() + 1)
+    }
+    get_cache().delete_many(list(claves))
+
+
+def invalidar_lineas(lineas):
+    """
+    Borra, en todos los zooms en caché, las teselas que atraviesa alguna de
+    las líneas de (lat, lng) (o todas si son demasiadas)
+    """
+    claves = set()
+    for zoom in range(get_zoom_cache() + 1):
+        for linea in lineas:
+            claves.update((zoom, x, y) for x, y in teselas_linea(linea, zoom))
+        if len(claves) > MAX_TESELAS_INVALIDAR:
+            invalidar_todas()
+            return
+
+    generacion = obtener_generacion(GENERACION_TESELAS)
+    get_cache().delete_many([clave_tesela(zoom, x, y, generacion) for zoom, x, y in claves])
+
+
+def linea_guardada(ruta_id):
+    """Línea (lat, lng) guardada en el resumen de una ruta (vacía si no existe)"""
+    polilinea = Ruta.objects.filter(pk=ruta_id).values_list('polilinea', flat=True).first()
+    return decodificar_polilinea(polilinea) if polilinea else []
+
+
+def invalidar_ruta(ruta_id):
+    """Borra las teselas de la línea de una ruta (p. ej. si cambia su nombre)"""
+    linea = linea_guardada(ruta_id)
+    if linea:
+        invalidar_lineas([linea])
+
+
+def invalidar_todas():
+    incrementar_generacion(GENERACION_TESELAS)
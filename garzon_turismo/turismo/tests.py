@@ -1,18 +1,33 @@
 # turismo/tests.py
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from django.core.management import call_command
 from django.urls import reverse
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
 from decimal import Decimal
+import json
 
 from .models import (
     Categoria, LugarTuristico, Imagen, Ruta, PuntoRuta, 
     Establecimiento, Evento, Transporte, Artesania, 
-    ActividadFisica, ImagenArtesania, ImagenActividadFisica
+    ActividadFisica, ImagenArtesania, ImagenActividadFisica, ContadorTurismo, Cercania,
+    GrupoMarcadores, CategoriaFotografia, Fotografia
 )
+from . import contadores, marcadores, rutas
+from .cercanias import obtener_cercanos
+from .context_processors import contadores_turismo
+from core.busqueda import buscar, contar_por_tipo
+from core.cache import obtener_generacion
+from core.geo import decodificar_polilinea, tesela, teselas_linea
+from core.models import DocumentoBusqueda, GrupoSinonimos
 
 # ========== HELPER FUNCTIONS ==========
 
@@ -682,3 +697,1026 @@ class IntegracionTest(TestCase):
         content = response.content.decode()
         self.assertIn('Estrecho del Magdalena', content)
         self.assertIn('Senderismo al Estrecho', content)
+
+# ========== TESTS DE CONTADORES ==========
+
+class ContadoresTurismoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        LugarTuristico.objects.create(
+            nombre="Lugar Contado",
+            categoria=self.categoria,
+            descripcion="Test",
+            direccion="Test",
+            destacado=True
+        )
+        Transporte.objects.create(
+            nombre="Bus Contado",
+            tipo="bus",
+            descripcion="Test",
+            origen="A",
+            destino="B",
+            duracion_estimada="1 hora"
+        )
+        ahora = timezone.now()
+        Evento.objects.create(
+            titulo="Evento Activo",
+            descripcion="Test",
+            fecha_inicio=ahora - timedelta(days=1),
+            fecha_fin=ahora + timedelta(days=1),
+            lugar="Test"
+        )
+        Evento.objects.create(
+            titulo="Evento Terminado",
+            descripcion="Test",
+            fecha_inicio=ahora - timedelta(days=10),
+            fecha_fin=ahora - timedelta(days=9),
+            lugar="Test"
+        )
+    
+    def test_una_consulta_por_modelo(self):
+        """Test que los contadores se calculan con una consulta por grupo"""
+        grupos = len(contadores.GRUPOS_CONTADORES) + 1
+        with self.assertNumQueries(grupos):
+            valores = contadores.obtener_contadores()
+        
+        self.assertEqual(valores['destinos'], 1)
+        self.assertEqual(valores['lugares_destacados'], 1)
+        self.assertEqual(valores['buses'], 1)
+        self.assertEqual(valores['taxis'], 0)
+        self.assertEqual(valores['eventos'], 2)
+        self.assertEqual(valores['eventos_activos'], 1)
+    
+    def test_contadores_cacheados(self):
+        """Test que la segunda lectura no consulta la base de datos"""
+        contadores.obtener_contadores()
+        with self.assertNumQueries(0):
+            contadores.obtener_contadores()
+    
+    def test_invalidacion_por_senal(self):
+        """Test que guardar un modelo contado invalida su grupo"""
+        contadores.obtener_contadores()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LugarTuristico.objects.create(
+                nombre="Otro Lugar",
+                categoria=self.categoria,
+                descripcion="Test",
+                direccion="Test"
+            )
+        
+        # Solo se recalcula el grupo de lugares
+        with self.assertNumQueries(1):
+            valores = contadores.obtener_contadores()
+        self.assertEqual(valores['destinos'], 2)
+    
+    def test_context_processor_perezoso(self):
+        """Test que el context processor solo consulta los contadores que se leen"""
+        request = RequestFactory().get('/')
+        
+        with self.assertNumQueries(0):
+            contexto = contadores_turismo(request)
+        
+        # Leer un contador calcula solo su grupo
+        with self.assertNumQueries(1):
+            self.assertEqual(contexto['contadores']['buses'], 1)
+        
+        # Otro contador del mismo grupo ya está memorizado en la petición
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(contexto['contadores']['taxis'], 0)
+            self.assertIs(contadores_turismo(request)['contadores'], contexto['contadores'])
+
+
+@override_settings(TURISMO_CONTADORES_DESNORMALIZADOS=True)
+class ContadoresDesnormalizadosTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bus = Transporte.objects.create(
+            nombre="Bus Contado",
+            tipo="bus",
+            descripcion="Test",
+            origen="A",
+            destino="B",
+            duracion_estimada="1 hora"
+        )
+        call_command('reconcile_contadores', stdout=StringIO())
+    
+    def valor(self, clave):
+        return ContadorTurismo.objects.get(clave=clave).valor
+    
+    def test_incrementos_por_senal(self):
+        """Test que guardar y eliminar actualiza la tabla sin recalcular"""
+        self.assertEqual(self.valor('buses'), 1)
+        
+        self.bus.tipo = 'taxi'
+        self.bus.save()
+        self.assertEqual(self.valor('buses'), 0)
+        self.assertEqual(self.valor('taxis'), 1)
+        self.assertEqual(self.valor('transportes'), 1)
+        
+        self.bus.delete()
+        self.assertEqual(self.valor('taxis'), 0)
+        self.assertEqual(self.valor('transportes'), 0)
+    
+    def test_lectura_desde_tabla(self):
+        """Test que los contadores se leen de la tabla"""
+        ContadorTurismo.objects.filter(clave='buses').update(valor=7)
+        self.assertEqual(contadores.obtener_grupo_de_clave('buses')['buses'], 7)
+    
+    def test_reconcile_reporta_diferencias(self):
+        """Test que el comando reporta y corrige las diferencias"""
+        ContadorTurismo.objects.filter(clave='buses').update(valor=5)
+        
+        salida = StringIO()
+        call_command('reconcile_contadores', '--dry-run', stdout=salida)
+        self.assertIn('buses: almacenado=5 real=1', salida.getvalue())
+        self.assertEqual(self.valor('buses'), 5)
+        
+        call_command('reconcile_contadores', stdout=StringIO())
+        self.assertEqual(self.valor('buses'), 1)
+
+
+# ========== TESTS DE MARCADORES DEL MAPA ==========
+
+class MarcadoresMapaTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        self.lugar = LugarTuristico.objects.create(
+            nombre="Mirador",
+            categoria=self.categoria,
+            descripcion="Test",
+            direccion="Test",
+            latitud=2.19,
+            longitud=-75.62
+        )
+        Establecimiento.objects.create(
+            nombre="Hotel Centro",
+            tipo="hotel",
+            descripcion="Test",
+            direccion="Test",
+            telefono="123",
+            latitud=2.2,
+            longitud=-75.6
+        )
+    
+    def test_consultas_fijas(self):
+        """Test que los marcadores se construyen con una consulta por tipo"""
+        with self.assertNumQueries(len(marcadores.TIPOS_MARCADOR)):
+            datos = json.loads(marcadores.obtener_marcadores_json('mapa_general'))
+        self.assertEqual([m['tipo'] for m in datos], ['lugar', 'establecimiento'])
+        self.assertEqual(datos[0]['categoria'], "Parques")
+        
+        with self.assertNumQueries(0):
+            marcadores.obtener_marcadores_json('home')
+            marcadores.obtener_marcadores_json('mapa')
+    
+    def test_actualizacion_incremental(self):
+        """Test que guardar un lugar solo reconstruye su marcador"""
+        marcadores.obtener_marcadores_json('mapa_general')
+        self.lugar.nombre = "Mirador Renovado"
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.lugar.save()
+        # Al confirmar solo se consulta el lugar modificado
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        
+        with self.assertNumQueries(0):
+            datos = json.loads(marcadores.obtener_marcadores_json('home'))
+        self.assertEqual(datos[0]['nombre'], "Mirador Renovado")
+    
+    def test_tipos_en_entradas_separadas(self):
+        """Test que cada tipo se guarda aparte y una actualización sin base no pisa otra"""
+        marcadores.obtener_marcadores_json('mapa_general')
+        with self.captureOnCommitCallbacks(execute=True):
+            Establecimiento.objects.filter(nombre="Hotel Centro").get().save()
+        # Sin la entrada anterior del tipo (otra actualización aún no la
+        # escribió) no se guarda una copia parcial: se reconstruye al leer
+        generacion = obtener_generacion(marcadores.nombre_generacion('lugar'))
+        cache.delete(marcadores.clave_tipo('lugar', generacion))
+        self.lugar.nombre = "Mirador Renovado"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugar.save()
+        
+        # Solo se vuelve a consultar el tipo de los lugares
+        with self.assertNumQueries(1):
+            datos = json.loads(marcadores.obtener_marcadores_json('mapa_general'))
+        self.assertEqual(
+            [m['nombre'] for m in datos], ["Mirador Renovado", "Hotel Centro"]
+        )
+    
+    def test_eliminar_quita_el_marcador(self):
+        """Test que eliminar un lugar lo quita de los marcadores guardados"""
+        marcadores.obtener_marcadores_json('mapa_general')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugar.delete()
+        self.assertEqual(marcadores.obtener_total_marcadores('mapa_general'), 1)
+
+
+class MarcadoresAreaVisibleTest(TestCase):
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        # Dos lugares a unos 150 m entre sí en el centro y uno en Neiva;
+        # la pirámide se actualiza al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            for nombre, lat, lng in [
+                ("Parque Principal", 2.1964, -75.6278),
+                ("Catedral", 2.1975, -75.6290),
+                ("Malecón de Neiva", 2.9273, -75.2819),
+            ]:
+                LugarTuristico.objects.create(
+                    nombre=nombre, categoria=self.categoria, descripcion="Test",
+                    direccion="Test", latitud=lat, longitud=lng
+                )
+        self.url = reverse('turismo:api_mapa_marcadores')
+        self.bbox_garzon = '-75.70,2.15,-75.55,2.25'
+    
+    def test_solo_area_visible(self):
+        """Test que solo se devuelven los marcadores dentro del área"""
+        response = self.client.get(self.url, {'bbox': self.bbox_garzon, 'zoom': 18})
+        datos = response.json()
+        self.assertEqual(
+            sorted(m['nombre'] for m in datos['marcadores']),
+            ["Catedral", "Parque Principal"]
+        )
+        self.assertEqual(datos['grupos'], [])
+        self.assertEqual(datos['conteos'], {'lugar': 2, 'actividad': 0, 'establecimiento': 0})
+    
+    def test_agrupa_en_zoom_bajo(self):
+        """Test que los marcadores cercanos se agrupan en zooms bajos"""
+        response = self.client.get(self.url, {'bbox': '-76,2,-75,3', 'zoom': 12, 'tipos': 'lugar'})
+        datos = response.json()
+        self.assertEqual([m['nombre'] for m in datos['marcadores']], ["Malecón de Neiva"])
+        self.assertEqual(len(datos['grupos']), 1)
+        self.assertEqual(datos['grupos'][0]['total'], 2)
+        self.assertEqual(datos['grupos'][0]['conteos'], {'lugar': 2})
+    
+    def test_niveles_fuera_de_la_piramide(self):
+        """Test que por debajo del nivel mínimo se juntan celdas y por encima del máximo no se agrupa"""
+        datos = self.client.get(self.url, {'bbox': '-80,0,-70,5', 'zoom': 5}).json()
+        self.assertEqual(datos['marcadores'], [])
+        self.assertEqual([g['total'] for g in datos['grupos']], [3])
+        
+        datos = self.client.get(self.url, {'bbox': '-75.63,2.196,-75.62,2.197', 'zoom': 21}).json()
+        self.assertEqual([m['nombre'] for m in datos['marcadores']], ["Parque Principal"])
+    
+    def test_actualizacion_incremental(self):
+        """Test que mover, crear y borrar objetos deja la pirámide igual que reconstruirla"""
+        neiva = LugarTuristico.objects.get(nombre="Malecón de Neiva")
+        with self.captureOnCommitCallbacks(execute=True):
+            neiva.latitud, neiva.longitud = 2.1970, -75.6285
+            neiva.save()
+            Establecimiento.objects.create(
+                nombre="Hotel Centro", tipo="hotel", descripcion="Test",
+                direccion="Test", telefono="123", latitud=2.1968, longitud=-75.6281
+            )
+            LugarTuristico.objects.get(nombre="Catedral").delete()
+        
+        campos = ('zoom', 'tipo', 'x', 'y', 'total', 'objeto_id')
+        incremental = sorted(GrupoMarcadores.objects.values_list(*campos))
+        call_command('rebuild_piramide_mapa', stdout=StringIO())
+        self.assertEqual(sorted(GrupoMarcadores.objects.values_list(*campos)), incremental)
+        
+        datos = self.client.get(self.url, {'bbox': self.bbox_garzon, 'zoom': 12}).json()
+        self.assertEqual(datos['grupos'][0]['conteos'], {'lugar': 2, 'establecimiento': 1})
+    
+    def test_parametros_invalidos(self):
+        """Test que un área, zoom o tipo inválidos responden 400"""
+        for parametros in [
+            {'zoom': 12},
+            {'bbox': '1,2,3', 'zoom': 12},
+            {'bbox': '-75,3,-76,2', 'zoom': 12},
+            {'bbox': self.bbox_garzon, 'zoom': 12, 'tipos': 'ruta'},
+        ]:
+            self.assertEqual(self.client.get(self.url, parametros).status_code, 400)
+    
+    def test_pagina_sin_marcadores(self):
+        """Test que el mapa general no incluye los marcadores en la página"""
+        response = self.client.get(reverse('turismo:mapa'))
+        self.assertNotIn('marcadores_json', response.context)
+        self.assertEqual(response.context['total_marcadores'], 3)
+        self.assertContains(response, self.url)
+
+
+
+@override_settings(TURISMO_TESELAS_CACHE='default')
+class TeselasTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugar = LugarTuristico.objects.create(
+                nombre="Parque Principal", categoria=self.categoria, descripcion="Test",
+                direccion="Test", latitud=2.1964, longitud=-75.6278
+            )
+            LugarTuristico.objects.create(
+                nombre="Malecón de Neiva", categoria=self.categoria, descripcion="Test",
+                direccion="Test", latitud=2.9273, longitud=-75.2819
+            )
+            self.ruta = Ruta.objects.create(
+                nombre="Ruta Centro", descripcion="Test", duracion_estimada="1 hora",
+                distancia=Decimal('2.00'), dificultad="facil"
+            )
+            for orden, (lat, lng) in enumerate([(2.1950, -75.6300), (2.1980, -75.6250)], 1):
+                PuntoRuta.objects.create(
+                    ruta=self.ruta, nombre=f"Punto {orden}", orden=orden, latitud=lat, longitud=lng
+                )
+        self.zoom = 14
+        self.x, self.y = tesela(2.1964, -75.6278, self.zoom)
+    
+    def obtener(self, zoom=None, x=None, y=None):
+        return self.client.get(reverse('turismo:api_tesela', args=[
+            zoom if zoom is not None else self.zoom,
+            x if x is not None else self.x,
+            y if y is not None else self.y,
+        ]))
+    
+    def nombres(self, response):
+        return sorted(f['properties']['nombre'] for f in json.loads(response.content)['features'])
+    
+    def test_contenido_de_la_tesela(self):
+        """Test que la tesela tiene los puntos y líneas que toca, con cabeceras de caché"""
+        response = self.obtener()
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(self.nombres(response), ["Parque Principal", "Ruta Centro"])
+        
+        features = {f['properties']['nombre']: f for f in json.loads(response.content)['features']}
+        self.assertEqual(features["Parque Principal"]['geometry']['coordinates'], [-75.6278, 2.1964])
+        self.assertEqual(features["Ruta Centro"]['geometry']['type'], 'LineString')
+        
+        # Con zoom bajo la tesela incluye también Neiva
+        self.assertIn("Malecón de Neiva", self.nombres(self.obtener(5, *tesela(2.1964, -75.6278, 5))))
+    
+    def test_cache_e_invalidacion(self):
+        """Test que la tesela se lee de la caché y solo se borra al cambiar sus objetos"""
+        self.obtener()
+        with self.assertNumQueries(0):
+            self.obtener()
+        
+        # Un objeto de otra tesela no la invalida
+        with self.captureOnCommitCallbacks(execute=True):
+            neiva = LugarTuristico.objects.get(nombre="Malecón de Neiva")
+            neiva.nombre = "Malecón"
+            neiva.save()
+        with self.assertNumQueries(0):
+            self.obtener()
+        
+        # Mover un lugar borra la tesela de la que sale
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugar.latitud, self.lugar.longitud = 2.9270, -75.2810
+            self.lugar.save()
+        self.assertEqual(self.nombres(self.obtener()), ["Ruta Centro"])
+        
+        # Borrar la ruta borra las teselas de su línea
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ruta.delete()
+        self.assertEqual(self.nombres(self.obtener()), [])
+    
+    def test_ruta_solo_en_las_teselas_de_su_linea(self):
+        """Test que cambiar la línea solo borra las teselas que atraviesa, no todo su rectángulo"""
+        zoom = 18
+        linea = [(2.1950, -75.6300), (2.1980, -75.6250)]
+        de_la_linea = tesela(2.1950, -75.6300, zoom)
+        # Esquina noroeste del rectángulo de la ruta: la diagonal no pasa por ella
+        esquina = tesela(2.1980, -75.6300, zoom)
+        self.assertNotIn(esquina, teselas_linea(linea, zoom))
+        self.assertEqual(self.nombres(self.obtener(zoom, *esquina)), [])
+        self.assertEqual(self.nombres(self.obtener(zoom, *de_la_linea)), ["Ruta Centro"])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            punto = self.ruta.puntos.get(orden=2)
+            punto.latitud, punto.longitud = 2.1985, -75.6245
+            punto.save()
+        with self.assertNumQueries(0):
+            self.obtener(zoom, *esquina)
+        response = self.obtener(zoom, *de_la_linea)
+        linea_nueva = json.loads(response.content)['features'][0]['geometry']['coordinates']
+        self.assertEqual(linea_nueva[-1], [-75.6245, 2.1985])
+    
+    def test_tesela_fuera_de_rango(self):
+        """Test que una tesela inexistente responde 404"""
+        self.assertEqual(self.obtener(zoom=2, x=4, y=0).status_code, 404)
+        self.assertEqual(self.obtener(zoom=23, x=0, y=0).status_code, 404)
+
+# ========== TESTS DEL ÍNDICE DE BÚSQUEDA ==========
+
+class IndiceBusquedaTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        self.lugar = LugarTuristico.objects.create(
+            nombre="Parque Principal de Garzón",
+            categoria=self.categoria,
+            descripcion="Plaza central con catedral",
+            direccion="Centro"
+        )
+        self.transporte = Transporte.objects.create(
+            nombre="Bus Turístico",
+            tipo="bus",
+            descripcion="Transporte para turistas",
+            origen="Garzón",
+            destino="San Agustín",
+            duracion_estimada="2 horas"
+        )
+    
+    def test_senales_mantienen_el_indice(self):
+        """Test que crear, modificar y eliminar objetos actualiza los documentos"""
+        self.assertEqual(DocumentoBusqueda.objects.count(), 2)
+        
+        self.categoria.nombre = "Plazas"
+        self.categoria.save()
+        self.assertEqual(DocumentoBusqueda.objects.get(tipo='lugar').categoria, "Plazas")
+        
+        # Un transporte no disponible deja de ser buscable
+        self.transporte.disponible = False
+        self.transporte.save()
+        self.assertFalse(DocumentoBusqueda.objects.filter(tipo='transporte').exists())
+        
+        self.lugar.delete()
+        self.assertEqual(DocumentoBusqueda.objects.count(), 0)
+    
+    def test_contador_de_vistas_no_reindexa(self):
+        """Test que sumar una vista a una foto no toca su documento ni la caché de búsquedas"""
+        foto = Fotografia.objects.create(
+            titulo="Atardecer en Garzón",
+            imagen=crear_imagen_prueba(),
+            categoria=CategoriaFotografia.objects.create(nombre="Paisajes"),
+        )
+        self.assertTrue(DocumentoBusqueda.objects.filter(tipo='fotografia').exists())
+        
+        with patch('core.busqueda.indexar') as indexar, \
+                patch('core.busqueda.invalidar_ambito') as invalidar:
+            foto.incrementar_vistas()
+        indexar.assert_not_called()
+        invalidar.assert_not_called()
+        
+        foto.titulo = "Amanecer en Garzón"
+        foto.save(update_fields=['titulo', 'vistas'])
+        self.assertEqual(DocumentoBusqueda.objects.get(tipo='fotografia').nombre, "Amanecer en Garzón")
+    
+    def test_busqueda_sin_tildes_y_por_prefijo(self):
+        """Test que 'garzon' encuentra 'Garzón' y 'turis' encuentra 'Turístico'"""
+        self.assertEqual(contar_por_tipo(buscar("garzon")), {'lugar': 1, 'transporte': 1})
+        self.assertEqual([d.nombre for d in buscar("turis bus")], ["Bus Turístico"])
+        self.assertFalse(buscar("catedral inexistente").exists())
+    
+    def test_vista_pagina_en_la_base_de_datos(self):
+        """Test que la vista solo consulta la página pedida y los totales"""
+        response = self.client.get(reverse('turismo:turismo_search'), {'q': 'garzon'})
+        self.assertEqual(response.context['total_resultados'], 2)
+        self.assertEqual(response.context['tipos_count'], {'lugar': 1, 'transporte': 1})
+        self.assertContains(response, "Parque Principal de Garzón")
+    
+    def test_rebuild_search_index(self):
+        """Test que el comando reconstruye los documentos"""
+        DocumentoBusqueda.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(DocumentoBusqueda.objects.count(), 2)
+    
+    def test_orden_por_relevancia(self):
+        """Test que el nombre pesa más que la descripción y se bonifica lo destacado"""
+        Transporte.objects.create(
+            nombre="Expreso Regional",
+            tipo="bus",
+            descripcion="Viajes diarios hacia Garzón",
+            origen="Neiva",
+            destino="Bogotá",
+            duracion_estimada="1 hora"
+        )
+        nombres = [d.nombre for d in buscar("garzon", orden='relevancia')]
+        self.assertEqual(nombres[0], "Parque Principal de Garzón")
+        self.assertEqual(len(nombres), 3)
+        
+        self.assertEqual(
+            [d.nombre for d in buscar("garzon", orden='nombre')][0], "Bus Turístico"
+        )
+        
+        self.transporte.destacado = True
+        self.transporte.save()
+        documentos = {d.nombre: d for d in buscar("garzon", orden='relevancia')}
+        self.assertGreater(
+            documentos["Bus Turístico"].relevancia,
+            documentos["Bus Turístico"].puntuacion_texto
+        )
+    
+    def test_orden_por_fecha_del_contenido(self):
+        """Test que 'más recientes' ordena por la fecha del objeto, no por la de indexación"""
+        antiguo = timezone.now() - timedelta(days=30)
+        LugarTuristico.objects.filter(pk=self.lugar.pk).update(created=antiguo)
+        # Reindexar el lugar después del transporte no lo vuelve más reciente
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.lugar.refresh_from_db()
+        self.lugar.save()
+        
+        self.assertEqual(
+            [d.nombre for d in buscar("garzon", orden='fecha_desc')],
+            ["Bus Turístico", "Parque Principal de Garzón"]
+        )
+        self.assertEqual(
+            [d.nombre for d in buscar("garzon", orden='fecha_asc')],
+            ["Parque Principal de Garzón", "Bus Turístico"]
+        )
+    
+    def test_filtros_del_formulario_avanzado(self):
+        """Test que la vista aplica los tipos y destacados del formulario"""
+        url = reverse('turismo:turismo_search')
+        response = self.client.get(url, {'q': 'garzon', 'incluir_lugares': 'on'})
+        self.assertEqual(response.context['total_resultados'], 1)
+        self.assertEqual(response.context['tipos_count'], {'lugar': 1})
+        
+        response = self.client.get(url, {'q': 'garzon', 'solo_destacados': 'on'})
+        self.assertEqual(response.context['total_resultados'], 0)
+    
+    @override_settings(CORE_BUSQUEDA_PAGINAS_GUARDADAS=1)
+    def test_solo_se_guardan_las_primeras_paginas(self):
+        """Test que se guardan los pks de la primera página y las siguientes se consultan"""
+        for numero in range(14):
+            Transporte.objects.create(
+                nombre=f"Expreso {numero:02d}", tipo="bus", descripcion="Salidas desde Garzón",
+                origen="Garzón", destino="Neiva", duracion_estimada="1 hora"
+            )
+        url = reverse('turismo:turismo_search')
+        response = self.client.get(url, {'q': 'garzon', 'orden': 'nombre', 'page': 2})
+        self.assertEqual(response.context['total_resultados'], 16)
+        self.assertEqual(len(response.context['paginator'].object_list.ids), 12)
+        self.assertEqual(
+            [documento.nombre for documento in response.context['resultados']],
+            ["Expreso 11", "Expreso 12", "Expreso 13", "Parque Principal de Garzón"]
+        )
+    
+    def test_resultados_por_consulta_normalizada(self):
+        """Test que 'GARZÓN' reutiliza los resultados de 'garzon' hasta que cambia el índice"""
+        url = reverse('turismo:turismo_search')
+        self.client.get(url, {'q': 'garzon'})
+        
+        with patch('turismo.views.buscar', side_effect=AssertionError("sin caché")):
+            response = self.client.get(url, {'q': '  GARZÓN '})
+        self.assertEqual(response.context['total_resultados'], 2)
+        self.assertContains(response, "Bus Turístico")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LugarTuristico.objects.create(
+                nombre="Mirador de Garzón",
+                categoria=self.categoria,
+                descripcion="Vista del valle",
+                direccion="Vía al mirador"
+            )
+        response = self.client.get(url, {'q': 'garzon'})
+        self.assertEqual(response.context['total_resultados'], 3)
+    
+    def test_variantes_y_sinonimos(self):
+        """Test que 'cafeterias' encuentra 'Café' y 'caminata' encuentra 'senderismo'"""
+        Establecimiento.objects.create(
+            nombre="Café del Parque",
+            tipo="restaurante",
+            descripcion="Bebidas típicas",
+            direccion="Centro"
+        )
+        self.lugar.descripcion = "Punto de partida para senderismo"
+        self.lugar.save()
+        
+        self.assertEqual([d.nombre for d in buscar("cafeterias")], ["Café del Parque"])
+        self.assertFalse(buscar("caminata").exists())
+        GrupoSinonimos.objects.create(palabras="senderismo, caminata")
+        self.assertEqual([d.nombre for d in buscar("caminata")], ["Parque Principal de Garzón"])
+    
+    def test_correccion_sin_resultados(self):
+        """Test que una búsqueda mal escrita muestra los resultados corregidos"""
+        response = self.client.get(reverse('turismo:turismo_search'), {'q': 'garzom'})
+        self.assertEqual(response.context['consulta_corregida'], "garzon")
+        self.assertEqual(response.context['total_resultados'], 2)
+        
+        response = self.client.get(reverse('turismo:api_busqueda_rapida'), {'q': 'turistco'})
+        data = json.loads(response.content)
+        self.assertEqual(data['correccion'], "turistico")
+        self.assertEqual(data['transportes'][0]['nombre'], "Bus Turístico")
+
+
+# ========== TESTS DE BÚSQUEDA RÁPIDA ==========
+
+class AutocompletarTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        categoria = Categoria.objects.create(nombre="Parques")
+        LugarTuristico.objects.create(
+            nombre="Parque Principal de Garzón",
+            categoria=categoria,
+            descripcion="Test",
+            direccion="Centro"
+        )
+        self.url = reverse('turismo:api_busqueda_rapida')
+    
+    def test_sin_consultas_por_pulsacion(self):
+        """Test que las búsquedas se responden desde memoria"""
+        self.client.get(self.url, {'q': 'par'})
+        with self.assertNumQueries(0):
+            datos = self.client.get(self.url, {'q': 'garzon'}).json()
+        self.assertEqual([l['nombre'] for l in datos['lugares']], ["Parque Principal de Garzón"])
+        self.assertEqual(datos['eventos'], [])
+    
+    def test_prefijos_y_varios_terminos(self):
+        """Test que todos los términos deben coincidir como prefijos"""
+        datos = self.client.get(self.url, {'q': 'parq garz'}).json()
+        self.assertEqual(len(datos['lugares']), 1)
+        datos = self.client.get(self.url, {'q': 'parq bogota'}).json()
+        self.assertEqual(datos['lugares'], [])
+    
+    def test_recarga_solo_el_grupo_modificado(self):
+        """Test que un cambio en eventos solo recarga el índice de eventos"""
+        self.client.get(self.url, {'q': 'par'})
+        ahora = timezone.now()
+        Evento.objects.create(
+            titulo="Festival del Parque",
+            descripcion="Test",
+            fecha_inicio=ahora,
+            fecha_fin=ahora + timedelta(days=1),
+            lugar="Garzón"
+        )
+        with self.assertNumQueries(1):
+            datos = self.client.get(self.url, {'q': 'festival'}).json()
+        self.assertEqual(datos['eventos'][0]['nombre'], "Festival del Parque")
+    
+    def test_actualiza_solo_la_entrada_modificada(self):
+        """Test que editar o borrar un lugar lee solo ese lugar y una categoría recarga el grupo"""
+        self.client.get(self.url, {'q': 'par'})
+        lugar = LugarTuristico.objects.get()
+        lugar.nombre = "Parque Santander"
+        lugar.save()
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.get(self.url, {'q': 'santander'}).json()
+        self.assertEqual(len(consultas), 1)
+        self.assertIn('IN', consultas[0]['sql'])
+        self.assertEqual([l['nombre'] for l in datos['lugares']], ["Parque Santander"])
+        self.assertEqual(self.client.get(self.url, {'q': 'principal'}).json()['lugares'], [])
+        
+        lugar.categoria.nombre = "Plazas"
+        lugar.categoria.save()
+        datos = self.client.get(self.url, {'q': 'plazas'}).json()
+        self.assertEqual(datos['lugares'][0]['categoria'], "Plazas")
+        
+        lugar.delete()
+        self.assertEqual(self.client.get(self.url, {'q': 'santander'}).json()['lugares'], [])
+
+
+# ========== TESTS DE LUGARES CERCANOS ==========
+
+class CercaniasTest(TestCase):
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugares = [
+                self.crear_lugar("Parque Principal", 2.1964, -75.6278),
+                self.crear_lugar("Catedral", 2.1975, -75.6290),
+                self.crear_lugar("Represa El Quimbo", 2.1260, -75.6850),
+                self.crear_lugar("Desierto de la Tatacoa", 3.2300, -75.1700),  # a más de 50 km
+            ]
+            self.hotel = self.crear_establecimiento("Hotel Centro", 2.1970, -75.6280)
+            self.finca = self.crear_establecimiento("Finca El Quimbo", 2.1300, -75.6800)
+    
+    def crear_lugar(self, nombre, lat, lng):
+        return LugarTuristico.objects.create(
+            nombre=nombre, categoria=self.categoria, descripcion="Test",
+            direccion="Test", latitud=lat, longitud=lng
+        )
+    
+    def crear_establecimiento(self, nombre, lat, lng):
+        return Establecimiento.objects.create(
+            nombre=nombre, tipo="hotel", descripcion="Test", direccion="Test",
+            telefono="123", imagen=crear_imagen_prueba(), latitud=lat, longitud=lng
+        )
+    
+    def test_vecinos_mas_cercanos(self):
+        """Test que los lugares cercanos se ordenan por distancia real"""
+        cercanos = self.hotel.get_lugares_cercanos()
+        self.assertEqual(
+            [lugar.nombre for lugar in cercanos],
+            ["Parque Principal", "Catedral", "Represa El Quimbo"]
+        )
+        self.assertLess(cercanos[0].distancia, cercanos[1].distancia)
+        self.assertEqual(len(self.hotel.get_lugares_cercanos(limite=10)), 3)
+    
+    def test_listas_guardadas(self):
+        """Test que las páginas de detalle leen la lista guardada"""
+        self.assertEqual(
+            [e.nombre for e in obtener_cercanos(self.lugares[2])],
+            ["Finca El Quimbo", "Hotel Centro"]
+        )
+        with self.assertNumQueries(1):
+            lugares = obtener_cercanos(self.finca)
+            self.assertEqual(lugares[0].categoria.nombre, "Parques")
+        
+        response = self.client.get(reverse('turismo:establecimiento_detail', kwargs={'slug': self.hotel.slug}))
+        self.assertEqual(
+            [lugar.nombre for lugar in response.context['lugares_cercanos']],
+            ["Parque Principal", "Catedral", "Represa El Quimbo"]
+        )
+    
+    def test_mover_y_eliminar(self):
+        """Test que mover o borrar un objeto actualiza las listas que lo incluyen"""
+        desierto = self.lugares[3]
+        self.assertEqual(obtener_cercanos(desierto), [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.finca.latitud, self.finca.longitud = 3.2310, -75.1710
+            self.finca.save()
+        self.assertEqual([e.nombre for e in obtener_cercanos(desierto)], ["Finca El Quimbo"])
+        self.assertEqual([e.nombre for e in obtener_cercanos(self.lugares[2])], ["Hotel Centro"])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel.delete()
+        self.assertEqual(obtener_cercanos(self.lugares[2]), [])
+        self.assertEqual(obtener_cercanos(self.lugares[0]), [])
+    
+    def test_comando_reconstruye(self):
+        """Test que el comando rellena las listas"""
+        Cercania.objects.all().delete()
+        call_command('rebuild_cercanias', stdout=StringIO())
+        self.assertEqual(len(obtener_cercanos(self.hotel)), 3)
+        self.assertEqual(len(obtener_cercanos(self.lugares[0])), 2)
+
+
+
+# ========== TESTS DE MAPAS DE RUTAS ==========
+
+# Sin caché de páginas, para contar las consultas de las vistas
+@override_settings(CORE_CACHE_PAGINAS_EXCLUIR=['/'])
+class DatosMapaRutaTest(TestCase):
+    def setUp(self):
+        categoria = Categoria.objects.create(nombre="Parques")
+        self.ruta = Ruta.objects.create(
+            nombre="Ruta Centro", descripcion="Test", duracion_estimada="2 horas",
+            distancia=Decimal('3.00'), dificultad="media"
+        )
+        for orden in range(1, 5):
+            lugar = LugarTuristico.objects.create(
+                nombre=f"Lugar {orden}", categoria=categoria, descripcion="Test",
+                direccion="Test", latitud=2.19 + orden / 1000, longitud=-75.63
+            )
+            PuntoRuta.objects.create(
+                ruta=self.ruta, lugar_turistico=lugar, orden=orden,
+                latitud=lugar.latitud, longitud=lugar.longitud
+            )
+        PuntoRuta.objects.create(
+            ruta=self.ruta, nombre="Mirador", orden=5, latitud=2.20, longitud=-75.60
+        )
+    
+    def test_datos_en_una_consulta(self):
+        """Test que centro, límites, conteos y marcadores salen de una sola consulta"""
+        with self.assertNumQueries(1):
+            datos = self.ruta.get_datos_mapa()
+            configuracion = datos.get_configuracion_mapa()
+            datos.get_marcadores()
+        
+        self.assertEqual(datos.total_puntos, 5)
+        self.assertEqual(datos.puntos_con_lugares, 4)
+        self.assertEqual(datos.primer_punto.get_nombre_display(), "Lugar 1")
+        self.assertEqual(datos.ultimo_punto.get_nombre_display(), "Mirador")
+        self.assertEqual(datos.bounds, {'north': 2.20, 'south': 2.191, 'east': -75.60, 'west': -75.63})
+        self.assertAlmostEqual(datos.centro['lat'], (2.191 + 2.192 + 2.193 + 2.194 + 2.20) / 5)
+        self.assertEqual([p['categoria'] for p in configuracion['puntos'][:4]], ["Parques"] * 4)
+    
+    def test_consultas_no_crecen_con_los_puntos(self):
+        """Test que las vistas de la ruta no hacen consultas por punto"""
+        urls = [
+            reverse('turismo:ruta_detail', kwargs={'slug': self.ruta.slug}),
+            reverse('turismo:api_ruta_coordenadas', kwargs={'slug': self.ruta.slug}),
+        ]
+        
+        def contar_consultas(url):
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(consultas)
+        
+        # La primera petición llena cachés compartidas (contadores, etc.)
+        for url in urls:
+            contar_consultas(url)
+        antes = [contar_consultas(url) for url in urls]
+        for orden in range(6, 16):
+            PuntoRuta.objects.create(
+                ruta=self.ruta, nombre=f"Punto {orden}", orden=orden,
+                latitud=2.2 + orden / 1000, longitud=-75.6
+            )
+        self.assertEqual([contar_consultas(url) for url in urls], antes)
+
+
+@override_settings(CORE_CACHE_PAGINAS_EXCLUIR=['/'])
+class ResumenRutaTest(TestCase):
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre="Parques")
+        self.lugar = LugarTuristico.objects.create(
+            nombre="Parque Principal", categoria=self.categoria, descripcion="Test",
+            direccion="Test", latitud=2.1964, longitud=-75.6278
+        )
+        self.ruta = Ruta.objects.create(
+            nombre="Ruta Centro", descripcion="Test", duracion_estimada="2 horas",
+            distancia=Decimal('3.00'), dificultad="media"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            PuntoRuta.objects.create(
+                ruta=self.ruta, lugar_turistico=self.lugar, orden=1,
+                latitud=self.lugar.latitud, longitud=self.lugar.longitud
+            )
+            self.mirador = PuntoRuta.objects.create(
+                ruta=self.ruta, nombre="Mirador", orden=2, latitud=2.2064, longitud=-75.6278
+            )
+    
+    def test_resumen_al_cambiar_puntos(self):
+        """Test que crear, mover y borrar puntos recalcula el resumen de la ruta"""
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.total_puntos, 2)
+        self.assertEqual(self.ruta.puntos_con_lugares, 1)
+        self.assertEqual((self.ruta.nombre_inicio, self.ruta.nombre_fin), ("Parque Principal", "Mirador"))
+        self.assertEqual(self.ruta.get_bounds_mapa(), {
+            'north': 2.2064, 'south': 2.1964, 'east': -75.6278, 'west': -75.6278
+        })
+        # 0,01 grados de latitud son unos 1,11 km
+        self.assertAlmostEqual(self.ruta.longitud_trazado, 1.112, places=2)
+        
+        self.mirador.latitud = 2.2164
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mirador.save()
+        self.ruta.refresh_from_db()
+        self.assertAlmostEqual(self.ruta.longitud_trazado, 2.224, places=2)
+        self.assertAlmostEqual(self.ruta.get_centro_mapa()['lat'], 2.2064)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mirador.delete()
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.total_puntos, 1)
+        self.assertEqual(self.ruta.nombre_fin, "Parque Principal")
+        self.assertEqual(self.ruta.longitud_trazado, 0)
+    
+    def test_guardar_instancia_antigua(self):
+        """Test que guardar una ruta cargada antes de cambiar sus puntos no pisa el resumen"""
+        antigua = Ruta.objects.get(pk=self.ruta.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            PuntoRuta.objects.create(
+                ruta=self.ruta, nombre="Cascada", orden=3, latitud=2.2164, longitud=-75.6278
+            )
+        antigua.descripcion = "Nueva descripción"
+        antigua.save()
+        
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.descripcion, "Nueva descripción")
+        self.assertEqual(self.ruta.total_puntos, 3)
+        self.assertEqual(self.ruta.nombre_fin, "Cascada")
+        self.assertEqual(len(decodificar_polilinea(self.ruta.polilinea)), 3)
+    
+    def test_resumen_al_cambiar_lugar(self):
+        """Test que renombrar o borrar un lugar de la ruta actualiza el inicio"""
+        self.lugar.nombre = "Parque Central"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugar.save()
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.nombre_inicio, "Parque Central")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lugar.delete()
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.nombre_inicio, "Punto 1")
+        self.assertEqual(self.ruta.puntos_con_lugares, 0)
+    
+    def test_listado_sin_consultas_por_ruta(self):
+        """Test que el listado de rutas no consulta sus puntos"""
+        url = reverse('turismo:ruta_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as antes:
+            response = self.client.get(url)
+        self.assertContains(response, "Mirador")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            for numero in range(5):
+                ruta = Ruta.objects.create(
+                    nombre=f"Ruta {numero}", descripcion="Test", duracion_estimada="1 hora",
+                    distancia=Decimal('1.00'), dificultad="facil"
+                )
+                for orden in range(1, 4):
+                    PuntoRuta.objects.create(
+                        ruta=ruta, nombre=f"Punto {orden}", orden=orden, latitud=2.2, longitud=-75.6
+                    )
+        # Los contadores del menú se invalidaron al confirmar
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as despues:
+            self.client.get(url)
+        self.assertEqual(len(despues), len(antes))
+    
+    def test_polilineas_por_zoom(self):
+        """Test que la ruta guarda su línea completa y simplificada por zoom"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for orden in range(3, 53):
+                PuntoRuta.objects.create(
+                    ruta=self.ruta, nombre=f"Punto {orden}", orden=orden,
+                    latitud=2.2064 + orden / 10000, longitud=-75.6278
+                )
+        self.ruta.refresh_from_db()
+        self.assertEqual(len(decodificar_polilinea(self.ruta.polilinea)), 52)
+        self.assertEqual(sorted(self.ruta.polilineas_zoom), ['10', '13', '16'])
+        # Los puntos en línea recta sobran a cualquier zoom
+        self.assertEqual(len(decodificar_polilinea(self.ruta.get_polilinea(12))), 2)
+        self.assertEqual(self.ruta.get_polilinea(20), self.ruta.polilinea)
+        
+        url = reverse('turismo:api_ruta_polilinea', kwargs={'slug': self.ruta.slug})
+        datos = self.client.get(url, {'zoom': 12}).json()
+        self.assertEqual(datos['polilinea'], self.ruta.polilineas_zoom['13'])
+        self.assertEqual(self.client.get(url).json()['polilinea'], self.ruta.polilinea)
+        self.assertEqual(self.client.get(url, {'zoom': 'x'}).status_code, 400)
+    
+    def test_resumen_en_la_transaccion(self):
+        """Test que el resumen se guarda en la misma transacción que el cambio de los puntos"""
+        PuntoRuta.objects.create(
+            ruta=self.ruta, nombre="Cascada", orden=3, latitud=2.2164, longitud=-75.6278
+        )
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.total_puntos, 3)
+        
+        # Si el cálculo falla, el punto tampoco se guarda
+        with patch('turismo.rutas.actualizar_resumen', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.mirador.delete()
+        self.assertTrue(PuntoRuta.objects.filter(pk=self.mirador.pk).exists())
+    
+    def test_un_calculo_por_bloque(self):
+        """Test que muchos cambios de puntos en un bloque diferido recalculan la ruta una vez"""
+        with patch('turismo.rutas.actualizar_resumen') as actualizar:
+            with rutas.resumenes_diferidos():
+                for orden in range(3, 23):
+                    PuntoRuta.objects.create(
+                        ruta=self.ruta, nombre=f"Punto {orden}", orden=orden,
+                        latitud=2.2064 + orden / 10000, longitud=-75.6278
+                    )
+                self.mirador.delete()
+                actualizar.assert_not_called()
+            actualizar.assert_called_once_with(self.ruta.pk)
+            
+            # Borrar la ruta borra sus puntos sin recalcularla
+            actualizar.reset_mock()
+            self.ruta.delete()
+            actualizar.assert_not_called()
+    
+    def test_comando_reconstruye(self):
+        """Test que el comando recalcula resúmenes desactualizados"""
+        Ruta.objects.update(total_puntos=0, nombre_inicio='')
+        call_command('rebuild_resumen_rutas', stdout=StringIO())
+        self.ruta.refresh_from_db()
+        self.assertEqual(self.ruta.total_puntos, 2)
+        self.assertEqual(self.ruta.nombre_inicio, "Parque Principal")
+
+
+class ComparacionRutasTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rutas = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for numero in range(3):
+                ruta = Ruta.objects.create(
+                    nombre=f"Ruta {numero}", descripcion="Test", duracion_estimada="1 hora",
+                    distancia=Decimal('1.00'), dificultad="facil"
+                )
+                for orden in range(1, 5):
+                    PuntoRuta.objects.create(
+                        ruta=ruta, nombre=f"Punto {orden}", orden=orden,
+                        latitud=2.0 + numero + orden / 100, longitud=-75.0 - numero
+                    )
+                self.rutas.append(ruta)
+        self.url = reverse('turismo:api_comparar_rutas')
+    
+    def comparar(self, rutas):
+        return self.client.get(self.url, {'rutas[]': [ruta.pk for ruta in rutas]})
+    
+    def test_una_consulta_de_puntos_y_cache(self):
+        """Test que los puntos de todas las rutas se leen juntos y el resultado se guarda"""
+        with self.assertNumQueries(2):
+            datos = self.comparar(self.rutas).json()
+        self.assertEqual(datos['total_rutas'], 3)
+        self.assertEqual([len(r['config_mapa']['puntos']) for r in datos['rutas']], [4, 4, 4])
+        self.assertEqual(datos['bounds_general'], {
+            'north': 4.04, 'south': 2.01, 'east': -75.0, 'west': -77.0
+        })
+        self.assertAlmostEqual(datos['centro_general']['lat'], 3.025)
+        self.assertAlmostEqual(datos['centro_general']['lng'], -76.0)
+        
+        # El mismo conjunto en otro orden sale de la caché
+        with self.assertNumQueries(0):
+            self.assertEqual(self.comparar(reversed(self.rutas)).json(), datos)
+    
+    def test_invalidacion(self):
+        """Test que cambiar un punto invalida las comparaciones guardadas"""
+        self.comparar(self.rutas)
+        punto = self.rutas[0].puntos.get(orden=1)
+        punto.latitud = 1.0
+        with self.captureOnCommitCallbacks(execute=True):
+            punto.save()
+        datos = self.comparar(self.rutas).json()
+        self.assertEqual(datos['bounds_general']['south'], 1.0)
+    
+    def test_parametros_invalidos(self):
+        """Test que ids inválidos o demasiadas rutas responden 400"""
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'rutas[]': ['x']}).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.url, {'rutas[]': list(range(1, 30))}).status_code, 400
+        )
@@ -53,8 +53,13 @@ urlpatterns = [
    
     # ========== APIs PARA MAPAS Y FUNCIONALIDAD AVANZADA ==========
     
+    # Marcadores del mapa general por área visible
+    path('api/mapa/marcadores/', views.api_mapa_marcadores, name='api_mapa_marcadores'),
+    path('api/teselas/<int:z>/<int:x>/<int:y>.geojson', views.api_tesela, name='api_tesela'),
+    
     # APIs para mapas de rutas
     path('api/ruta/<slug:slug>/coordenadas/', views.api_ruta_coordenadas, name='api_ruta_coordenadas'),
+    path('api/ruta/<slug:slug>/polilinea/', views.api_ruta_polilinea, name='api_ruta_polilinea'),
     path('api/ruta/<slug:ruta_slug>/punto/<int:punto_id>/', views.api_punto_ruta_detalle, name='api_punto_ruta_detalle'),
     path('api/rutas/con-mapas/', views.api_rutas_con_mapas, name='api_rutas_con_mapas'),
     path('api/rutas/comparar/', views.api_comparar_rutas, name='api_comparar_rutas'),
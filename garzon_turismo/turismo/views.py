@@ -7,7 +7,9 @@ from django.contrib import messages
 from django.shortcuts import redirect, get_object_or_404, render
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 import json
+import time
 
 from .models import (
     Categoria, LugarTuristico, Imagen, Ruta, 
@@ -16,6 +18,23 @@ from .models import (
     CategoriaArtesania, CategoriaActividadFisica,
     ImagenArtesania, ImagenActividadFisica,  Fotografia, CategoriaFotografia, TagFotografia, FotografiaTag
 )
+from .marcadores import (
+    obtener_marcadores_json, totales_por_tipo, TIPOS_MARCADOR,
+    claves_sustitutas as claves_sustitutas_marcadores
+)
+from .piramide import marcadores_en_area
+from .teselas import obtener_tesela, get_max_age as max_age_teselas, ZOOM_MAXIMO as ZOOM_MAXIMO_TESELAS
+from .autocompletar import autocompletar
+from .cercanias import obtener_cercanos
+from .rutas import DatosMapaRuta, comparar_rutas, get_max_rutas_comparar
+from .busqueda import TIPOS_TURISMO, TIPO_FOTOGRAFIA
+from core.busqueda import buscar, contar_por_tipo, AMBITO_DOCUMENTOS
+from core.models import DocumentoBusqueda
+from core.paginacion import ResultadosCombinados, ResultadosPorIds
+from core.resultados import limite_ids, obtener_resultados
+from core.telemetria import es_primera_pagina, registrar_busqueda
+from core.trigramas import corregir
+from core.paginas import agregar_claves_sustitutas
 from .forms import (
     ValoracionForm, ComentarioForm, 
     FiltroEstablecimientoForm, FiltroEventoForm,
@@ -58,10 +77,8 @@ class LugarTuristicoDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Establecimientos cercanos (podría mejorarse con geolocalización)
-        context['establecimientos_cercanos'] = Establecimiento.objects.filter(
-            destacado=True
-        )[:4]
+        # Establecimientos cercanos (lista precalculada, ver turismo/cercanias.py)
+        context['establecimientos_cercanos'] = obtener_cercanos(self.object)
         
         # Lugares relacionados de la misma categoría
         context['lugares_relacionados'] = LugarTuristico.objects.filter(
@@ -161,8 +178,8 @@ class EstablecimientoDetailView(DetailView):
         # Formulario de valoración
         context['form_valoracion'] = ValoracionForm()
         
-        # Lugares turísticos cercanos
-        context['lugares_cercanos'] = self.object.get_lugares_cercanos()
+        # Lugares turísticos cercanos (lista precalculada)
+        context['lugares_cercanos'] = obtener_cercanos(self.object)
         
         # Establecimientos similares
         context['establecimientos_similares'] = Establecimiento.objects.filter(
@@ -253,11 +270,11 @@ class RutaListView(ListView):
         context = super().get_context_data(**kwargs)
         context['dificultades'] = dict(Ruta.DIFICULTAD_CHOICES)
         
-        # Estadísticas de rutas
-        context['stats'] = {
-            'total_rutas': Ruta.objects.count(),
-            'rutas_con_puntos': Ruta.objects.filter(puntos__isnull=False).distinct().count(),
-        }
+        # Estadísticas de rutas (del resumen guardado, en una consulta)
+        context['stats'] = Ruta.objects.aggregate(
+            total_rutas=Count('pk'),
+            rutas_con_puntos=Count('pk', filter=Q(total_puntos__gt=0)),
+        )
         
         return context
 
@@ -270,38 +287,34 @@ class RutaDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Puntos de la ruta ordenados
-        puntos_ordenados = self.object.get_puntos_ordenados()
-        context['puntos'] = puntos_ordenados
+        # Puntos de la ruta (una consulta) y todos los datos del mapa
+        datos_mapa = DatosMapaRuta(self.object)
+        context['puntos'] = datos_mapa.puntos
         
         # ===== CONFIGURACIÓN COMPLETA DEL MAPA =====
-        # Usar los nuevos métodos del modelo
-        mapa_config = self.object.get_configuracion_mapa()
-        context['mapa_config'] = json.dumps(mapa_config)
+        context['mapa_config'] = json.dumps(datos_mapa.get_configuracion_mapa())
         
         # Centro del mapa calculado automáticamente
-        context['centro_mapa'] = json.dumps(self.object.get_centro_mapa())
+        context['centro_mapa'] = json.dumps(datos_mapa.centro)
         
         # Bounds para ajustar automáticamente el zoom
-        bounds = self.object.get_bounds_mapa()
-        if bounds:
-            context['mapa_bounds'] = json.dumps(bounds)
+        if datos_mapa.bounds:
+            context['mapa_bounds'] = json.dumps(datos_mapa.bounds)
         
         # ===== INFORMACIÓN ADICIONAL PARA EL TEMPLATE =====
         
         # Estadísticas de la ruta
         context['estadisticas'] = {
-            'total_puntos': puntos_ordenados.count(),
-            'puntos_con_lugares': puntos_ordenados.filter(lugar_turistico__isnull=False).count(),
-            'tiene_coordenadas': self.object.tiene_puntos(),
-            'primer_punto': self.object.get_primer_punto(),
-            'ultimo_punto': self.object.get_ultimo_punto(),
+            'total_puntos': datos_mapa.total_puntos,
+            'puntos_con_lugares': datos_mapa.puntos_con_lugares,
+            'tiene_coordenadas': datos_mapa.total_puntos > 0,
+            'primer_punto': datos_mapa.primer_punto,
+            'ultimo_punto': datos_mapa.ultimo_punto,
         }
         
         # Lugares turísticos únicos en esta ruta
-        lugares_en_ruta = self.object.get_lugares_turisticos()
-        context['lugares_en_ruta'] = lugares_en_ruta
-        context['total_lugares_unicos'] = lugares_en_ruta.count()
+        context['lugares_en_ruta'] = datos_mapa.lugares
+        context['total_lugares_unicos'] = len(datos_mapa.lugares)
         
         # Rutas similares (misma dificultad, excluyendo la actual)
         context['rutas_similares'] = Ruta.objects.filter(
@@ -317,9 +330,9 @@ class RutaDetailView(DetailView):
         )
         
         # Metadatos para compartir en redes sociales
-        if puntos_ordenados.exists():
+        if datos_mapa.total_puntos:
             context['meta_description'] = (
-                f"Ruta {self.object.nombre} - {puntos_ordenados.count()} puntos de interés. "
+                f"Ruta {self.object.nombre} - {datos_mapa.total_puntos} puntos de interés. "
                 f"Dificultad: {self.object.get_dificultad_display()}. "
                 f"Distancia: {self.object.distancia} km. "
                 f"Duración: {self.object.duracion_estimada}."
@@ -328,13 +341,13 @@ class RutaDetailView(DetailView):
         # ===== CONFIGURACIÓN ADICIONAL DEL MAPA =====
         
         # Determinar si mostrar controles avanzados
-        context['mostrar_controles_avanzados'] = puntos_ordenados.count() > 3
+        context['mostrar_controles_avanzados'] = datos_mapa.total_puntos > 3
         
         # Preparar datos para exportación (GPX, KML, etc.)
         context['datos_exportacion'] = {
             'formato_gpx': True,
             'formato_kml': True,
-            'total_coordenadas': puntos_ordenados.count(),
+            'total_coordenadas': datos_mapa.total_puntos,
         }
         
         # ===== INTERACTIVIDAD =====
@@ -363,18 +376,17 @@ class RutaMapaView(DetailView):
         context = super().get_context_data(**kwargs)
         
         # Configuración completa del mapa para esta ruta específica
-        config_mapa = self.object.get_configuracion_mapa()
-        context['mapa_config'] = json.dumps(config_mapa)
+        datos_mapa = DatosMapaRuta(self.object)
+        context['mapa_config'] = json.dumps(datos_mapa.get_configuracion_mapa())
         
         # Información básica de la ruta para el template
-        context['total_puntos'] = self.object.puntos.count()
-        context['primer_punto'] = self.object.get_primer_punto()
-        context['ultimo_punto'] = self.object.get_ultimo_punto()
+        context['total_puntos'] = datos_mapa.total_puntos
+        context['primer_punto'] = datos_mapa.primer_punto
+        context['ultimo_punto'] = datos_mapa.ultimo_punto
         
         # Bounds del mapa para ajuste automático
-        bounds = self.object.get_bounds_mapa()
-        if bounds:
-            context['mapa_bounds'] = json.dumps(bounds)
+        if datos_mapa.bounds:
+            context['mapa_bounds'] = json.dumps(datos_mapa.bounds)
         
         return context
 
@@ -896,67 +908,11 @@ class MapaGeneralActualizadoView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Preparar datos para el mapa
-        marcadores = []
-        
-        # Lugares turísticos con coordenadas
-        lugares = LugarTuristico.objects.filter(
-            latitud__isnull=False, 
-            longitud__isnull=False
-        )
-        
-        for lugar in lugares:
-            marcadores.append({
-                'tipo': 'lugar',
-                'nombre': lugar.nombre,
-                'categoria': lugar.categoria.nombre,
-                'latitud': float(lugar.latitud),
-                'longitud': float(lugar.longitud),
-                'imagen': lugar.imagen_principal.url if lugar.imagen_principal else None,
-                'url': lugar.get_absolute_url(),
-                'icon': 'place'
-            })
-        
-        # Actividades físicas con coordenadas
-        actividades = ActividadFisica.objects.filter(
-            latitud__isnull=False, 
-            longitud__isnull=False,
-            disponible=True
-        )
-        
-        for actividad in actividades:
-            marcadores.append({
-                'tipo': 'actividad',
-                'nombre': actividad.nombre,
-                'categoria': actividad.categoria.nombre,
-                'latitud': float(actividad.latitud),
-                'longitud': float(actividad.longitud),
-                'imagen': actividad.imagen_principal.url if actividad.imagen_principal else None,
-                'url': actividad.get_absolute_url(),
-                'icon': 'fitness_center',
-                'dificultad': actividad.dificultad
-            })
-        
-        # Establecimientos con coordenadas
-        establecimientos = Establecimiento.objects.filter(
-            latitud__isnull=False, 
-            longitud__isnull=False
-        )
-        
-        for estab in establecimientos:
-            marcadores.append({
-                'tipo': 'establecimiento',
-                'nombre': estab.nombre,
-                'categoria': estab.get_tipo_display(),
-                'latitud': float(estab.latitud),
-                'longitud': float(estab.longitud),
-                'imagen': estab.imagen.url if estab.imagen else None,
-                'url': estab.get_absolute_url(),
-                'icon': 'business'
-            })
-        
-        context['marcadores_json'] = json.dumps(marcadores)
-        context['total_marcadores'] = len(marcadores)
+        # Los marcadores se piden por área visible a api_mapa_marcadores;
+        # la página solo lleva los totales
+        context['estadisticas_tipos'] = totales_por_tipo()
+        context['total_marcadores'] = sum(context['estadisticas_tipos'].values())
+        agregar_claves_sustitutas(self.request, *claves_sustitutas_marcadores('mapa_general'))
         
         return context
 
@@ -979,6 +935,7 @@ class GaleriaView(ListView):
 class TurismoSearchView(ListView):
     """Vista de búsqueda original - mantenida para compatibilidad"""
     template_name = 'turismo/turismo_search.html'
+    context_object_name = 'resultados'
     paginate_by = 12
     
     def get_queryset(self):
@@ -1012,60 +969,73 @@ class TurismoSearchView(ListView):
             Q(descripcion__icontains=query)
         )
         
-        # Combinar resultados (guardar tipo para mostrar en plantilla)
-        resultados = []
-        
-        for lugar in lugares:
-            resultados.append({
-                'tipo': 'lugar',
-                'objeto': lugar,
-                'nombre': lugar.nombre,
-                'descripcion': lugar.descripcion,
-                'imagen': lugar.imagen_principal,
-                'url': lugar.get_absolute_url(),
-                'categoria': lugar.categoria.nombre
-            })
-        
-        for estab in establecimientos:
-            resultados.append({
-                'tipo': 'establecimiento',
-                'objeto': estab,
-                'nombre': estab.nombre,
-                'descripcion': estab.descripcion,
-                'imagen': estab.imagen,
-                'url': estab.get_absolute_url(),
-                'categoria': estab.get_tipo_display()
-            })
-        
-        for evento in eventos:
-            resultados.append({
-                'tipo': 'evento',
-                'objeto': evento,
-                'nombre': evento.titulo,
-                'descripcion': evento.descripcion,
-                'imagen': evento.imagen,
-                'url': evento.get_absolute_url(),
-                'categoria': 'Evento'
-            })
-        
-        for ruta in rutas:
-            resultados.append({
-                'tipo': 'ruta',
-                'objeto': ruta,
-                'nombre': ruta.nombre,
-                'descripcion': ruta.descripcion,
-                'imagen': ruta.imagen_principal,
-                'url': ruta.get_absolute_url(),
-                'categoria': f"Ruta ({ruta.get_dificultad_display()})"
-            })
-        
-        return resultados
+        # Combinar resultados sin cargarlos: cada página se obtiene mezclando
+        # los cuatro tipos por nombre (ver core/paginacion.py)
+        return ResultadosCombinados([
+            ('lugar', lugares.select_related('categoria'), 'nombre', _resultado_lugar),
+            ('establecimiento', establecimientos, 'nombre', _resultado_establecimiento),
+            ('evento', eventos, 'titulo', _resultado_evento),
+            ('ruta', rutas, 'nombre', _resultado_ruta),
+        ])
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['query'] = self.request.GET.get('q', '')
+        if isinstance(self.object_list, ResultadosCombinados):
+            context['total_resultados'] = self.object_list.count()
+            context['tipos_count'] = {
+                tipo: total for tipo, total in self.object_list.conteos().items() if total
+            }
         return context
 
+
+def _resultado_lugar(lugar):
+    return {
+        'tipo': 'lugar',
+        'objeto': lugar,
+        'nombre': lugar.nombre,
+        'descripcion': lugar.descripcion,
+        'imagen': lugar.imagen_principal,
+        'url': lugar.get_absolute_url(),
+        'categoria': lugar.categoria.nombre
+    }
+
+
+def _resultado_establecimiento(estab):
+    return {
+        'tipo': 'establecimiento',
+        'objeto': estab,
+        'nombre': estab.nombre,
+        'descripcion': estab.descripcion,
+        'imagen': estab.imagen,
+        'url': estab.get_absolute_url(),
+        'categoria': estab.get_tipo_display()
+    }
+
+
+def _resultado_evento(evento):
+    return {
+        'tipo': 'evento',
+        'objeto': evento,
+        'nombre': evento.titulo,
+        'descripcion': evento.descripcion,
+        'imagen': evento.imagen,
+        'url': evento.get_absolute_url(),
+        'categoria': 'Evento'
+    }
+
+
+def _resultado_ruta(ruta):
+    return {
+        'tipo': 'ruta',
+        'objeto': ruta,
+        'nombre': ruta.nombre,
+        'descripcion': ruta.descripcion,
+        'imagen': ruta.imagen_principal,
+        'url': ruta.get_absolute_url(),
+        'categoria': f"Ruta ({ruta.get_dificultad_display()})"
+    }
+
 # ========== VISTA MAPA GENERAL ORIGINAL (COMPATIBILIDAD) ==========
 
 class MapaGeneralView(TemplateView):
@@ -1075,44 +1045,9 @@ class MapaGeneralView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Lugares turísticos con coordenadas
-        lugares = LugarTuristico.objects.filter(
-            latitud__isnull=False, 
-            longitud__isnull=False
-        )
-        
-        # Establecimientos con coordenadas
-        establecimientos = Establecimiento.objects.filter(
-            latitud__isnull=False, 
-            longitud__isnull=False
-        )
-        
-        # Preparar datos para el mapa
-        marcadores = []
-        
-        for lugar in lugares:
-            marcadores.append({
-                'tipo': 'lugar',
-                'nombre': lugar.nombre,
-                'categoria': lugar.categoria.nombre,
-                'latitud': lugar.latitud,
-                'longitud': lugar.longitud,
-                'imagen': lugar.imagen_principal.url if lugar.imagen_principal else None,
-                'url': lugar.get_absolute_url()
-            })
-        
-        for estab in establecimientos:
-            marcadores.append({
-                'tipo': 'establecimiento',
-                'nombre': estab.nombre,
-                'categoria': estab.get_tipo_display(),
-                'latitud': estab.latitud,
-                'longitud': estab.longitud,
-                'imagen': estab.imagen.url if estab.imagen else None,
-                'url': estab.get_absolute_url()
-            })
-        
-        context['marcadores_json'] = json.dumps(marcadores)
+        # Marcadores de lugares y establecimientos (turismo/marcadores.py)
+        context['marcadores_json'] = obtener_marcadores_json('mapa')
+        agregar_claves_sustitutas(self.request, *claves_sustitutas_marcadores('mapa'))
         context['categorias'] = Categoria.objects.all()
         context['tipos_establecimiento'] = dict(Establecimiento.TIPO_CHOICES)
         
@@ -1126,8 +1061,8 @@ def api_ruta_coordenadas(request, slug):
     try:
         ruta = get_object_or_404(Ruta, slug=slug)
         
-        # Obtener configuración completa del mapa
-        config_mapa = ruta.get_configuracion_mapa()
+        # Configuración completa del mapa (una consulta de puntos)
+        datos_mapa = DatosMapaRuta(ruta)
         
         return JsonResponse({
             'success': True,
@@ -1139,9 +1074,10 @@ def api_ruta_coordenadas(request, slug):
                 'distancia': float(ruta.distancia),
                 'duracion_estimada': ruta.duracion_estimada,
             },
-            'mapa': config_mapa,
-            'centro': ruta.get_centro_mapa(),
-            'bounds': ruta.get_bounds_mapa(),
+            'mapa': datos_mapa.get_configuracion_mapa(),
+            'centro': datos_mapa.centro,
+            'bounds': datos_mapa.bounds,
+            'polilinea': ruta.polilinea,
         })
         
     except Ruta.DoesNotExist:
@@ -1155,6 +1091,32 @@ def api_ruta_coordenadas(request, slug):
             'error': str(e)
         }, status=500)
 
+def api_ruta_polilinea(request, slug):
+    """
+    API con la línea de una ruta como polilínea codificada (algoritmo de
+    Google, precisión 5). Con ?zoom=N retorna la variante simplificada para
+    ese zoom, guardada en la ruta al cambiar sus puntos.
+    """
+    ruta = get_object_or_404(Ruta.objects.only('slug', 'total_puntos', 'polilinea', 'polilineas_zoom'), slug=slug)
+    
+    zoom = request.GET.get('zoom')
+    if zoom is not None:
+        try:
+            zoom = int(zoom)
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'El zoom debe ser un número entero'
+            }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'slug': ruta.slug,
+        'total_puntos': ruta.total_puntos,
+        'zoom': zoom,
+        'polilinea': ruta.get_polilinea(zoom),
+    })
+
 def api_punto_ruta_detalle(request, ruta_slug, punto_id):
     """API para obtener detalles de un punto específico de una ruta"""
     try:
@@ -1191,29 +1153,78 @@ def api_punto_ruta_detalle(request, ruta_slug, punto_id):
             'error': 'Punto o ruta no encontrada'
         }, status=404)
 
+def api_mapa_marcadores(request):
+    """
+    API con los marcadores del área visible de los mapas.
+    Parámetros: bbox=oeste,sur,este,norte (grados), zoom y tipos (opcional,
+    separados por comas). Hasta el zoom máximo de la pirámide
+    (turismo/piramide.py) los marcadores cercanos se devuelven agrupados.
+    """
+    try:
+        oeste, sur, este, norte = (float(valor) for valor in request.GET.get('bbox', '').split(','))
+        zoom = int(request.GET.get('zoom', ''))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Se requieren bbox=oeste,sur,este,norte y zoom'
+        }, status=400)
+    
+    if not (-90 <= sur <= norte <= 90 and -180 <= oeste <= 180 and -180 <= este <= 180 and 0 <= zoom <= 22):
+        return JsonResponse({
+            'success': False,
+            'error': 'Área o zoom fuera de rango'
+        }, status=400)
+    
+    tipos = [tipo for tipo in request.GET.get('tipos', '').split(',') if tipo]
+    desconocidos = set(tipos) - set(TIPOS_MARCADOR)
+    if desconocidos:
+        return JsonResponse({
+            'success': False,
+            'error': f"Tipos desconocidos: {', '.join(sorted(desconocidos))}"
+        }, status=400)
+    
+    datos = marcadores_en_area(sur, oeste, norte, este, zoom, tipos or None)
+    return JsonResponse({'success': True, 'zoom': zoom, **datos})
+
+def api_tesela(request, z, x, y):
+    """
+    Tesela GeoJSON z/x/y (esquema XYZ de los mapas web) con los lugares,
+    establecimientos, actividades y rutas que contiene. Se sirve desde la
+    caché de disco y con Cache-Control público para el navegador y la CDN.
+    """
+    if z > ZOOM_MAXIMO_TESELAS or x >= (1 << z) or y >= (1 << z):
+        return JsonResponse({
+            'success': False,
+            'error': 'Tesela fuera de rango'
+        }, status=404)
+    
+    respuesta = HttpResponse(obtener_tesela(z, x, y), content_type='application/geo+json')
+    patch_cache_control(respuesta, public=True, max_age=max_age_teselas())
+    return respuesta
+
 def api_rutas_con_mapas(request):
     """API que lista todas las rutas que tienen puntos con coordenadas"""
     rutas_con_mapas = []
     
-    # Obtener rutas que tienen al menos un punto
-    rutas = Ruta.objects.filter(puntos__isnull=False).distinct()
+    # Rutas con al menos un punto, según el resumen guardado en cada ruta
+    rutas = Ruta.objects.filter(total_puntos__gt=0)
     
     for ruta in rutas:
-        if ruta.tiene_puntos():
-            rutas_con_mapas.append({
-                'id': ruta.id,
-                'nombre': ruta.nombre,
-                'slug': ruta.slug,
-                'dificultad': ruta.dificultad,
-                'dificultad_display': ruta.get_dificultad_display(),
-                'distancia': float(ruta.distancia),
-                'duracion_estimada': ruta.duracion_estimada,
-                'total_puntos': ruta.puntos.count(),
-                'centro_mapa': ruta.get_centro_mapa(),
-                'imagen_principal': ruta.imagen_principal.url if ruta.imagen_principal else None,
-                'url_detalle': ruta.get_absolute_url(),
-                'url_mapa': reverse('turismo:ruta_mapa', kwargs={'slug': ruta.slug}),
-            })
+        rutas_con_mapas.append({
+            'id': ruta.id,
+            'nombre': ruta.nombre,
+            'slug': ruta.slug,
+            'dificultad': ruta.dificultad,
+            'dificultad_display': ruta.get_dificultad_display(),
+            'distancia': float(ruta.distancia),
+            'duracion_estimada': ruta.duracion_estimada,
+            'total_puntos': ruta.total_puntos,
+            'centro_mapa': ruta.get_centro_mapa(),
+            'imagen_principal': ruta.imagen_principal.url if ruta.imagen_principal else None,
+            'url_detalle': ruta.get_absolute_url(),
+            'url_mapa': reverse('turismo:ruta_mapa', kwargs={'slug': ruta.slug}),
+            'polilinea': ruta.get_polilinea_miniatura(),
+        })
     
     return JsonResponse({
         'success': True,
@@ -1232,65 +1243,20 @@ def api_comparar_rutas(request):
         }, status=400)
     
     try:
-        rutas = Ruta.objects.filter(id__in=rutas_ids)
-        rutas_data = []
-        
-        # Colores para diferenciar rutas
-        colores_rutas = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
-        
-        for i, ruta in enumerate(rutas):
-            if ruta.tiene_puntos():
-                config_mapa = ruta.get_configuracion_mapa()
-                # Asignar color único a cada ruta
-                config_mapa['color_ruta'] = colores_rutas[i % len(colores_rutas)]
-                
-                rutas_data.append({
-                    'id': ruta.id,
-                    'nombre': ruta.nombre,
-                    'slug': ruta.slug,
-                    'config_mapa': config_mapa,
-                    'color': colores_rutas[i % len(colores_rutas)],
-                })
-        
-        # Calcular centro y bounds generales
-        todas_coordenadas = []
-        for ruta in rutas:
-            puntos = ruta.get_puntos_ordenados()
-            for punto in puntos:
-                todas_coordenadas.append({'lat': punto.latitud, 'lng': punto.longitud})
-        
-        centro_general = None
-        bounds_general = None
-        
-        if todas_coordenadas:
-            # Calcular centro promedio
-            centro_lat = sum(coord['lat'] for coord in todas_coordenadas) / len(todas_coordenadas)
-            centro_lng = sum(coord['lng'] for coord in todas_coordenadas) / len(todas_coordenadas)
-            centro_general = {'lat': centro_lat, 'lng': centro_lng}
-            
-            # Calcular bounds
-            lats = [coord['lat'] for coord in todas_coordenadas]
-            lngs = [coord['lng'] for coord in todas_coordenadas]
-            bounds_general = {
-                'north': max(lats),
-                'south': min(lats),
-                'east': max(lngs),
-                'west': min(lngs)
-            }
-        
+        rutas_ids = [int(ruta_id) for ruta_id in rutas_ids]
+    except ValueError:
         return JsonResponse({
-            'success': True,
-            'rutas': rutas_data,
-            'centro_general': centro_general,
-            'bounds_general': bounds_general,
-            'total_rutas': len(rutas_data)
-        })
-        
-    except Exception as e:
+            'success': False,
+            'error': 'Los ids de las rutas deben ser números enteros'
+        }, status=400)
+    
+    if len(set(rutas_ids)) > get_max_rutas_comparar():
         return JsonResponse({
             'success': False,
-            'error': str(e)
-        }, status=500)
+            'error': f'Se pueden comparar como máximo {get_max_rutas_comparar()} rutas'
+        }, status=400)
+    
+    return JsonResponse({'success': True, **comparar_rutas(rutas_ids)})
 
 def validar_coordenadas_ruta(request):
     """API para validar que todas las coordenadas de una ruta sean válidas"""
@@ -1360,95 +1326,19 @@ def api_busqueda_rapida(request):
             'eventos': []
         })
     
-    # Buscar en lugares turísticos (máximo 3)
-    lugares = LugarTuristico.objects.filter(
-        Q(nombre__icontains=query) | Q(descripcion__icontains=query)
-    )[:3]
+    # Se responde desde el índice en memoria del proceso (turismo/autocompletar.py)
+    inicio = time.perf_counter()
+    resultados = autocompletar(query)
+    if not any(resultados.values()):
+        # Sin coincidencias: se prueba con las palabras corregidas (core/trigramas.py)
+        correccion = corregir(query)
+        if correccion:
+            resultados = autocompletar(correccion)
+            resultados['correccion'] = correccion
     
-    lugares_data = [{
-        'nombre': lugar.nombre,
-        'descripcion': lugar.descripcion,
-        'url': lugar.get_absolute_url(),
-        'categoria': lugar.categoria.nombre
-    } for lugar in lugares]
-    
-    # Buscar en transportes (máximo 3)
-    transportes = Transporte.objects.filter(
-        Q(nombre__icontains=query) | Q(descripcion__icontains=query) |
-        Q(origen__icontains=query) | Q(destino__icontains=query),
-        disponible=True
-    )[:3]
-    
-    transportes_data = [{
-        'nombre': transporte.nombre,
-        'origen': transporte.origen,
-        'destino': transporte.destino,
-        'url': transporte.get_absolute_url(),
-        'tipo': transporte.get_tipo_display()
-    } for transporte in transportes]
-    
-    # Buscar en artesanías (máximo 3)
-    artesanias = Artesania.objects.filter(
-        Q(nombre__icontains=query) | Q(descripcion__icontains=query) |
-        Q(artesano__icontains=query) | Q(lugar_origen__icontains=query),
-        disponible_venta=True
-    )[:3]
-    
-    artesanias_data = [{
-        'nombre': artesania.nombre,
-        'artesano': artesania.artesano,
-        'lugar_origen': artesania.lugar_origen,
-        'url': artesania.get_absolute_url(),
-        'categoria': artesania.categoria.nombre
-    } for artesania in artesanias]
-    
-    # Buscar en actividades físicas (máximo 3)
-    actividades = ActividadFisica.objects.filter(
-        Q(nombre__icontains=query) | Q(descripcion__icontains=query) |
-        Q(ubicacion__icontains=query) | Q(instructor_guia__icontains=query),
-        disponible=True
-    )[:3]
-    
-    actividades_data = [{
-        'nombre': actividad.nombre,
-        'ubicacion': actividad.ubicacion,
-        'dificultad': actividad.get_dificultad_display(),
-        'url': actividad.get_absolute_url(),
-        'categoria': actividad.categoria.nombre
-    } for actividad in actividades]
-    
-    # Buscar en establecimientos (máximo 2)
-    establecimientos = Establecimiento.objects.filter(
-        Q(nombre__icontains=query) | Q(descripcion__icontains=query)
-    )[:2]
-    
-    establecimientos_data = [{
-        'nombre': establecimiento.nombre,
-        'tipo': establecimiento.get_tipo_display(),
-        'direccion': establecimiento.direccion,
-        'url': establecimiento.get_absolute_url()
-    } for establecimiento in establecimientos]
-    
-    # Buscar en eventos (máximo 2)
-    eventos = Evento.objects.filter(
-        Q(titulo__icontains=query) | Q(descripcion__icontains=query)
-    )[:2]
-    
-    eventos_data = [{
-        'nombre': evento.titulo,
-        'fecha': evento.fecha_inicio.strftime('%d/%m/%Y'),
-        'lugar': evento.lugar,
-        'url': evento.get_absolute_url()
-    } for evento in eventos]
-    
-    return JsonResponse({
-        'lugares': lugares_data,
-        'transportes': transportes_data,
-        'artesanias': artesanias_data,
-        'actividades': actividades_data,
-        'establecimientos': establecimientos_data,
-        'eventos': eventos_data
-    })
+    conteos = {grupo: len(datos) for grupo, datos in resultados.items() if grupo != 'correccion'}
+    registrar_busqueda('rapida', query, inicio, sum(conteos.values()), conteos)
+    return JsonResponse(resultados)
 
 def api_transporte_list(request):
     """API JSON para lista de transportes"""
@@ -1525,14 +1415,15 @@ class RutaMapaAdminView(DetailView):
         context = super().get_context_data(**kwargs)
         
         # Configuración actual del mapa
+        datos_mapa = DatosMapaRuta(self.object)
         context['mapa_config_actual'] = json.dumps(
-            self.object.get_configuracion_mapa(), 
+            datos_mapa.get_configuracion_mapa(), 
             indent=2
         )
         
         # Puntos de la ruta con información detallada
         puntos_detalle = []
-        for punto in self.object.get_puntos_ordenados():
+        for punto in datos_mapa.puntos:
             puntos_detalle.append({
                 'id': punto.id,
                 'orden': punto.orden,
@@ -1655,16 +1546,19 @@ class ExportarRutaView(DetailView):
         ruta = self.get_object()
         formato = request.GET.get('formato', 'json')
         
+        if formato not in ('json', 'gpx', 'kml'):
+            return JsonResponse({'error': 'Formato no soportado'}, status=400)
+        
+        # Los puntos se leen una vez para cualquier formato
+        datos_mapa = DatosMapaRuta(ruta)
         if formato == 'json':
-            return self.exportar_json(ruta)
+            return self.exportar_json(ruta, datos_mapa)
         elif formato == 'gpx':
-            return self.exportar_gpx(ruta)
-        elif formato == 'kml':
-            return self.exportar_kml(ruta)
+            return self.exportar_gpx(ruta, datos_mapa)
         else:
-            return JsonResponse({'error': 'Formato no soportado'}, status=400)
+            return self.exportar_kml(ruta, datos_mapa)
     
-    def exportar_json(self, ruta):
+    def exportar_json(self, ruta, datos_mapa):
         """Exportar ruta en formato JSON"""
         data = {
             'ruta': {
@@ -1674,8 +1568,8 @@ class ExportarRutaView(DetailView):
                 'distancia': float(ruta.distancia),
                 'duracion_estimada': ruta.duracion_estimada,
             },
-            'puntos': ruta.get_coordenadas_puntos(),
-            'configuracion_mapa': ruta.get_configuracion_mapa(),
+            'puntos': datos_mapa.coordenadas,
+            'configuracion_mapa': datos_mapa.get_configuracion_mapa(),
             'exportado_en': timezone.now().isoformat(),
         }
         
@@ -1683,7 +1577,7 @@ class ExportarRutaView(DetailView):
         response['Content-Disposition'] = f'attachment; filename="ruta_{ruta.slug}.json"'
         return response
     
-    def exportar_gpx(self, ruta):
+    def exportar_gpx(self, ruta, datos_mapa):
         """Exportar ruta en formato GPX para GPS"""
         # Generar contenido GPX básico
         gpx_content = f'''<?xml version="1.0" encoding="UTF-8"?>
@@ -1694,7 +1588,7 @@ class ExportarRutaView(DetailView):
         <trkseg>
 '''
         
-        for punto in ruta.get_puntos_ordenados():
+        for punto in datos_mapa.puntos:
             gpx_content += f'''            <trkpt lat="{punto.latitud}" lon="{punto.longitud}">
                 <name>{punto.get_nombre_display()}</name>
                 <desc>{punto.get_descripcion_display()}</desc>
@@ -1709,7 +1603,7 @@ class ExportarRutaView(DetailView):
         response['Content-Disposition'] = f'attachment; filename="ruta_{ruta.slug}.gpx"'
         return response
     
-    def exportar_kml(self, ruta):
+    def exportar_kml(self, ruta, datos_mapa):
         """Exportar ruta en formato KML para Google Earth"""
         # Generar contenido KML básico
         kml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
@@ -1725,7 +1619,7 @@ class ExportarRutaView(DetailView):
         
         # Agregar coordenadas (formato: longitud,latitud,altitud)
         coordenadas = []
-        for punto in ruta.get_puntos_ordenados():
+        for punto in datos_mapa.puntos:
             coordenadas.append(f"{punto.longitud},{punto.latitud},0")
         
         kml_content += "\n".join(coordenadas)
@@ -1737,7 +1631,7 @@ class ExportarRutaView(DetailView):
 '''
         
         # Agregar marcadores para cada punto
-        for punto in ruta.get_puntos_ordenados():
+        for punto in datos_mapa.puntos:
             kml_content += f'''        <Placemark>
             <name>{punto.get_nombre_display()}</name>
             <description>{punto.get_descripcion_display()}</description>
@@ -1869,199 +1763,68 @@ class TurismoSearchViewActualizada(ListView):
     paginate_by = 12
     
     def get_queryset(self):
+        inicio = time.perf_counter()
         query = self.request.GET.get('q', '').strip()
-        if not query:
-            return []
-        
-        resultados = []
-        
-        # 1. Buscar en LUGARES TURÍSTICOS
-        try:
-            lugares = LugarTuristico.objects.filter(
-                Q(nombre__icontains=query) | 
-                Q(descripcion__icontains=query)
-            )
-            
-            for lugar in lugares:
-                resultados.append({
-                    'tipo': 'lugar',
-                    'objeto': lugar,
-                    'nombre': lugar.nombre,
-                    'descripcion': lugar.descripcion,
-                    'imagen': lugar.imagen_principal,
-                    'url': lugar.get_absolute_url(),
-                    'categoria': lugar.categoria.nombre
-                })
-        except Exception as e:
-            print(f"Error buscando lugares: {e}")
-        
-        # 2. Buscar en ESTABLECIMIENTOS
-        try:
-            establecimientos = Establecimiento.objects.filter(
-                Q(nombre__icontains=query) | 
-                Q(descripcion__icontains=query) | 
-                Q(servicios__icontains=query)
-            )
-            
-            for estab in establecimientos:
-                resultados.append({
-                    'tipo': 'establecimiento',
-                    'objeto': estab,
-                    'nombre': estab.nombre,
-                    'descripcion': estab.descripcion,
-                    'imagen': estab.imagen,
-                    'url': estab.get_absolute_url(),
-                    'categoria': estab.get_tipo_display()
-                })
-        except Exception as e:
-            print(f"Error buscando establecimientos: {e}")
-        
-        # 3. Buscar en EVENTOS
-        try:
-            eventos = Evento.objects.filter(
-                Q(titulo__icontains=query) | 
-                Q(descripcion__icontains=query) | 
-                Q(lugar__icontains=query)
-            )
-            
-            for evento in eventos:
-                resultados.append({
-                    'tipo': 'evento',
-                    'objeto': evento,
-                    'nombre': evento.titulo,
-                    'descripcion': evento.descripcion,
-                    'imagen': evento.imagen,
-                    'url': evento.get_absolute_url(),
-                    'categoria': 'Evento'
-                })
-        except Exception as e:
-            print(f"Error buscando eventos: {e}")
-        
-        # 4. Buscar en RUTAS
-        try:
-            rutas = Ruta.objects.filter(
-                Q(nombre__icontains=query) | 
-                Q(descripcion__icontains=query)
-            )
-            
-            for ruta in rutas:
-                resultados.append({
-                    'tipo': 'ruta',
-                    'objeto': ruta,
-                    'nombre': ruta.nombre,
-                    'descripcion': ruta.descripcion,
-                    'imagen': ruta.imagen_principal,
-                    'url': ruta.get_absolute_url(),
-                    'categoria': f"Ruta ({ruta.get_dificultad_display()})"
-                })
-        except Exception as e:
-            print(f"Error buscando rutas: {e}")
-        
-        # 5. Buscar en TRANSPORTES
-        try:
-            transportes = Transporte.objects.filter(
-                Q(nombre__icontains=query) | 
-                Q(descripcion__icontains=query) |
-                Q(origen__icontains=query) | 
-                Q(destino__icontains=query),
-                disponible=True
-            )
-            
-            for transporte in transportes:
-                resultados.append({
-                    'tipo': 'transporte',
-                    'objeto': transporte,
-                    'nombre': transporte.nombre,
-                    'descripcion': transporte.descripcion,
-                    'imagen': getattr(transporte, 'imagen', None),
-                    'url': transporte.get_absolute_url(),
-                    'categoria': f"Transporte ({transporte.get_tipo_display()})"
-                })
-        except Exception as e:
-            print(f"Error buscando transportes: {e}")
-        
-        # 6. Buscar en ARTESANÍAS
-        try:
-            artesanias = Artesania.objects.filter(
-                Q(nombre__icontains=query) | 
-                Q(descripcion__icontains=query) |
-                Q(artesano__icontains=query) | 
-                Q(lugar_origen__icontains=query),
-                disponible_venta=True
-            )
-            
-            for artesania in artesanias:
-                categoria_nombre = "Sin categoría"
-                if hasattr(artesania, 'categoria') and artesania.categoria:
-                    categoria_nombre = artesania.categoria.nombre
-                
-                resultados.append({
-                    'tipo': 'artesania',
-                    'objeto': artesania,
-                    'nombre': artesania.nombre,
-                    'descripcion': artesania.descripcion,
-                    'imagen': artesania.imagen_principal,
-                    'url': artesania.get_absolute_url(),
-                    'categoria': f"Artesanía ({categoria_nombre})"
-                })
-        except Exception as e:
-            print(f"Error buscando artesanías: {e}")
+        self.form = BusquedaAvanzadaForm(self.request.GET or None)
+        if self.form.is_valid():
+            tipos = self.form.get_tipos()
+            solo_destacados = self.form.cleaned_data['solo_destacados']
+            orden = self.form.get_orden()
+        else:
+            tipos, solo_destacados, orden = TIPOS_TURISMO, False, 'relevancia'
+        
+        # Una consulta sobre el índice de texto completo (core/busqueda.py),
+        # con los filtros dentro de la consulta. Los pks ordenados de las
+        # primeras páginas y los totales se guardan por consulta normalizada
+        # (core/resultados.py) y al paginar solo se cargan los documentos de
+        # la página pedida; las páginas siguientes se leen con LIMIT/OFFSET
+        def documentos_de(texto):
+            return buscar(texto, tipos=tipos, solo_destacados=solo_destacados, orden=orden)
+        
+        def consultar(texto):
+            documentos = documentos_de(texto)
+            conteos = contar_por_tipo(documentos)
+            return {
+                'ids': list(documentos.values_list('pk', flat=True)[:limite_ids(self.paginate_by)]),
+                'total': sum(conteos.values()),
+                'conteos': conteos,
+            }
         
-        # 7. Buscar en ACTIVIDADES FÍSICAS
-        try:
-            actividades = ActividadFisica.objects.filter(
-                Q(nombre__icontains=query) | 
-                Q(descripcion__icontains=query) |
-                Q(ubicacion__icontains=query) | 
-                Q(instructor_guia__icontains=query),
-                disponible=True
+        def calcular():
+            resultados = consultar(query)
+            if not resultados['ids'] and query:
+                # Sin coincidencias: se corrigen las palabras mal escritas con
+                # el índice de trigramas (core/trigramas.py)
+                correccion = corregir(query)
+                if correccion:
+                    resultados = consultar(correccion)
+                    resultados['correccion'] = correccion
+            return resultados
+        
+        self.resultados = obtener_resultados(
+            AMBITO_DOCUMENTOS, query, calcular,
+            tipos=sorted(tipos), solo_destacados=solo_destacados, orden=orden
+        )
+        if query and es_primera_pagina(self.request, self.page_kwarg):
+            registrar_busqueda(
+                'turismo', query, inicio, self.resultados['total'], self.resultados['conteos']
             )
-            
-            for actividad in actividades:
-                categoria_nombre = "Sin categoría"
-                if hasattr(actividad, 'categoria') and actividad.categoria:
-                    categoria_nombre = actividad.categoria.nombre
-                
-                resultados.append({
-                    'tipo': 'actividad',
-                    'objeto': actividad,
-                    'nombre': actividad.nombre,
-                    'descripcion': actividad.descripcion,
-                    'imagen': actividad.imagen_principal,
-                    'url': actividad.get_absolute_url(),
-                    'categoria': f"Actividad ({categoria_nombre})"
-                })
-        except Exception as e:
-            print(f"Error buscando actividades físicas: {e}")
-        
-        # Debug: mostrar cuántos resultados encontramos por tipo
-        tipos_count = {}
-        for resultado in resultados:
-            tipo = resultado['tipo']
-            tipos_count[tipo] = tipos_count.get(tipo, 0) + 1
-        
-        print(f"Búsqueda para '{query}': {tipos_count}")
-        print(f"Total resultados: {len(resultados)}")
-        
-        return resultados
+        texto = self.resultados.get('correccion') or query
+        return ResultadosPorIds(
+            self.resultados['ids'], DocumentoBusqueda.objects.all(),
+            total=self.resultados['total'],
+            restantes=lambda: documentos_de(texto).values_list('pk', flat=True),
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['query'] = self.request.GET.get('q', '')
+        context['form_busqueda'] = self.form
+        context['total_resultados'] = context['paginator'].count
         
-        # Contar resultados por tipo
-        resultados = context['resultados']
-        context['total_resultados'] = len(resultados)
-        
-        # Agrupar por tipo para los filtros
-        tipos_count = {}
-        for resultado in resultados:
-            tipo = resultado['tipo']
-            if tipo not in tipos_count:
-                tipos_count[tipo] = 0
-            tipos_count[tipo] += 1
-        
-        context['tipos_count'] = tipos_count
+        # Contar resultados por tipo para los filtros
+        context['tipos_count'] = self.resultados['conteos']
+        context['consulta_corregida'] = self.resultados.get('correccion')
         
         return context
     
@@ -2394,13 +2157,22 @@ def api_galeria_busqueda(request):
     if len(query) < 3:
         return JsonResponse({'fotografias': []})
     
-    fotografias = Fotografia.objects.filter(
-        Q(titulo__icontains=query) |
-        Q(descripcion__icontains=query) |
-        Q(ubicacion__icontains=query) |
-        Q(fotografo__icontains=query),
-        activa=True
-    ).select_related('categoria')[:8]
+    # Las 8 fotografías más relevantes según el índice de búsqueda; sus pks
+    # se guardan por consulta normalizada (core/resultados.py) y los datos
+    # se cargan en cada petición
+    inicio = time.perf_counter()
+    
+    def calcular():
+        ids = buscar(query, tipos=[TIPO_FOTOGRAFIA], orden='relevancia').values_list(
+            'objeto_id', flat=True
+        )[:8]
+        return {'ids': list(ids)}
+    
+    resultados = obtener_resultados(AMBITO_DOCUMENTOS, query, calcular, tipos=[TIPO_FOTOGRAFIA])
+    fotografias = ResultadosPorIds(
+        resultados['ids'], Fotografia.objects.select_related('categoria')
+    )[:]
+    registrar_busqueda('galeria', query, inicio, len(fotografias))
     
     data = []
     for foto in fotografias: